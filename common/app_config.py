@@ -1,5 +1,5 @@
 import os
-from typing import Type
+from typing import Optional, Type
 
 from pydantic import Field
 from pydantic_settings import BaseSettings
@@ -35,12 +35,34 @@ class Config(BaseConfig):
     POSTGRES_USER: str = Field(env='POSTGRES_USER')
     POSTGRES_PASSWORD: str = Field(env='POSTGRES_PASSWORD')
     POSTGRES_DB: str = Field(env='POSTGRES_DB')
+    POSTGRES_POOL_MAX_CONNECTIONS: Optional[int] = Field(env='POSTGRES_POOL_MAX_CONNECTIONS', default=None)
+    # Server-side connection budget; the launcher splits what is not reserved across its workers.
+    POSTGRES_MAX_CONNECTIONS: int = Field(env='POSTGRES_MAX_CONNECTIONS', default=100)
+    POSTGRES_RESERVED_CONNECTIONS: int = Field(env='POSTGRES_RESERVED_CONNECTIONS', default=10)
+    POSTGRES_ASYNC_POOL_MIN_SIZE: int = Field(env='POSTGRES_ASYNC_POOL_MIN_SIZE', default=2)
+    POSTGRES_ASYNC_POOL_MAX_SIZE: int = Field(env='POSTGRES_ASYNC_POOL_MAX_SIZE', default=20)
+    # Connections each worker opens and validates at startup, the floor of the adaptive sizing
+    POSTGRES_POOL_MIN_CONNECTIONS: int = Field(env='POSTGRES_POOL_MIN_CONNECTIONS', default=2)
+    # Adaptive sizing: the connections kept open grow while checkout waits exceed the target and shrink
+    # while they idle, between the pools' minimum and maximum sizes
+    POSTGRES_POOL_ADAPTIVE: bool = Field(env='POSTGRES_POOL_ADAPTIVE', default=False)
+    POSTGRES_POOL_ADAPTIVE_TARGET_WAIT_MS: float = Field(env='POSTGRES_POOL_ADAPTIVE_TARGET_WAIT_MS', default=5.0)
+    POSTGRES_POOL_ADAPTIVE_INTERVAL: float = Field(env='POSTGRES_POOL_ADAPTIVE_INTERVAL', default=10.0)
+    POSTGRES_POOL_ADAPTIVE_STEP: int = Field(env='POSTGRES_POOL_ADAPTIVE_STEP', default=1)
+    # Seconds of checkout waits summarized by GET /admin/pool
+    POSTGRES_POOL_REPORT_WINDOW: float = Field(env='POSTGRES_POOL_REPORT_WINDOW', default=300.0)
+    # Server-side prepared statements, off by default: a statement is prepared on a connection the n-th
+    # time it runs there, at most MAX per connection. Leave it at 0 behind a transaction-pooling proxy
+    PREPARED_STATEMENTS_THRESHOLD: int = Field(env='PREPARED_STATEMENTS_THRESHOLD', default=0)
+    PREPARED_STATEMENTS_MAX: int = Field(env='PREPARED_STATEMENTS_MAX', default=100)
 
     RABBITMQ_HOST: str = Field(env='RABBITMQ_HOST')
     RABBITMQ_PORT: int = Field(env='RABBITMQ_PORT')
     RABBITMQ_VIRTUAL_HOST: str = Field(env='RABBITMQ_VIRTUAL_HOST', default='/')
     RABBITMQ_USER: str = Field(env='RABBITMQ_USER')
     RABBITMQ_PASSWORD: str = Field(env='RABBITMQ_PASSWORD')
+    RABBITMQ_POOL_MAX_CONNECTIONS: int = Field(env='RABBITMQ_POOL_MAX_CONNECTIONS', default=4)
+    RABBITMQ_MAX_CONNECTIONS: int = Field(env='RABBITMQ_MAX_CONNECTIONS', default=64)
 
     AUTH_JWT_SECRET: str = Field(env='AUTH_JWT_SECRET')
 
@@ -49,6 +71,85 @@ class Config(BaseConfig):
     QUEUE_NAME_PREFIX: str = Field(env='QUEUE_NAME_PREFIX', default='')
     EMAIL_SERVICE_PROCESSOR_QUEUE_NAME: str = Field(env='EmailServiceProcessor_QUEUE_NAME', default='email-transmitter')
 
+    # Audit writes: 'sync', 'deferred' or 'off', per table in AUDIT_MODES (e.g. "task=deferred")
+    AUDIT_MODE: str = Field(env='AUDIT_MODE', default='sync')
+    AUDIT_MODES: str = Field(env='AUDIT_MODES', default='')
+    AUDIT_BATCH_SIZE: int = Field(env='AUDIT_BATCH_SIZE', default=500)
+    AUDIT_FLUSH_INTERVAL: float = Field(env='AUDIT_FLUSH_INTERVAL', default=1.0)
+    AUDIT_MAX_PENDING: int = Field(env='AUDIT_MAX_PENDING', default=10000)
+    # Monthly audit partitions: created this many months ahead, removed after the retention (0 keeps all)
+    AUDIT_PARTITION_PREMAKE_MONTHS: int = Field(env='AUDIT_PARTITION_PREMAKE_MONTHS', default=3)
+    AUDIT_RETENTION_MONTHS: int = Field(env='AUDIT_RETENTION_MONTHS', default=0)
+    # 'drop' deletes expired partitions; 'detach' keeps them as standalone tables for archiving
+    AUDIT_RETENTION_ACTION: str = Field(env='AUDIT_RETENTION_ACTION', default='drop')
+
+    # Archival of soft-deleted tasks (maintenance.py archive-tasks)
+    TASK_ARCHIVE_GRACE_DAYS: int = Field(env='TASK_ARCHIVE_GRACE_DAYS', default=30)
+    TASK_ARCHIVE_BATCH_SIZE: int = Field(env='TASK_ARCHIVE_BATCH_SIZE', default=1000)
+    TASK_ARCHIVE_BATCH_PAUSE: float = Field(env='TASK_ARCHIVE_BATCH_PAUSE', default=0.05)
+
+    # Prometheus /metrics; the launcher shares METRICS_DIR between its workers to report them all
+    METRICS_ENABLED: bool = Field(env='METRICS_ENABLED', default=True)
+    METRICS_TOKEN: str = Field(env='METRICS_TOKEN', default='')
+    METRICS_DIR: str = Field(env='METRICS_DIR', default='')
+    METRICS_SNAPSHOT_INTERVAL: float = Field(env='METRICS_SNAPSHOT_INTERVAL', default=5.0)
+    # Per-view query budgets (@query_budget): 'off', 'warn' (log and count) or 'raise'
+    QUERY_BUDGET_MODE: str = Field(env='QUERY_BUDGET_MODE', default='off')
+    # Slow query log (0 disables it); a sampled share of slow reads is logged with its EXPLAIN ANALYZE plan
+    SLOW_QUERY_THRESHOLD_MS: float = Field(env='SLOW_QUERY_THRESHOLD_MS', default=500.0)
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = Field(env='SLOW_QUERY_EXPLAIN_SAMPLE_RATE', default=0.1)
+    # Seconds between two plans of the same statement fingerprint
+    SLOW_QUERY_EXPLAIN_INTERVAL: float = Field(env='SLOW_QUERY_EXPLAIN_INTERVAL', default=300.0)
+    # Opt-in capture of sanitized request metadata for `benchmarks.replay`, one rotating file per process
+    TRAFFIC_CAPTURE_ENABLED: bool = Field(env='TRAFFIC_CAPTURE_ENABLED', default=False)
+    TRAFFIC_CAPTURE_DIR: str = Field(env='TRAFFIC_CAPTURE_DIR', default='traffic')
+    TRAFFIC_CAPTURE_MAX_BYTES: int = Field(env='TRAFFIC_CAPTURE_MAX_BYTES', default=64 * 1024 * 1024)
+    TRAFFIC_CAPTURE_BACKUPS: int = Field(env='TRAFFIC_CAPTURE_BACKUPS', default=10)
+    TRAFFIC_CAPTURE_SAMPLE_RATE: float = Field(env='TRAFFIC_CAPTURE_SAMPLE_RATE', default=1.0)
+    # Key of the id pseudonyms, required with the capture. Keep it stable across captures to be merged.
+    TRAFFIC_CAPTURE_SALT: str = Field(env='TRAFFIC_CAPTURE_SALT', default='')
+
+    # Cache tier: 'memory' (per process) or 'memcached' (shared by all workers and containers)
+    CACHE_BACKEND: str = Field(env='CACHE_BACKEND', default='memory')
+    CACHE_SERVERS: str = Field(env='CACHE_SERVERS', default='localhost:11211')
+    CACHE_TIMEOUT: float = Field(env='CACHE_TIMEOUT', default=0.25)
+    CACHE_KEY_PREFIX: str = Field(env='CACHE_KEY_PREFIX', default='todomvc')
+    CACHE_MAX_BYTES: int = Field(env='CACHE_MAX_BYTES', default=32 * 1024 * 1024)
+    CACHE_TOMBSTONE_TTL: int = Field(env='CACHE_TOMBSTONE_TTL', default=10)
+    # Persons, emails and unknown email addresses are cached only with the shared ('memcached') backend
+    MODEL_CACHE_TTL: int = Field(env='MODEL_CACHE_TTL', default=60)
+    NEGATIVE_EMAIL_CACHE_TTL: int = Field(env='NEGATIVE_EMAIL_CACHE_TTL', default=30)
+    # Task lists are cached only when this is above 0
+    TASK_LIST_CACHE_TTL: int = Field(env='TASK_LIST_CACHE_TTL', default=0)
+
+    # Response compression
+    COMPRESSION_MIN_SIZE: int = Field(env='COMPRESSION_MIN_SIZE', default=1024)
+    COMPRESSION_LEVEL: int = Field(env='COMPRESSION_LEVEL', default=6)
+    COMPRESSION_BROTLI_QUALITY: int = Field(env='COMPRESSION_BROTLI_QUALITY', default=5)
+    COMPRESSION_MIMETYPES: str = Field(
+        env='COMPRESSION_MIMETYPES',
+        default='application/json,text/html,text/css,text/plain,text/csv,application/javascript'
+    )
+    OPENAPI_CACHE_MAX_AGE: int = Field(env='OPENAPI_CACHE_MAX_AGE', default=300)
+
+    # Bulk task import
+    TASK_IMPORT_CHUNK_SIZE: int = Field(env='TASK_IMPORT_CHUNK_SIZE', default=5000)
+    TASK_IMPORT_MAX_REPORTED_ERRORS: int = Field(env='TASK_IMPORT_MAX_REPORTED_ERRORS', default=100)
+
+    # Pre-fork launcher
+    WEB_CONCURRENCY: Optional[int] = Field(env='WEB_CONCURRENCY', default=None)
+    WAITRESS_THREADS: int = Field(env='WAITRESS_THREADS', default=16)
+    LAUNCHER_GRACEFUL_TIMEOUT: int = Field(env='LAUNCHER_GRACEFUL_TIMEOUT', default=30)
+    LAUNCHER_STATS_INTERVAL: int = Field(env='LAUNCHER_STATS_INTERVAL', default=60)
+
+    # Task change events (server-sent events)
+    TASK_EVENTS_EXCHANGE_NAME: str = Field(env='TASK_EVENTS_EXCHANGE_NAME', default='task-events')
+    SSE_HEARTBEAT_INTERVAL: int = Field(env='SSE_HEARTBEAT_INTERVAL', default=15)
+    SSE_MAX_STREAM_SECONDS: int = Field(env='SSE_MAX_STREAM_SECONDS', default=300)
+    SSE_RETRY_MILLISECONDS: int = Field(env='SSE_RETRY_MILLISECONDS', default=3000)
+    # Streams are only served by the ASGI app, where an open stream holds a coroutine.
+    SSE_ASYNC_MAX_STREAMS: int = Field(env='SSE_ASYNC_MAX_STREAMS', default=1000)
+
     # OAuth Configuration
     GOOGLE_CLIENT_ID: str = Field(env='GOOGLE_CLIENT_ID', default="")
     GOOGLE_CLIENT_SECRET: str = Field(env='GOOGLE_CLIENT_SECRET', default="")
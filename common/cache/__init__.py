@@ -0,0 +1,7 @@
+from .lru import LRUCache, CacheStats
+from .backends import CacheBackend, CacheBackendError, MemoryBackend, MemcachedBackend, get_cache_backend
+from .single_flight import SingleFlight, AsyncSingleFlight, get_single_flight, get_single_flight_metrics
+from .serialization import dump_value, load_value, dump_model, load_model, dump_models, load_models
+from .tier import CacheNamespace, NamespaceMetrics, get_cache_namespace, get_namespace_metrics
+from .model_cache import ModelCache, EmailCache, normalize_email_address, get_person_cache, get_email_cache
+from .organization_cache import OrganizationRolesCache, get_organization_roles_cache
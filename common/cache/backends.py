@@ -0,0 +1,235 @@
+import hashlib
+import queue
+import socket
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Optional
+
+from common.cache.lru import LRUCache
+
+
+class CacheBackendError(Exception):
+    pass
+
+
+class CacheBackend(ABC):
+    """
+    Byte-string key/value store behind the cache tier. `ttl` is in seconds; 0 never expires.
+    """
+
+    @abstractmethod
+    def get_many(self, keys: Iterable[str]) -> Dict[str, bytes]:
+        pass
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.get_many([key]).get(key)
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: int = 0) -> bool:
+        pass
+
+    @abstractmethod
+    def add(self, key: str, value: bytes, ttl: int = 0) -> bool:
+        """
+        Stores the value only if the key does not exist, returning whether it was stored.
+        """
+
+    @abstractmethod
+    def incr(self, key: str, delta: int = 1) -> Optional[int]:
+        """
+        Increments an integer value, returning None when the key does not exist.
+        """
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryBackend(CacheBackend):
+    """
+    In-process LRU backend; entries are not shared between worker processes.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.entries = LRUCache(max_bytes)
+
+    def get_many(self, keys):
+        values = {}
+        for key in keys:
+            value = self.entries.get(key)
+            if value is not None:
+                values[key] = value
+        return values
+
+    def set(self, key, value, ttl=0):
+        return self.entries.set(key, value, ttl)
+
+    def add(self, key, value, ttl=0):
+        return self.entries.add(key, value, ttl)
+
+    def incr(self, key, delta=1):
+        return self.entries.incr(key, delta)
+
+    def delete(self, key):
+        self.entries.delete(key)
+
+
+class MemcachedServer:
+    """
+    A small pool of connections to one server speaking the memcached text protocol.
+    """
+
+    def __init__(self, address: str, timeout: float, max_idle_connections: int = 8):
+        host, _, port = address.rpartition(':')
+        self.address = (host or 'localhost', int(port))
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=max_idle_connections)
+
+    def _connect(self):
+        sock = socket.create_connection(self.address, timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock, sock.makefile('rb')
+
+    def call(self, request: bytes, read_response):
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            connection = None
+
+        try:
+            if connection is None:
+                connection = self._connect()
+            sock, reader = connection
+            sock.sendall(request)
+            response = read_response(reader)
+        except (OSError, ValueError) as e:
+            if connection is not None:
+                connection[0].close()
+            raise CacheBackendError(f"memcached {self.address[0]}:{self.address[1]}: {e}") from e
+
+        try:
+            self._idle.put_nowait(connection)
+        except queue.Full:
+            connection[0].close()
+        return response
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait()[0].close()
+            except queue.Empty:
+                return
+
+
+def _read_line(reader) -> bytes:
+    line = reader.readline()
+    if not line.endswith(b'\r\n'):
+        raise ValueError("connection closed")
+    return line[:-2]
+
+
+def _read_status(reader) -> bytes:
+    line = _read_line(reader)
+    if line.startswith((b'ERROR', b'CLIENT_ERROR', b'SERVER_ERROR')):
+        raise ValueError(line.decode(errors='replace'))
+    return line
+
+
+def _read_values(reader) -> Dict[bytes, bytes]:
+    values = {}
+    while True:
+        line = _read_status(reader)
+        if line == b'END':
+            return values
+        _, key, _, length = line.split(b' ')[:4]
+        data = reader.read(int(length) + 2)
+        values[key] = data[:-2]
+
+
+class MemcachedBackend(CacheBackend):
+    """
+    Shared backend speaking the memcached text protocol (memcached, or anything compatible such
+    as a locally started stand-in). Keys are distributed over the servers by CRC32.
+    """
+
+    MAX_KEY_LENGTH = 250
+
+    def __init__(self, servers: Iterable[str], timeout: float):
+        self.servers = [MemcachedServer(address, timeout) for address in servers]
+        if not self.servers:
+            raise ValueError("At least one memcached server is required.")
+
+    def _encode_key(self, key: str) -> bytes:
+        encoded = key.encode()
+        # Keys must be short and free of whitespace and control characters.
+        if len(encoded) > self.MAX_KEY_LENGTH or any(byte <= 32 or byte == 127 for byte in encoded):
+            encoded = b'h:' + hashlib.sha1(encoded).hexdigest().encode()
+        return encoded
+
+    def _server(self, encoded_key: bytes) -> MemcachedServer:
+        return self.servers[zlib.crc32(encoded_key) % len(self.servers)]
+
+    def get_many(self, keys):
+        encoded_keys = {self._encode_key(key): key for key in keys}
+        by_server = {}
+        for encoded_key in encoded_keys:
+            by_server.setdefault(self._server(encoded_key), []).append(encoded_key)
+
+        values = {}
+        for server, server_keys in by_server.items():
+            found = server.call(b'get ' + b' '.join(server_keys) + b'\r\n', _read_values)
+            values.update({encoded_keys[encoded_key]: value for encoded_key, value in found.items()})
+        return values
+
+    def _store(self, command: bytes, key: str, value: bytes, ttl: int) -> bool:
+        encoded_key = self._encode_key(key)
+        request = b'%s %s 0 %d %d\r\n%s\r\n' % (command, encoded_key, int(ttl), len(value), value)
+        return self._server(encoded_key).call(request, _read_status) == b'STORED'
+
+    def set(self, key, value, ttl=0):
+        return self._store(b'set', key, value, ttl)
+
+    def add(self, key, value, ttl=0):
+        return self._store(b'add', key, value, ttl)
+
+    def incr(self, key, delta=1):
+        encoded_key = self._encode_key(key)
+        response = self._server(encoded_key).call(b'incr %s %d\r\n' % (encoded_key, delta), _read_status)
+        return None if response == b'NOT_FOUND' else int(response)
+
+    def delete(self, key):
+        encoded_key = self._encode_key(key)
+        self._server(encoded_key).call(b'delete %s\r\n' % encoded_key, _read_status)
+
+    def close(self):
+        for server in self.servers:
+            server.close()
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def create_cache_backend(config, max_bytes: int = None) -> CacheBackend:
+    if config.CACHE_BACKEND == 'memcached':
+        servers = [server.strip() for server in config.CACHE_SERVERS.split(',') if server.strip()]
+        return MemcachedBackend(servers, config.CACHE_TIMEOUT)
+    if config.CACHE_BACKEND == 'memory':
+        return MemoryBackend(max_bytes if max_bytes is not None else config.CACHE_MAX_BYTES)
+    raise ValueError(f"Unsupported cache backend: {config.CACHE_BACKEND}")
+
+
+def get_cache_backend(config, partition: str = None, max_bytes: int = None) -> CacheBackend:
+    """
+    Returns the process-wide backend. With the memory backend, a named `partition` gets its own
+    store bounded by `max_bytes`, so e.g. attack traffic in one namespace cannot evict the rest.
+    """
+    key = partition if config.CACHE_BACKEND == 'memory' else None
+    with _backends_lock:
+        if key not in _backends:
+            _backends[key] = create_cache_backend(config, max_bytes)
+        return _backends[key]
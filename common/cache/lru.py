@@ -0,0 +1,134 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheStats:
+    """
+    Hit, miss and eviction counters of one cache.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def as_dict(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'sets': self.sets,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
+
+
+class LRUCache:
+    """
+    Thread-safe in-process cache of byte strings, bounded by their total size and evicting the
+    least recently used entries first. Entries expire `ttl` seconds after they were stored,
+    unless a different ttl is given when storing them (0 never expires).
+    """
+
+    def __init__(self, max_bytes: int, ttl: float = None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stats = CacheStats()
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def _remove(self, key):
+        value, _ = self._entries.pop(key)
+        self._size -= len(value)
+
+    def _store(self, key, value: bytes, ttl: float = None):
+        if len(value) > self.max_bytes:
+            return False
+        if key in self._entries:
+            self._remove(key)
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._entries[key] = (value, expires_at)
+        self._size += len(value)
+        self.stats.sets += 1
+        while self._size > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.stats.evictions += 1
+        return True
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._remove(key)
+            self.stats.expirations += 1
+            return None
+        return value
+
+    def get(self, key):
+        with self._lock:
+            value = self._lookup(key)
+            if value is None:
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def peek(self, key):
+        """
+        Returns the value without counting a lookup or refreshing its recency.
+        """
+        with self._lock:
+            return self._lookup(key)
+
+    def set(self, key, value: bytes, ttl: float = None) -> bool:
+        with self._lock:
+            return self._store(key, value, ttl)
+
+    def add(self, key, value: bytes, ttl: float = None) -> bool:
+        """
+        Stores the value only if the key is not cached yet, so a fill from a read that raced with
+        a write never replaces the value that write stored.
+        """
+        with self._lock:
+            if self._lookup(key) is not None:
+                return False
+            return self._store(key, value, ttl)
+
+    def incr(self, key, delta: int = 1):
+        """
+        Increments an integer value in place, returning None when the key is not cached.
+        """
+        with self._lock:
+            value = self._lookup(key)
+            if value is None:
+                return None
+            _, expires_at = self._entries[key]
+            incremented = int(value) + delta
+            value = str(incremented).encode()
+            self._size += len(value) - len(self._entries[key][0])
+            self._entries[key] = (value, expires_at)
+            return incremented
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def info(self) -> dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._size, 'max_bytes': self.max_bytes,
+                    **self.stats.as_dict()}
@@ -0,0 +1,132 @@
+from typing import Optional, Type
+
+from rococo.models.versioned_model import VersionedModel
+
+from common.app_config import config
+from common.cache.serialization import dump_model, load_model
+from common.cache.tier import CacheNamespace, get_cache_namespace
+from common.models import Email, Person
+
+
+def normalize_email_address(email_address: str) -> str:
+    return email_address.strip().lower()
+
+
+class ModelCache:
+    """
+    Read-through cache of versioned models keyed by entity_id, stored in the shared cache tier.
+
+    Entries are JSON snapshots of the models (see `common.cache.serialization`), so every caller
+    gets its own instance and mutating a model before saving it cannot leak into the cache. Saves
+    write the returned model (carrying its new `version`) through to the cache, and fills after a
+    read use add-if-absent, so a read that raced with a save can never replace the saved version
+    with the one it read.
+
+    The write-through only reaches the workers that share the tier, so model caches are only
+    used with a shared backend (see `get_person_cache`).
+    """
+
+    def __init__(self, namespace: CacheNamespace, model_class: Type[VersionedModel]):
+        self.namespace = namespace
+        self.model_class = model_class
+
+    def _load(self, value):
+        return load_model(self.model_class, value)
+
+    def get(self, entity_id: str):
+        return self._load(self.namespace.get(entity_id))
+
+    def fill(self, model):
+        self.namespace.fill(model.entity_id, dump_model(model))
+
+    def set(self, model):
+        self.namespace.set(model.entity_id, dump_model(model))
+
+    def invalidate(self, entity_id: str):
+        self.namespace.invalidate(entity_id)
+
+    def get_or_load(self, entity_id: str, loader):
+        return self._load(self.namespace.get_or_load(entity_id, lambda: dump_model(loader())))
+
+
+class EmailCache(ModelCache):
+    """
+    Email cache with a secondary index from normalized email address to entity_id, and a
+    negative cache of addresses known not to be registered.
+
+    Negative entries are keyed by the exact address (the lookup they stand in for is an exact
+    match) and are dropped as soon as an email with that address is saved.
+    """
+
+    def __init__(self, namespace: CacheNamespace, address_index: CacheNamespace, absent_addresses: CacheNamespace):
+        super().__init__(namespace, Email)
+        self.address_index = address_index
+        self.absent_addresses = absent_addresses
+
+    def is_known_absent(self, email_address: str) -> bool:
+        return self.absent_addresses.get(email_address) is not None
+
+    def remember_absent(self, email_address: str):
+        # add-if-absent: an invalidation by a concurrent signup wins over this lookup.
+        self.absent_addresses.fill(email_address, b'1')
+
+    def get_by_address(self, email_address: str):
+        entity_id = self.address_index.get(normalize_email_address(email_address))
+        if entity_id is None:
+            return None
+        email = self.get(entity_id.decode())
+        # The index is case-insensitive, the lookup it stands in for is an exact match.
+        if email is None or email.email != email_address:
+            return None
+        return email
+
+    def fill(self, email: Email):
+        super().fill(email)
+        self.address_index.fill(normalize_email_address(email.email), email.entity_id.encode())
+
+    def set(self, email: Email):
+        previous = self._load(self.namespace.get(email.entity_id, record=False))
+        if previous is not None:
+            previous_address = normalize_email_address(previous.email)
+            if previous_address != normalize_email_address(email.email):
+                self.address_index.invalidate(previous_address)
+        super().set(email)
+        self.address_index.set(normalize_email_address(email.email), email.entity_id.encode())
+        self.absent_addresses.invalidate(email.email)
+
+    def get_by_address_or_load(self, email_address: str, loader):
+        email = self.get_by_address(email_address)
+        if email is None:
+            value = self.address_index.single_flight.do(email_address, lambda: dump_model(loader()))[0]
+            email = self._load(value)
+            if email is not None:
+                self.fill(email)
+        return email
+
+
+def is_model_cache_enabled() -> bool:
+    # A per-worker entry would survive a save handled by another worker, which would keep
+    # reading the old row (or an address as unregistered) until the entry expired.
+    return config.CACHE_BACKEND != 'memory'
+
+
+def get_person_cache() -> Optional[ModelCache]:
+    """
+    Returns None unless the cache tier is shared by every worker.
+    """
+    if not is_model_cache_enabled():
+        return None
+    return ModelCache(get_cache_namespace(Person.__name__.lower(), config.MODEL_CACHE_TTL), Person)
+
+
+def get_email_cache() -> Optional[EmailCache]:
+    """
+    Returns None unless the cache tier is shared by every worker.
+    """
+    if not is_model_cache_enabled():
+        return None
+    return EmailCache(
+        get_cache_namespace(Email.__name__.lower(), config.MODEL_CACHE_TTL),
+        get_cache_namespace('email_address', config.MODEL_CACHE_TTL),
+        get_cache_namespace('email_absent', config.NEGATIVE_EMAIL_CACHE_TTL),
+    )
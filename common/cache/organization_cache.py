@@ -0,0 +1,35 @@
+from typing import Iterable
+
+from common.app_config import config
+from common.cache.serialization import dump_value, load_value
+from common.cache.tier import CacheNamespace, get_cache_namespace
+
+
+class OrganizationRolesCache:
+    """
+    Caches the organizations-with-roles rows of each person in the shared cache tier.
+
+    Saving a role invalidates its person; saving an organization invalidates every person with
+    a role in it, which the caller looks up (organization saves are rare, the reads are not).
+    """
+
+    def __init__(self, namespace: CacheNamespace):
+        self.namespace = namespace
+
+    def get(self, person_id: str):
+        value = self.namespace.get(person_id)
+        return load_value(value) if value is not None else None
+
+    def get_or_load(self, person_id: str, loader):
+        return load_value(self.namespace.get_or_load(person_id, lambda: dump_value(loader())))
+
+    def invalidate_person(self, person_id: str):
+        self.namespace.invalidate(person_id)
+
+    def invalidate_persons(self, person_ids: Iterable[str]):
+        for person_id in set(person_ids):
+            self.namespace.invalidate(person_id)
+
+
+def get_organization_roles_cache() -> OrganizationRolesCache:
+    return OrganizationRolesCache(get_cache_namespace('organization_roles', config.MODEL_CACHE_TTL))
@@ -0,0 +1,52 @@
+import json
+from datetime import datetime
+from typing import List, Optional, Type
+from uuid import UUID
+
+from rococo.models.versioned_model import VersionedModel
+
+# Datetimes are stored as {"$datetime": "<ISO 8601>"} so they load back as datetimes.
+DATETIME_TAG = '$datetime'
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return {DATETIME_TAG: value.isoformat()}
+    if isinstance(value, UUID):
+        return value.hex
+    raise TypeError(f"Cannot cache a value of type {type(value).__name__}")
+
+
+def _object_hook(value: dict):
+    if len(value) == 1 and DATETIME_TAG in value:
+        return datetime.fromisoformat(value[DATETIME_TAG])
+    return value
+
+
+def dump_value(value) -> bytes:
+    """
+    Encodes plain data (dicts, lists, strings, numbers, datetimes) for the shared cache tier as
+    JSON. Never pickle: the cache servers are shared, and unpickling what one of them returns
+    would run any code planted there.
+    """
+    return json.dumps(value, default=_default, separators=(',', ':')).encode()
+
+
+def load_value(value: bytes):
+    return json.loads(value, object_hook=_object_hook)
+
+
+def dump_model(model: Optional[VersionedModel]) -> Optional[bytes]:
+    return dump_value(model.as_dict()) if model is not None else None
+
+
+def load_model(model_class: Type[VersionedModel], value: Optional[bytes]) -> Optional[VersionedModel]:
+    return model_class.from_dict(load_value(value)) if value is not None else None
+
+
+def dump_models(models: List[VersionedModel]) -> bytes:
+    return dump_value([model.as_dict() for model in models])
+
+
+def load_models(model_class: Type[VersionedModel], value: bytes) -> List[VersionedModel]:
+    return [model_class.from_dict(data) for data in load_value(value)]
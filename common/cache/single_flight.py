@@ -0,0 +1,135 @@
+import asyncio
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller runs the function, callers
+    arriving while it runs wait for and share its result (or exception).
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, function):
+        """
+        Returns `(result, shared)`, where `shared` tells whether the result came from another
+        caller's in-flight call.
+        """
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = function()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def forget(self, key):
+        """
+        Detaches the in-flight call of `key`, so later callers start a new one. Call after a
+        write, so nobody who arrives after it shares a read that started before it.
+        """
+        with self._lock:
+            self._calls.pop(key, None)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {'calls': self.calls, 'coalesced': self.coalesced, 'in_flight': len(self._calls)}
+
+
+class AsyncSingleFlight:
+    """
+    `SingleFlight` for coroutines on one event loop. A waiter that is cancelled does not cancel
+    the shared call; the leader being cancelled fails the waiters with `CancelledError`.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.coalesced = 0
+        self._calls = {}
+
+    async def do(self, key, function):
+        """
+        Awaits `function()` once per key in flight and returns `(result, shared)`.
+        """
+        self.calls += 1
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future), True
+
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await function()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception retrieved when nobody was waiting for it.
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+        return result, False
+
+    def forget(self, key):
+        """
+        Detaches the in-flight call of `key`; see `SingleFlight.forget`.
+        """
+        self._calls.pop(key, None)
+
+    def as_dict(self) -> dict:
+        return {'calls': self.calls, 'coalesced': self.coalesced, 'in_flight': len(self._calls)}
+
+
+_single_flights = {}
+_single_flights_lock = threading.Lock()
+
+
+def get_single_flight(name: str, asynchronous: bool = False):
+    """
+    Returns the process-wide single-flight group called `name`.
+    """
+    with _single_flights_lock:
+        if name not in _single_flights:
+            _single_flights[name] = AsyncSingleFlight() if asynchronous else SingleFlight()
+        return _single_flights[name]
+
+
+def get_single_flight_metrics() -> dict:
+    with _single_flights_lock:
+        single_flights = dict(_single_flights)
+    return {name: single_flight.as_dict() for name, single_flight in single_flights.items()}
@@ -0,0 +1,205 @@
+import threading
+import time
+from typing import Callable, Optional
+
+from common.app_config import config
+from common.app_logger import logger
+from common.cache.backends import CacheBackend, CacheBackendError, get_cache_backend
+from common.cache.single_flight import SingleFlight
+
+TOMBSTONE = b'-'
+# Part of every key. Bumped when the encoding of the values changes, so entries written by an
+# older release are never decoded by a newer one (v2: JSON instead of pickle).
+KEY_FORMAT = 'v2'
+# memcached's default item size limit, less room for the key and version header
+MAX_VALUE_BYTES = 1024 * 1024 - 1024
+
+
+class NamespaceMetrics:
+    """
+    Hit, miss and backend latency counters of one cache namespace.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.sets = 0
+        self.fills = 0
+        self.invalidations = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.operations = 0
+        self.operation_seconds = 0.0
+        self.max_operation_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def count(self, name: str, amount: int = 1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self.operations += 1
+            self.operation_seconds += seconds
+            self.max_operation_seconds = max(self.max_operation_seconds, seconds)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'sets': self.sets,
+                'fills': self.fills,
+                'invalidations': self.invalidations,
+                'coalesced': self.coalesced,
+                'errors': self.errors,
+                'operations': self.operations,
+                'mean_operation_ms': round(self.operation_seconds / self.operations * 1000, 3)
+                if self.operations else 0.0,
+                'max_operation_ms': round(self.max_operation_seconds * 1000, 3),
+            }
+
+
+class CacheNamespace:
+    """
+    A namespace of keys in the shared cache tier.
+
+    Keys are prefixed with CACHE_KEY_PREFIX, KEY_FORMAT and the namespace name. Every value is
+    stored with the namespace version it was written under; `invalidate_all` bumps that version,
+    so all older values read as misses on every worker at once. `invalidate` replaces a single key with a short
+    tombstone, and fills after a read use add-if-absent, so a read racing a write or an
+    invalidation cannot store the value it read until the tombstone expires.
+
+    Loads of a missing key are coalesced per process (single-flight). Backend failures are logged
+    and counted, and degrade to misses: the cache is never the reason a request fails.
+    """
+
+    def __init__(self, name: str, backend: CacheBackend, ttl: int, tombstone_ttl: int):
+        self.name = name
+        self.backend = backend
+        self.ttl = ttl
+        self.tombstone_ttl = tombstone_ttl
+        self.metrics = NamespaceMetrics()
+        self.single_flight = SingleFlight()
+        self._prefix = f"{config.CACHE_KEY_PREFIX}:{KEY_FORMAT}:{name}"
+        self._version_key = f"{self._prefix}:version"
+
+    def _key(self, key: str) -> str:
+        return f"{self._prefix}:{key}"
+
+    def _call(self, operation: Callable, default=None):
+        started = time.perf_counter()
+        try:
+            return operation()
+        except CacheBackendError as e:
+            self.metrics.count('errors')
+            logger.warning(f"Cache namespace {self.name}: {e}")
+            return default
+        finally:
+            self.metrics.observe(time.perf_counter() - started)
+
+    def _current_version(self, stored: Optional[bytes]) -> bytes:
+        if stored is not None:
+            return stored
+        # A version key lost to eviction restarts from the clock, above any version used before.
+        version = str(time.time_ns()).encode()
+        self.backend.add(self._version_key, version)
+        return self.backend.get(self._version_key) or version
+
+    def _read(self, key: str) -> Optional[bytes]:
+        values = self.backend.get_many([self._version_key, self._key(key)])
+        version = self._current_version(values.get(self._version_key))
+        entry = values.get(self._key(key))
+        if entry is None or entry == TOMBSTONE:
+            return None
+        entry_version, _, value = entry.partition(b':')
+        return value if entry_version == version else None
+
+    def _entry(self, value: bytes) -> bytes:
+        return self._current_version(self.backend.get(self._version_key)) + b':' + value
+
+    def get(self, key: str, record: bool = True) -> Optional[bytes]:
+        value = self._call(lambda: self._read(key))
+        if record:
+            self.metrics.count('hits' if value is not None else 'misses')
+        return value
+
+    def set(self, key: str, value: bytes):
+        """
+        Write-through after a save: replaces any value or tombstone.
+        """
+        self.metrics.count('sets')
+        self.single_flight.forget(key)
+        if len(value) > MAX_VALUE_BYTES:
+            # Too large to cache; make sure no older value outlives the write.
+            self.invalidate(key)
+            return
+        self._call(lambda: self.backend.set(self._key(key), self._entry(value), self.ttl))
+
+    def fill(self, key: str, value: bytes):
+        """
+        Stores a value that was just read, unless a write or invalidation got there first.
+        """
+        if len(value) > MAX_VALUE_BYTES:
+            return
+        if self._call(lambda: self.backend.add(self._key(key), self._entry(value), self.ttl), default=False):
+            self.metrics.count('fills')
+
+    def invalidate(self, key: str):
+        self.metrics.count('invalidations')
+        self.single_flight.forget(key)
+        self._call(lambda: self.backend.set(self._key(key), TOMBSTONE, self.tombstone_ttl))
+
+    def invalidate_all(self):
+        self.metrics.count('invalidations')
+
+        def bump():
+            if self.backend.incr(self._version_key) is None:
+                self._current_version(None)
+                self.backend.incr(self._version_key)
+
+        self._call(bump)
+
+    def get_or_load(self, key: str, loader: Callable[[], Optional[bytes]]) -> Optional[bytes]:
+        """
+        Returns the cached value, or runs `loader` (once per process for concurrent callers)
+        and fills the cache with its result. A None result is not cached.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        def load():
+            loaded = loader()
+            if loaded is not None:
+                self.fill(key, loaded)
+            return loaded
+
+        value, shared = self.single_flight.do(key, load)
+        if shared:
+            self.metrics.count('coalesced')
+        return value
+
+
+_namespaces = {}
+_namespaces_lock = threading.Lock()
+
+
+def get_cache_namespace(name: str, ttl: int, max_bytes: int = None) -> CacheNamespace:
+    """
+    Returns the process-wide namespace. `max_bytes` gives the namespace its own memory bound
+    when the in-process backend is used.
+    """
+    with _namespaces_lock:
+        if name not in _namespaces:
+            backend = get_cache_backend(config, name if max_bytes is not None else None, max_bytes)
+            _namespaces[name] = CacheNamespace(name, backend, ttl, config.CACHE_TOMBSTONE_TTL)
+        return _namespaces[name]
+
+
+def get_namespace_metrics() -> dict:
+    with _namespaces_lock:
+        namespaces = dict(_namespaces)
+    return {name: namespace.metrics.as_dict() for name, namespace in namespaces.items()}
@@ -0,0 +1,101 @@
+import csv
+import io
+import json
+import re
+
+from common.helpers.exceptions import InputValidationError
+
+NDJSON_MIME_TYPES = ('application/x-ndjson', 'application/jsonl', 'application/x-jsonlines')
+CSV_MIME_TYPES = ('text/csv',)
+SUPPORTED_MIME_TYPES = NDJSON_MIME_TYPES + CSV_MIME_TYPES
+
+_TRUE_VALUES = ('true', 't', 'yes', 'y', '1')
+_FALSE_VALUES = ('false', 'f', 'no', 'n', '0', '')
+_UNDECODABLE = re.compile('[\udc80-\udcff]')
+
+
+def _parse_completed(value):
+    if value is None or isinstance(value, bool):
+        return bool(value)
+    if isinstance(value, int):
+        return value != 0
+    if isinstance(value, str):
+        normalized = value.strip().lower()
+        if normalized in _TRUE_VALUES:
+            return True
+        if normalized in _FALSE_VALUES:
+            return False
+    raise ValueError(f"'completed' must be a boolean, got {value!r}.")
+
+
+def _clean_row(row):
+    """
+    Validate a single decoded import row and return the fields used to build a Task.
+    """
+    if not isinstance(row, dict):
+        raise ValueError("Row must be an object.")
+
+    title = row.get('title')
+    if not isinstance(title, str) or not title.strip():
+        raise ValueError("'title' is required and cannot be empty.")
+    if '\x00' in title:
+        raise ValueError("'title' cannot contain NUL characters.")
+
+    return {
+        'title': title.strip(),
+        'completed': _parse_completed(row.get('completed')),
+    }
+
+
+def _iter_ndjson(stream):
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, _clean_row(json.loads(line)), None
+        except ValueError as e:
+            yield line_number, None, str(e)
+
+
+def _check_decoded(row):
+    # Bytes that are not UTF-8 were decoded as lone surrogates (see `_iter_csv`).
+    for value in row.values():
+        if isinstance(value, str) and _UNDECODABLE.search(value):
+            raise ValueError("Row is not valid UTF-8.")
+    return row
+
+
+def _iter_csv(stream):
+    # Undecodable bytes are kept as surrogates instead of failing the whole body, so the rows
+    # holding them are rejected one by one.
+    text_stream = io.TextIOWrapper(stream, encoding='utf-8', errors='surrogateescape', newline='')
+    reader = csv.DictReader(text_stream)
+    if not reader.fieldnames or 'title' not in reader.fieldnames:
+        raise InputValidationError("CSV header must contain a 'title' column.")
+
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            yield reader.line_num, None, f"Malformed CSV: {e}"
+            continue
+        try:
+            yield reader.line_num, _clean_row(_check_decoded(row)), None
+        except ValueError as e:
+            yield reader.line_num, None, str(e)
+
+
+def iter_task_import_rows(stream, mime_type: str):
+    """
+    Lazily parse an NDJSON or CSV task import body.
+
+    Yields `(line_number, row, error)` tuples; exactly one of `row` and `error` is set, so
+    invalid rows can be reported without aborting the import.
+    """
+    if mime_type in NDJSON_MIME_TYPES:
+        return _iter_ndjson(stream)
+    if mime_type in CSV_MIME_TYPES:
+        return _iter_csv(stream)
+    raise InputValidationError(f"Unsupported import content type: {mime_type}")
@@ -0,0 +1,4 @@
+from .connection import get_maintenance_connection
+from .audit_partitions import AUDITED_TABLES, AuditPartitionReport, maintain_audit_partitions
+from .task_archive import TaskArchiveReport, archive_tasks
+from .seed import SeedOptions, SeedReport, seed_database
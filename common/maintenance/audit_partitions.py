@@ -0,0 +1,131 @@
+import re
+from datetime import date, datetime
+from typing import List, Tuple
+
+from psycopg2 import errors
+
+from common.app_logger import logger
+
+AUDITED_TABLES = ["organization", "person", "email", "login_method", "person_organization_role", "task"]
+
+RETENTION_ACTIONS = ('drop', 'detach')
+
+_PARTITION_MONTH = re.compile(r'_p(\d{4})(\d{2})$')
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class AuditPartitionReport:
+
+    def __init__(self):
+        self.created = []
+        self.detached = []
+        self.dropped = []
+        self.skipped = []
+        self.sizes = {}
+
+    def as_dict(self) -> dict:
+        return {
+            'created': self.created,
+            'detached': self.detached,
+            'dropped': self.dropped,
+            'skipped': self.skipped,
+            'sizes': self.sizes,
+        }
+
+
+def list_partitions(cursor, audit_table: str) -> List[Tuple[str, date]]:
+    """
+    Returns the monthly partitions of an audit table with the month each one holds, oldest first.
+    """
+    cursor.execute(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = %s::regclass",
+        (audit_table,)
+    )
+    partitions = []
+    for (name,) in cursor.fetchall():
+        match = _PARTITION_MONTH.search(name)
+        if match:
+            partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def maintain_audit_partitions(
+        connection, premake_months: int, retention_months: int, retention_action: str = 'drop',
+        lock_timeout: str = '5s', dry_run: bool = False, today: date = None
+) -> AuditPartitionReport:
+    """
+    For every audit table:
+
+    - creates the partitions of the current month and the next `premake_months`;
+    - moves rows that fell into the default partition into partitions of their own month;
+    - detaches (and, with the 'drop' action, drops) the partitions of months older than
+      `retention_months`, and deletes such rows left in the default partition. A retention of 0
+      keeps everything.
+
+    Detaching and dropping briefly lock the audit table; when the lock is not granted within
+    `lock_timeout` the partition is skipped until the next run. `connection` must be in autocommit
+    mode, so every step commits on its own.
+    """
+    if retention_action not in RETENTION_ACTIONS:
+        raise ValueError(f"Unsupported audit retention action: {retention_action}")
+
+    report = AuditPartitionReport()
+    current_month = (today or datetime.utcnow().date()).replace(day=1)
+    cutoff = add_months(current_month, -retention_months) if retention_months > 0 else None
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT set_config('lock_timeout', %s, false)", (lock_timeout,))
+
+        for table in AUDITED_TABLES:
+            audit_table = f"{table}_audit"
+
+            months = {add_months(current_month, offset) for offset in range(premake_months + 1)}
+            cursor.execute(
+                f"SELECT DISTINCT date_trunc('month', changed_on)::date FROM {audit_table}_default"
+            )
+            months.update(month for (month,) in cursor.fetchall() if cutoff is None or month >= cutoff)
+
+            for month in sorted(months):
+                if dry_run:
+                    continue
+                cursor.execute("SELECT audit_ensure_partition(%s, %s)", (audit_table, month))
+                created = cursor.fetchone()[0]
+                if created:
+                    report.created.append(created)
+
+            for partition, month in list_partitions(cursor, audit_table):
+                if cutoff is None or month >= cutoff:
+                    continue
+                if dry_run:
+                    report.skipped.append(partition)
+                    continue
+                try:
+                    # CONCURRENTLY is not available while the table has a default partition.
+                    cursor.execute(f"ALTER TABLE {audit_table} DETACH PARTITION {partition}")
+                    report.detached.append(partition)
+                    if retention_action == 'drop':
+                        cursor.execute(f"DROP TABLE {partition}")
+                        report.dropped.append(partition)
+                except errors.LockNotAvailable:
+                    logger.warning(f"Could not lock {audit_table} to remove {partition}; retrying next run")
+                    report.skipped.append(partition)
+
+            if cutoff is not None and retention_action == 'drop' and not dry_run:
+                # Rows past retention that never got a partition of their own (e.g. without a changed_on).
+                cursor.execute(f"DELETE FROM {audit_table}_default WHERE changed_on < %s", (cutoff,))
+
+            cursor.execute(
+                "SELECT count(*), COALESCE(sum(pg_total_relation_size(inhrelid)), 0) "
+                "FROM pg_inherits WHERE inhparent = %s::regclass",
+                (audit_table,)
+            )
+            partition_count, total_bytes = cursor.fetchone()
+            report.sizes[audit_table] = {'partitions': partition_count, 'bytes': int(total_bytes)}
+
+    return report
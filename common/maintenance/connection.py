@@ -0,0 +1,19 @@
+import psycopg2
+
+
+def get_maintenance_connection(config, autocommit: bool = True):
+    """
+    Returns a dedicated connection for maintenance jobs, outside the request pools. Autocommit
+    by default, since statements such as DETACH PARTITION CONCURRENTLY refuse to run in a
+    transaction block.
+    """
+    connection = psycopg2.connect(
+        host=config.POSTGRES_HOST,
+        port=int(config.POSTGRES_PORT),
+        user=config.POSTGRES_USER,
+        password=config.POSTGRES_PASSWORD,
+        database=config.POSTGRES_DB,
+        application_name='todomvc-maintenance',
+    )
+    connection.autocommit = autocommit
+    return connection
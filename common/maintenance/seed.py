@@ -0,0 +1,359 @@
+import hashlib
+import io
+import math
+import multiprocessing
+import random
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List
+
+from common.app_logger import logger
+from common.maintenance.audit_partitions import add_months
+
+ZERO_ID = '0' * 32
+
+BASE_COLUMNS = ["entity_id", "version", "previous_version", "active", "changed_by_id", "changed_on"]
+
+# Load order; every table's columns as the migrations leave them
+SEED_COLUMNS = {
+    "organization": BASE_COLUMNS + ["name", "code", "description"],
+    "person": BASE_COLUMNS + ["first_name", "last_name"],
+    "email": BASE_COLUMNS + ["person_id", "email", "is_verified", "is_default"],
+    "login_method": BASE_COLUMNS + ["person_id", "method_type", "method_data", "email_id", "password"],
+    "person_organization_role": BASE_COLUMNS + ["person_id", "organization_id", "role"],
+    "task": BASE_COLUMNS + ["person_id", "title", "completed"],
+    "task_audit": BASE_COLUMNS + ["person_id", "title", "completed"],
+}
+
+# Tables whose secondary indexes are dropped during the load and rebuilt afterwards
+INDEXED_TABLES = ["organization", "person", "email", "login_method", "person_organization_role", "task"]
+
+FIRST_NAMES = [
+    "Ada", "Alan", "Amara", "Ana", "Arjun", "Beatriz", "Bo", "Carlos", "Chen", "Chloe", "Dmitri", "Elena", "Emeka",
+    "Fatima", "Grace", "Hana", "Hugo", "Ines", "Ivan", "Jamal", "Jin", "Kai", "Lars", "Leila", "Lucas", "Maya",
+    "Mei", "Nadia", "Noah", "Olga", "Omar", "Priya", "Rafael", "Rosa", "Sam", "Sara", "Tariq", "Yuki", "Zoe",
+]
+LAST_NAMES = [
+    "Abebe", "Andersen", "Bauer", "Costa", "Dubois", "Fernandez", "Garcia", "Haddad", "Ivanova", "Kim", "Kowalski",
+    "Lee", "Mensah", "Moreau", "Nakamura", "Nguyen", "Novak", "Okafor", "Patel", "Rossi", "Santos", "Schmidt",
+    "Silva", "Singh", "Smith", "Tanaka", "Wang", "Williams", "Yilmaz", "Zhang",
+]
+DOMAINS = ["example.com", "example.org", "example.net", "mail.example.com"]
+TASK_VERBS = [
+    "Buy", "Call", "Check", "Clean", "Email", "Finish", "Fix", "Plan", "Prepare", "Read", "Renew", "Review",
+    "Schedule", "Send", "Update", "Write",
+]
+TASK_OBJECTS = [
+    "groceries", "the report", "dentist appointment", "car insurance", "slides for Monday", "invoice", "passport",
+    "team notes", "the garden", "budget spreadsheet", "birthday gift", "library books", "flight tickets",
+    "quarterly review", "the bike", "project proposal",
+]
+TASK_DETAILS = ["", "", "", " before Friday", " (urgent)", " for the trip", " with Sam", " again", " - see notes"]
+
+
+@dataclass(frozen=True)
+class SeedOptions:
+    persons: int
+    seed: int = 0
+    # Tasks per person follow a log-normal distribution of this mean and sigma, capped
+    tasks_per_person: float = 20.0
+    task_skew: float = 1.5
+    max_tasks_per_person: int = 10000
+    # Mean earlier versions of a task kept in task_audit
+    audit_versions_per_task: float = 1.0
+    # Mean extra organizations a person is a member of, besides their own
+    memberships_per_person: float = 0.3
+    deleted_ratio: float = 0.05
+    completed_ratio: float = 0.4
+    history_days: int = 365
+    until: date = date(2025, 1, 1)
+    # One scrypt hash shared by every login method: hashing per person would dominate the run
+    password_hash: str = ''
+
+
+class SeedReport:
+
+    def __init__(self):
+        self.rows = {table: 0 for table in SEED_COLUMNS}
+        self.shards = 0
+        self.load_seconds = 0.0
+        self.index_seconds = 0.0
+        self.rebuilt_indexes = []
+
+    def add(self, rows: Dict[str, int]):
+        for table, count in rows.items():
+            self.rows[table] += count
+        self.shards += 1
+
+    def as_dict(self) -> dict:
+        total = sum(self.rows.values())
+        return {
+            'rows': self.rows,
+            'total_rows': total,
+            'shards': self.shards,
+            'load_seconds': round(self.load_seconds, 3),
+            'rows_per_second': round(total / self.load_seconds, 1) if self.load_seconds else None,
+            'index_seconds': round(self.index_seconds, 3),
+            'rebuilt_indexes': self.rebuilt_indexes,
+        }
+
+
+def make_id(seed: int, kind: str, index: int) -> str:
+    """
+    The id of the `index`th entity of a kind, needed by other people's rows (organizations are
+    joined by members), so it is derived from the seed rather than drawn in sequence.
+    """
+    return hashlib.blake2b(f"{seed}:{kind}:{index}".encode(), digest_size=16).hexdigest()
+
+
+def format_value(value) -> str:
+    if value is None:
+        return '\\N'
+    if value is True:
+        return 't'
+    if value is False:
+        return 'f'
+    return str(value)
+
+
+def write_row(buffer, *values):
+    buffer.write('\t'.join(map(format_value, values)))
+    buffer.write('\n')
+
+
+def count_events(rng: random.Random, mean: float) -> int:
+    """
+    A geometric count with the given mean.
+    """
+    if mean <= 0:
+        return 0
+    p = mean / (1 + mean)
+    count = 0
+    while rng.random() < p:
+        count += 1
+    return count
+
+
+def task_count(rng: random.Random, options: SeedOptions) -> int:
+    if options.tasks_per_person <= 0:
+        return 0
+    mu = math.log(options.tasks_per_person) - options.task_skew ** 2 / 2
+    return min(options.max_tasks_per_person, int(rng.lognormvariate(mu, options.task_skew)))
+
+
+def write_person(buffers: Dict[str, io.StringIO], options: SeedOptions, index: int, until: datetime):
+    """
+    Writes one person with their email, login method, own organization, memberships, tasks and
+    task history. Everything is drawn from a generator seeded by (seed, index), so a person's
+    rows do not depend on how the people were split across workers.
+    """
+    rng = random.Random(f"{options.seed}:{index}")
+
+    def new_id():
+        return f"{rng.getrandbits(128):032x}"
+
+    person_id = make_id(options.seed, 'person', index)
+    organization_id = make_id(options.seed, 'organization', index)
+    joined_on = until - timedelta(seconds=rng.uniform(0, options.history_days * 86400))
+    first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    email_id = new_id()
+
+    write_row(
+        buffers['organization'], organization_id, new_id(), ZERO_ID, True, person_id, joined_on,
+        f"{first_name}'s Organization", None, None
+    )
+    write_row(buffers['person'], person_id, new_id(), ZERO_ID, True, person_id, joined_on, first_name, last_name)
+    write_row(
+        buffers['email'], email_id, new_id(), ZERO_ID, True, person_id, joined_on, person_id,
+        f"{first_name}.{last_name}.{index}@{rng.choice(DOMAINS)}".lower(), rng.random() < 0.9, True
+    )
+    write_row(
+        buffers['login_method'], new_id(), new_id(), ZERO_ID, True, person_id, joined_on, person_id,
+        'email-password', None, email_id, options.password_hash
+    )
+    write_row(
+        buffers['person_organization_role'], new_id(), new_id(), ZERO_ID, True, person_id, joined_on, person_id,
+        organization_id, 'admin'
+    )
+    rows = {'organization': 1, 'person': 1, 'email': 1, 'login_method': 1, 'person_organization_role': 1}
+
+    memberships = set()
+    for _ in range(count_events(rng, options.memberships_per_person)):
+        other = rng.randrange(options.persons)
+        if other != index:
+            memberships.add(other)
+    for other in sorted(memberships):
+        write_row(
+            buffers['person_organization_role'], new_id(), new_id(), ZERO_ID, True, person_id, joined_on, person_id,
+            make_id(options.seed, 'organization', other), 'member'
+        )
+    rows['person_organization_role'] += len(memberships)
+
+    span = max(1.0, (until - joined_on).total_seconds())
+    tasks = task_count(rng, options)
+    task_buffer, audit_buffer = buffers['task'], buffers['task_audit']
+    audit_rows = 0
+    # Task rows are most of the load, so they are formatted inline rather than through write_row
+    for _ in range(tasks):
+        task_id = new_id()
+        title = f"{rng.choice(TASK_VERBS)} {rng.choice(TASK_OBJECTS)}{rng.choice(TASK_DETAILS)}"
+        completed = 't' if rng.random() < options.completed_ratio else 'f'
+        active = 'f' if rng.random() < options.deleted_ratio else 't'
+        versions = count_events(rng, options.audit_versions_per_task)
+
+        # Versions are spread between the creation and the last change, oldest first
+        created_on = joined_on + timedelta(seconds=rng.uniform(0, span))
+        remaining = (until - created_on).total_seconds()
+        changed_on = created_on
+        previous_version = ZERO_ID
+        for offset in sorted(rng.uniform(0, remaining) for _ in range(versions)):
+            version = new_id()
+            audit_buffer.write(
+                f"{task_id}\t{version}\t{previous_version}\tt\t{person_id}\t{changed_on}\t{person_id}\t{title}\tf\n"
+            )
+            previous_version = version
+            changed_on = created_on + timedelta(seconds=offset)
+        task_buffer.write(
+            f"{task_id}\t{new_id()}\t{previous_version}\t{active}\t{person_id}\t{changed_on}\t{person_id}\t{title}\t"
+            f"{completed}\n"
+        )
+        audit_rows += versions
+
+    rows['task'] = tasks
+    rows['task_audit'] = audit_rows
+    return rows
+
+
+def generate_shard(options: SeedOptions, start: int, end: int):
+    """
+    The COPY text of every table for people `start` to `end`, and the row count of each.
+    """
+    buffers = {table: io.StringIO() for table in SEED_COLUMNS}
+    rows = {table: 0 for table in SEED_COLUMNS}
+    until = datetime.combine(options.until, datetime.min.time())
+    for index in range(start, end):
+        for table, count in write_person(buffers, options, index, until).items():
+            rows[table] += count
+    return buffers, rows
+
+
+def copy_shard(cursor, buffers: Dict[str, io.StringIO]):
+    for table, columns in SEED_COLUMNS.items():
+        buffer = buffers[table]
+        if not buffer.tell():
+            continue
+        buffer.seek(0)
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+
+
+_worker = {}
+
+
+def _init_worker(connect: Callable, options: SeedOptions):
+    connection = connect()
+    connection.autocommit = False
+    with connection.cursor() as cursor:
+        # A lost shard is simply seeded again, so the load need not wait for the WAL flush.
+        cursor.execute("SET synchronous_commit = off")
+    connection.commit()
+    _worker['connection'] = connection
+    _worker['options'] = options
+
+
+def _load_shard(bounds):
+    connection = _worker['connection']
+    buffers, rows = generate_shard(_worker['options'], *bounds)
+    with connection.cursor() as cursor:
+        copy_shard(cursor, buffers)
+    connection.commit()
+    return rows
+
+
+def ensure_task_audit_partitions(cursor, options: SeedOptions):
+    first = options.until - timedelta(days=options.history_days)
+    month = date(first.year, first.month, 1)
+    while month <= options.until:
+        cursor.execute("SELECT audit_ensure_partition('task_audit', %s)", (month,))
+        month = add_months(month, 1)
+
+
+def drop_secondary_indexes(cursor) -> List[tuple]:
+    """
+    Drops the non-unique indexes of the seeded tables and returns their definitions. Primary keys
+    and unique indexes stay, so a clash with existing rows still fails the load.
+    """
+    cursor.execute(
+        "SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid) FROM pg_index AS i "
+        "WHERE i.indrelid = ANY(%s::regclass[]) AND NOT i.indisunique AND NOT i.indisprimary",
+        (INDEXED_TABLES,)
+    )
+    indexes = cursor.fetchall()
+    for name, _ in indexes:
+        cursor.execute(f"DROP INDEX {name}")
+    return indexes
+
+
+def rebuild_indexes(connect: Callable, indexes: List[tuple], workers: int):
+    with multiprocessing.Pool(min(workers, len(indexes)) or 1) as pool:
+        pool.starmap(_create_index, [(connect, definition) for _, definition in indexes])
+
+
+def _create_index(connect: Callable, definition: str):
+    connection = connect()
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(definition)
+    finally:
+        connection.close()
+
+
+def seed_database(
+        connect: Callable, options: SeedOptions, workers: int, shard_size: int = 1000, defer_indexes: bool = True,
+        truncate: bool = False
+) -> SeedReport:
+    """
+    Loads `options.persons` synthetic people and their data with `COPY`, one shard of
+    `shard_size` people per transaction, `workers` shards at a time.
+
+    `connect` returns a new autocommit connection; it is called in every worker process. With
+    `defer_indexes` the secondary indexes of the seeded tables are dropped first and rebuilt in
+    parallel at the end, which is much faster than maintaining them row by row. The same options
+    always produce the same rows (the password hash aside), so the load is only repeatable on
+    emptied tables: `truncate` empties them first.
+    """
+    report = SeedReport()
+    connection = connect()
+    try:
+        with connection.cursor() as cursor:
+            if truncate:
+                cursor.execute(f"TRUNCATE {', '.join(SEED_COLUMNS)}")
+            ensure_task_audit_partitions(cursor, options)
+            indexes = drop_secondary_indexes(cursor) if defer_indexes else []
+    finally:
+        connection.close()
+
+    shards = [(start, min(start + shard_size, options.persons)) for start in range(0, options.persons, shard_size)]
+    started = time.perf_counter()
+    try:
+        with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(connect, options)) as pool:
+            for rows in pool.imap_unordered(_load_shard, shards):
+                report.add(rows)
+                if report.shards % max(1, len(shards) // 20) == 0 or report.shards == len(shards):
+                    logger.info(f"Seeded {report.shards}/{len(shards)} shards, {sum(report.rows.values())} rows")
+    finally:
+        report.load_seconds = time.perf_counter() - started
+        if indexes:
+            started = time.perf_counter()
+            rebuild_indexes(connect, indexes, workers)
+            report.index_seconds = time.perf_counter() - started
+            report.rebuilt_indexes = [name for name, _ in indexes]
+
+    connection = connect()
+    try:
+        with connection.cursor() as cursor:
+            for table in SEED_COLUMNS:
+                cursor.execute(f"ANALYZE {table}")
+    finally:
+        connection.close()
+    return report
@@ -0,0 +1,111 @@
+import time
+from typing import Dict
+
+from common.app_logger import logger
+
+TASK_COLUMNS = [
+    "entity_id", "version", "previous_version", "active", "changed_by_id", "changed_on", "person_id", "title",
+    "completed",
+]
+
+# The indexes every task list query scans, rebuilt on request to hand back the archived rows' space.
+LIST_INDEXES = ["task_person_id_ind", "task_person_id_completed_ind"]
+
+
+class TaskArchiveReport:
+
+    def __init__(self):
+        self.moved = 0
+        self.batches = 0
+        self.seconds = 0.0
+        self.index_bytes_before = {}
+        self.index_bytes_after = {}
+        self.reindexed = []
+
+    def as_dict(self) -> dict:
+        reclaimed = {
+            index: self.index_bytes_before[index] - self.index_bytes_after.get(index, self.index_bytes_before[index])
+            for index in self.index_bytes_before
+        }
+        return {
+            'moved': self.moved,
+            'batches': self.batches,
+            'seconds': round(self.seconds, 3),
+            'index_bytes_before': self.index_bytes_before,
+            'index_bytes_after': self.index_bytes_after,
+            'index_bytes_reclaimed': reclaimed,
+            'reindexed': self.reindexed,
+        }
+
+
+def get_index_sizes(cursor, table_name: str) -> Dict[str, int]:
+    cursor.execute(
+        "SELECT indexrelid::regclass::text, pg_relation_size(indexrelid) FROM pg_index WHERE indrelid = %s::regclass",
+        (table_name,)
+    )
+    return {index: int(size) for index, size in cursor.fetchall()}
+
+
+def archive_batch(cursor, grace_days: int, batch_size: int) -> int:
+    """
+    Moves up to `batch_size` tasks inactive for more than `grace_days` into task_archive in one
+    statement, so in autocommit mode each batch is its own short transaction. Rows locked by a
+    concurrent write are skipped, so the batch never waits on them.
+    """
+    columns = ', '.join(TASK_COLUMNS)
+    cursor.execute(
+        f"WITH candidates AS ("
+        f"  SELECT entity_id FROM task "
+        f"  WHERE active = false AND changed_on < now() - make_interval(days => %s) "
+        f"  ORDER BY changed_on LIMIT %s FOR UPDATE SKIP LOCKED"
+        f"), moved AS ("
+        f"  DELETE FROM task USING candidates WHERE task.entity_id = candidates.entity_id "
+        f"  AND task.active = false RETURNING task.*"
+        f") "
+        f"INSERT INTO task_archive ({columns}) SELECT {columns} FROM moved "
+        f"ON CONFLICT (entity_id) DO UPDATE SET "
+        f"{', '.join(f'{column} = EXCLUDED.{column}' for column in TASK_COLUMNS[1:])}, archived_on = now()",
+        (grace_days, batch_size)
+    )
+    return cursor.rowcount
+
+
+def archive_tasks(
+        connection, grace_days: int, batch_size: int, pause: float = 0.0, max_batches: int = None,
+        reindex: bool = False
+) -> TaskArchiveReport:
+    """
+    Moves soft-deleted tasks older than the grace period out of `task`, one short transaction per
+    batch with `pause` seconds in between, until no candidates are left or `max_batches` ran.
+
+    Reads only ever select active tasks, so they see no difference. Deleted rows leave free space
+    in the list indexes that new entries reuse; with `reindex` the indexes are rebuilt
+    concurrently afterwards to return it. `connection` must be in autocommit mode.
+    """
+    report = TaskArchiveReport()
+    started = time.perf_counter()
+
+    with connection.cursor() as cursor:
+        report.index_bytes_before = get_index_sizes(cursor, 'task')
+
+        while max_batches is None or report.batches < max_batches:
+            moved = archive_batch(cursor, grace_days, batch_size)
+            report.moved += moved
+            report.batches += 1
+            if moved < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+
+        if report.moved:
+            cursor.execute("VACUUM (ANALYZE) task")
+            if reindex:
+                for index in LIST_INDEXES:
+                    cursor.execute(f"REINDEX INDEX CONCURRENTLY {index}")
+                    report.reindexed.append(index)
+
+        report.index_bytes_after = get_index_sizes(cursor, 'task')
+
+    report.seconds = time.perf_counter() - started
+    logger.info(f"Archived {report.moved} tasks in {report.batches} batches ({report.seconds:.1f} s)")
+    return report
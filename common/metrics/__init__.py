@@ -0,0 +1,11 @@
+from .registry import Counter, Gauge, Histogram, Registry, LATENCY_BUCKETS, merge_snapshots, render
+from .request import (
+    DB, RABBITMQ, OAUTH, registry, register_pool, get_request_metrics, start_request, finish_request, timed,
+    timed_pool_checkout, get_pool_stats, get_checkout_window,
+)
+from .multiprocess import SnapshotWriter, clear_snapshots, render_metrics
+from .query_budget import (
+    QueryCounter, QueryBudgetExceeded, fingerprint, count_queries, assert_query_budget, check_query_budget,
+    query_budget,
+)
+from .slow_queries import EXPLAIN_PREFIX, is_slow, should_explain, redact_params, log_slow_query
@@ -0,0 +1,86 @@
+import glob
+import json
+import os
+import threading
+
+from common.app_logger import logger
+from common.metrics.registry import Registry, merge_snapshots, render
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def write_snapshot(registry: Registry, directory: str):
+    path = os.path.join(directory, f"{os.getpid()}.json")
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, 'w') as snapshot_file:
+        json.dump(registry.snapshot(), snapshot_file)
+    os.replace(temporary_path, path)
+
+
+def read_snapshots(directory: str):
+    snapshots, live = [], []
+    for path in glob.glob(os.path.join(directory, '*.json')):
+        try:
+            with open(path) as snapshot_file:
+                snapshots.append(json.load(snapshot_file))
+        except (OSError, ValueError):
+            continue
+        live.append(_is_alive(int(os.path.basename(path)[:-len('.json')])))
+    return snapshots, live
+
+
+def clear_snapshots(directory: str):
+    for path in glob.glob(os.path.join(directory, '*.json')):
+        os.remove(path)
+
+
+def render_metrics(registry: Registry, directory: str = '') -> str:
+    """
+    The Prometheus exposition of this process or, with a snapshot `directory` shared by the
+    launcher's workers, of all of them: a scrape reaches one worker, which adds up the snapshots
+    of its siblings (written every few seconds) and its own current values.
+    """
+    if not directory:
+        return render(registry.snapshot())
+    write_snapshot(registry, directory)
+    return render(merge_snapshots(*read_snapshots(directory)))
+
+
+class SnapshotWriter:
+    """
+    Periodically writes this process' metrics to the shared snapshot directory.
+    """
+
+    def __init__(self, registry: Registry, directory: str, interval: float):
+        self.registry = registry
+        self.directory = directory
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-snapshot", daemon=True)
+
+    def start(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def write(self):
+        try:
+            write_snapshot(self.registry, self.directory)
+        except OSError as e:
+            logger.warning(f"Could not write the metrics snapshot: {e}")
+
+    def close(self):
+        self._stop.set()
+        self.write()
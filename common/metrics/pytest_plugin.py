@@ -0,0 +1,47 @@
+"""
+pytest plugin enforcing query budgets. Enable it with `-p common.metrics.pytest_plugin` or
+`pytest_plugins = ["common.metrics.pytest_plugin"]` in a conftest.
+
+- Every view's `@query_budget` is enforced (QUERY_BUDGET_MODE=raise): a request over budget or
+  repeating a statement fails the test with the offending fingerprints.
+- `@pytest.mark.query_budget(n, max_repeats=1)` puts a budget on the whole test.
+- The `query_counter` fixture counts the statements of the test for custom assertions.
+- The terminal summary lists each exercised view's budget and the most queries it issued.
+"""
+import pytest
+
+from common.app_config import config as app_config
+from common.metrics.query_budget import assert_query_budget, count_queries, observed_budgets
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers', "query_budget(max_queries, max_repeats=1): fail the test above this many SQL statements"
+    )
+    app_config.QUERY_BUDGET_MODE = 'raise'
+
+
+@pytest.fixture
+def query_counter():
+    with count_queries() as counter:
+        yield counter
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    marker = item.get_closest_marker('query_budget')
+    if marker is None:
+        return (yield)
+
+    max_queries = marker.args[0] if marker.args else marker.kwargs.get('max_queries')
+    with assert_query_budget(max_queries, marker.kwargs.get('max_repeats', 1), name=item.nodeid):
+        return (yield)
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not observed_budgets:
+        return
+    terminalreporter.section("query budgets")
+    for name in sorted(observed_budgets):
+        budget, most = observed_budgets[name]
+        terminalreporter.write_line(f"{name:<40} budget {budget if budget is not None else '-':>4}  max seen {most:>4}")
@@ -0,0 +1,181 @@
+import contextvars
+import hashlib
+import re
+from collections import Counter as Tally
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+from common.app_config import config
+from common.app_logger import logger
+from common.metrics.request import registry
+
+_COMMENTS = re.compile(r'--[^\n]*|/\*.*?\*/', re.S)
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDERS = re.compile(r'%\(\w+\)s|%s|\$\d+')
+_NUMBERS = re.compile(r'\b\d+(?:\.\d+)?\b')
+_LISTS = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+budget_violations = registry.counter(
+    'todomvc_query_budget_violations_total', "Requests that exceeded their endpoint's query budget.", ('endpoint',)
+)
+
+# Endpoint -> [budget, most queries seen], for the pytest report
+observed_budgets: Dict[str, list] = {}
+
+
+def fingerprint(sql) -> str:
+    """
+    The shape of a statement: literals, parameters and IN lists replaced, whitespace collapsed.
+    Statements differing only in their values share a fingerprint.
+    """
+    if isinstance(sql, bytes):
+        sql = sql.decode(errors='replace')
+    sql = _COMMENTS.sub(' ', str(sql))
+    sql = _STRINGS.sub('?', sql)
+    sql = _PLACEHOLDERS.sub('?', sql)
+    sql = _NUMBERS.sub('?', sql)
+    sql = _LISTS.sub('(...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def fingerprint_id(fingerprint_text: str) -> str:
+    return hashlib.sha1(fingerprint_text.encode()).hexdigest()[:12]
+
+
+class QueryCounter:
+    """
+    The statements issued while it is active, by fingerprint and with their parameters.
+    """
+
+    def __init__(self):
+        self.statements: List[tuple] = []
+
+    def record(self, sql, params=None):
+        if isinstance(sql, bytes):
+            sql = sql.decode(errors='replace')
+        self.statements.append((fingerprint(sql), str(sql), repr(params)))
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def by_fingerprint(self) -> Dict[str, int]:
+        return dict(Tally(statement[0] for statement in self.statements))
+
+    def repeated(self, max_repeats: int = 1, repeatable: Sequence[str] = ()) -> Dict[str, int]:
+        """
+        Fingerprints issued more than `max_repeats` times: the same query per item of a list
+        (N+1) or the same row fetched twice. Fingerprints starting with one of `repeatable` are
+        expected to repeat and left out.
+        """
+        return {
+            text: count for text, count in self.by_fingerprint().items()
+            if count > max_repeats and not text.startswith(tuple(repeatable))
+        }
+
+    def duplicates(self) -> Dict[str, int]:
+        """
+        Fingerprints of statements issued more than once with the very same text and parameters.
+        """
+        tally = Tally(self.statements)
+        return {statement[0]: count for statement, count in tally.items() if count > 1}
+
+
+_counters: contextvars.ContextVar[tuple] = contextvars.ContextVar('query_counters', default=())
+
+
+def record_statement(sql, params=None):
+    for counter in _counters.get():
+        counter.record(sql, params)
+
+
+@contextmanager
+def count_queries():
+    """
+    Counts the statements issued through the repository adapters in the current context.
+    """
+    counter = QueryCounter()
+    token = _counters.set(_counters.get() + (counter,))
+    try:
+        yield counter
+    finally:
+        _counters.reset(token)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def check_query_budget(counter: QueryCounter, max_queries: Optional[int], max_repeats: Optional[int] = 1,
+                       repeatable: Sequence[str] = ()) -> List[str]:
+    """
+    Returns a description of every way `counter` breaks the budget; an empty list when it fits.
+    """
+    problems = []
+    if max_queries is not None and counter.count > max_queries:
+        problems.append(f"{counter.count} queries, budget {max_queries}")
+    if max_repeats is not None:
+        duplicates = counter.duplicates()
+        for text, count in counter.repeated(max_repeats, repeatable).items():
+            kind = "duplicate" if text in duplicates else "possible N+1"
+            problems.append(f"{kind}: {count}x [{fingerprint_id(text)}] {text}")
+    return problems
+
+
+@contextmanager
+def assert_query_budget(max_queries: Optional[int], max_repeats: Optional[int] = 1, name: str = 'block'):
+    """
+    Raises `QueryBudgetExceeded` when the block issues more than `max_queries` statements or
+    repeats a fingerprint more than `max_repeats` times (None disables either check).
+    """
+    with count_queries() as counter:
+        yield counter
+    problems = check_query_budget(counter, max_queries, max_repeats)
+    if problems:
+        raise QueryBudgetExceeded(f"{name}: " + '; '.join(problems))
+
+
+def query_budget(max_queries: Union[int, Callable[[Any], Optional[int]], None], max_repeats: Optional[int] = 1,
+                 repeatable: Sequence[str] = ()):
+    """
+    Declares the most statements a view may issue (cold caches, sync audit mode). Place it above
+    `login_required` so the authentication queries count too.
+
+    A view whose statements scale with its input passes a callable instead, which gets the
+    view's response and returns the budget of that request (None leaves the count unchecked),
+    and names the fingerprint prefixes expected to repeat in `repeatable`.
+
+    With QUERY_BUDGET_MODE 'warn' a violation is logged and counted in /metrics, with 'raise'
+    (set by the pytest plugin) it fails the request; 'off' skips the accounting.
+    """
+    def decorator(func):
+        name = func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            mode = config.QUERY_BUDGET_MODE
+            if mode == 'off':
+                return func(*args, **kwargs)
+
+            with count_queries() as counter:
+                result = func(*args, **kwargs)
+
+            budget = max_queries(result) if callable(max_queries) else max_queries
+            seen = observed_budgets.setdefault(name, [budget, 0])
+            if counter.count >= seen[1]:
+                seen[:] = [budget, counter.count]
+            problems = check_query_budget(counter, budget, max_repeats, repeatable)
+            if problems:
+                budget_violations.inc(name)
+                message = f"Query budget of {name} exceeded: " + '; '.join(problems)
+                if mode == 'raise':
+                    raise QueryBudgetExceeded(message)
+                logger.warning(message)
+            return result
+
+        wrapper.query_budget = max_queries
+        return wrapper
+
+    return decorator
@@ -0,0 +1,185 @@
+import json
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Request and dependency latencies, from a fast cached lookup to a slow password hash or OAuth call.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+COUNTER = 'counter'
+GAUGE = 'gauge'
+HISTOGRAM = 'histogram'
+
+
+def _label_key(label_names: Tuple[str, ...], label_values: Iterable) -> str:
+    return json.dumps([str(value) for value in label_values]) if label_names else '[]'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(pairs: List[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Metric:
+    """
+    A metric family: one value (or histogram) per combination of label values. Values are kept
+    as plain dicts, so a snapshot can be written to disk and merged with other processes'.
+    """
+    TYPE = None
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            values = {key: list(value) if isinstance(value, list) else value for key, value in self._values.items()}
+        return {'type': self.TYPE, 'help': self.documentation, 'labels': list(self.label_names), 'values': values}
+
+
+class Counter(Metric):
+    TYPE = COUNTER
+
+    def inc(self, *label_values, amount: float = 1):
+        key = _label_key(self.label_names, label_values)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """
+    A gauge whose values are read from `collect` at snapshot time (e.g. connection pool sizes).
+    `collect` returns a mapping of label value tuples to values.
+    """
+    TYPE = GAUGE
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = (), collect: Callable = None):
+        super().__init__(name, documentation, label_names)
+        self.collect = collect
+
+    def set(self, *label_values, value: float):
+        with self._lock:
+            self._values[_label_key(self.label_names, label_values)] = value
+
+    def snapshot(self) -> dict:
+        if self.collect is not None:
+            for label_values, value in (self.collect() or {}).items():
+                self.set(*label_values, value=value)
+        return super().snapshot()
+
+
+class Histogram(Metric):
+    TYPE = HISTOGRAM
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(buckets)
+
+    def observe(self, *label_values, value: float):
+        key = _label_key(self.label_names, label_values)
+        with self._lock:
+            # Per-bucket counts (the last one is +Inf), then the sum and the count.
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 3)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    break
+            else:
+                index = len(self.buckets)
+            counts[index] += 1
+            counts[-2] += value
+            counts[-1] += 1
+
+    def snapshot(self) -> dict:
+        snapshot = super().snapshot()
+        snapshot['buckets'] = list(self.buckets)
+        return snapshot
+
+
+class Registry:
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, label_names))
+
+    def gauge(self, name: str, documentation: str, label_names: Tuple[str, ...] = (), collect=None) -> Gauge:
+        return self.register(Gauge(name, documentation, label_names, collect))
+
+    def histogram(self, name: str, documentation: str, label_names: Tuple[str, ...] = (),
+                  buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, label_names, buckets))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.snapshot() for metric in metrics}
+
+
+def merge_snapshots(snapshots: Iterable[dict], live: Optional[Iterable[bool]] = None) -> dict:
+    """
+    Adds up the snapshots of several processes. Gauges only count the processes flagged live in
+    `live`; counters and histograms keep the totals of exited processes too, so they never drop.
+    """
+    snapshots = list(snapshots)
+    live = list(live) if live is not None else [True] * len(snapshots)
+    merged = {}
+    for snapshot, is_live in zip(snapshots, live):
+        for name, family in snapshot.items():
+            if family['type'] == GAUGE and not is_live:
+                continue
+            target = merged.setdefault(name, {**family, 'values': {}})
+            for key, value in family['values'].items():
+                current = target['values'].get(key)
+                if current is None:
+                    target['values'][key] = list(value) if isinstance(value, list) else value
+                elif isinstance(value, list):
+                    target['values'][key] = [a + b for a, b in zip(current, value)]
+                else:
+                    target['values'][key] = current + value
+    return merged
+
+
+def render(snapshot: dict) -> str:
+    """
+    Renders a (merged) snapshot in the Prometheus text exposition format.
+    """
+    lines = []
+    for name in sorted(snapshot):
+        family = snapshot[name]
+        lines.append(f"# HELP {name} {family['help']}")
+        lines.append(f"# TYPE {name} {family['type']}")
+        for key in sorted(family['values']):
+            value = family['values'][key]
+            labels = list(zip(family['labels'], json.loads(key)))
+            if family['type'] != HISTOGRAM:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(list(family['buckets']) + [float('inf')], value[:-2]):
+                cumulative += count
+                bucket_labels = labels + [('le', _format_value(bound) if bound != float('inf') else '+Inf')]
+                lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(value[-2])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {_format_value(value[-1])}")
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,185 @@
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+from common.metrics.registry import Registry
+
+DB = 'db'
+RABBITMQ = 'rabbitmq'
+OAUTH = 'oauth'
+
+registry = Registry()
+
+request_duration = registry.histogram(
+    'todomvc_http_request_duration_seconds', "Request latency until the response is returned.",
+    ('method', 'endpoint', 'status')
+)
+request_cpu_seconds = registry.counter(
+    'todomvc_http_request_cpu_seconds_total',
+    "CPU time of the serving thread (password hashing, JWT, serialization), sync requests only.",
+    ('method', 'endpoint')
+)
+dependency_calls = registry.counter(
+    'todomvc_dependency_calls_total', "Database queries, RabbitMQ publishes and OAuth HTTP calls per endpoint.",
+    ('endpoint', 'dependency')
+)
+dependency_seconds = registry.counter(
+    'todomvc_dependency_seconds_total', "Time spent waiting on each dependency per endpoint.",
+    ('endpoint', 'dependency')
+)
+dependency_call_duration = registry.histogram(
+    'todomvc_dependency_call_duration_seconds', "Latency of single dependency calls.", ('dependency',)
+)
+db_queries_per_request = registry.histogram(
+    'todomvc_db_queries_per_request', "Database queries issued by one request.", ('endpoint',),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+)
+pool_checkout_duration = registry.histogram(
+    'todomvc_db_pool_checkout_duration_seconds', "Time to obtain a database connection from the pool.", ('pool',)
+)
+
+# Pool name -> callable returning {'in_use': n, 'idle': n, 'max': n, 'waiting': n}
+_pools: Dict[str, Callable[[], dict]] = {}
+
+
+def get_pool_stats() -> Dict[str, dict]:
+    """
+    The current connection counts of every registered pool; a pool failing to report is left out.
+    """
+    stats = {}
+    for pool, get_stats in list(_pools.items()):
+        try:
+            stats[pool] = get_stats()
+        except Exception:
+            continue
+    return stats
+
+
+def _collect_pool_connections():
+    values = {}
+    for pool, stats in get_pool_stats().items():
+        for state, value in stats.items():
+            if value is not None:
+                values[(pool, state)] = value
+    return values
+
+
+registry.gauge(
+    'todomvc_db_pool_connections', "Connections of each database pool by state (in_use, idle, max, waiting).",
+    ('pool', 'state'), collect=_collect_pool_connections
+)
+
+
+def register_pool(name: str, get_stats: Callable[[], dict]):
+    _pools[name] = get_stats
+
+
+class RequestMetrics:
+    """
+    Dependency time accumulated by the request being served in the current context.
+    """
+
+    def __init__(self, measure_cpu: bool, endpoint: Optional[str] = None):
+        self.endpoint = endpoint
+        self.started = time.perf_counter()
+        self.cpu_started = time.thread_time() if measure_cpu else None
+        self.calls: Dict[str, list] = {}
+
+    def add(self, dependency: str, seconds: float):
+        counts = self.calls.setdefault(dependency, [0, 0.0])
+        counts[0] += 1
+        counts[1] += seconds
+
+
+_current: contextvars.ContextVar[Optional[RequestMetrics]] = contextvars.ContextVar('request_metrics', default=None)
+
+
+def get_request_metrics() -> Optional[RequestMetrics]:
+    return _current.get()
+
+
+def start_request(measure_cpu: bool = True, endpoint: Optional[str] = None):
+    """
+    Starts accounting a request in the current context; pass the returned token to `finish_request`.
+    `measure_cpu` must be False on an event loop, where the thread's CPU time is shared by all requests.
+    `endpoint`, when already known, attributes the slow query log entries of the request.
+    """
+    return _current.set(RequestMetrics(measure_cpu, endpoint))
+
+
+def finish_request(token, method: str, endpoint: str, status) -> Optional[RequestMetrics]:
+    metrics = _current.get()
+    try:
+        _current.reset(token)
+    except ValueError:  # Started in another context (e.g. a copied one); nothing to restore here.
+        pass
+    if metrics is None:
+        return None
+
+    request_duration.observe(method, endpoint, status, value=time.perf_counter() - metrics.started)
+    if metrics.cpu_started is not None:
+        request_cpu_seconds.inc(method, endpoint, amount=time.thread_time() - metrics.cpu_started)
+    for dependency, (count, seconds) in metrics.calls.items():
+        dependency_calls.inc(endpoint, dependency, amount=count)
+        dependency_seconds.inc(endpoint, dependency, amount=seconds)
+    db_queries_per_request.observe(endpoint, value=metrics.calls.get(DB, (0,))[0])
+    return metrics
+
+
+@contextmanager
+def timed(dependency: str):
+    """
+    Times a dependency call, attributing it to the current request (if any).
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        dependency_call_duration.observe(dependency, value=seconds)
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.add(dependency, seconds)
+
+
+class CheckoutWindow:
+    """
+    The most recent checkout waits of a pool with when they ended, for the pool report and the
+    adaptive sizing; the histogram only has cumulative buckets.
+    """
+
+    def __init__(self, size: int = 4096):
+        self._waits = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float):
+        with self._lock:
+            self._waits.append((time.monotonic(), seconds))
+
+    def waits_since(self, since: float) -> List[float]:
+        with self._lock:
+            return [seconds for ended, seconds in self._waits if ended >= since]
+
+
+_checkouts: Dict[str, CheckoutWindow] = {}
+
+
+def get_checkout_window(pool: str) -> CheckoutWindow:
+    window = _checkouts.get(pool)
+    if window is None:
+        window = _checkouts.setdefault(pool, CheckoutWindow())
+    return window
+
+
+@contextmanager
+def timed_pool_checkout(pool: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        pool_checkout_duration.observe(pool, value=seconds)
+        get_checkout_window(pool).add(seconds)
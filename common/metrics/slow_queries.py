@@ -0,0 +1,99 @@
+import json
+import random
+import re
+import threading
+import time
+from typing import Dict
+
+from common.app_config import config
+from common.app_logger import logger
+from common.metrics.query_budget import fingerprint_id
+from common.metrics.request import get_request_metrics, registry
+
+# Prefixed to a statement to capture its plan; FORMAT JSON keeps the log line machine-readable
+EXPLAIN_PREFIX = 'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) '
+
+_READ_ONLY = re.compile(r'^\s*(SELECT|WITH)\b', re.I)
+_WRITES = re.compile(r'\b(INSERT|UPDATE|DELETE|MERGE|TRUNCATE)\b', re.I)
+
+slow_queries = registry.counter(
+    'todomvc_db_slow_queries_total', "Statements slower than SLOW_QUERY_THRESHOLD_MS.", ('endpoint',)
+)
+
+# Fingerprint -> when its plan was last captured
+_last_explained: Dict[str, float] = {}
+_lock = threading.Lock()
+
+
+def is_slow(seconds: float) -> bool:
+    threshold = config.SLOW_QUERY_THRESHOLD_MS
+    return threshold > 0 and seconds * 1000 >= threshold
+
+
+def get_current_endpoint() -> str:
+    metrics = get_request_metrics()
+    return metrics.endpoint if metrics is not None and metrics.endpoint else 'background'
+
+
+def describe_param(value):
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, (int, float)):
+        return 'number'
+    if isinstance(value, (str, bytes)):
+        return f"{type(value).__name__}:{len(value)}"
+    if isinstance(value, (list, tuple)):
+        return {'list': len(value)}
+    return type(value).__name__
+
+
+def redact_params(params):
+    """
+    The types and lengths of the parameters of a statement, never their values.
+    """
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {name: describe_param(value) for name, value in params.items()}
+    return [describe_param(value) for value in params]
+
+
+def should_explain(sql_fingerprint: str) -> bool:
+    """
+    Whether to capture the plan of a slow statement: a SLOW_QUERY_EXPLAIN_SAMPLE_RATE share of
+    them, at most once per SLOW_QUERY_EXPLAIN_INTERVAL seconds per fingerprint. EXPLAIN ANALYZE
+    executes the statement again, so only reads are explained.
+    """
+    if not _READ_ONLY.match(sql_fingerprint) or _WRITES.search(sql_fingerprint):
+        return False
+    if random.random() >= config.SLOW_QUERY_EXPLAIN_SAMPLE_RATE:
+        return False
+    now = time.monotonic()
+    with _lock:
+        last = _last_explained.get(sql_fingerprint)
+        if last is not None and now - last < config.SLOW_QUERY_EXPLAIN_INTERVAL:
+            return False
+        _last_explained[sql_fingerprint] = now
+    return True
+
+
+def log_slow_query(sql_fingerprint: str, params, seconds: float, plan=None):
+    """
+    Logs a slow statement as one JSON line, with its plan when one was captured.
+    """
+    endpoint = get_current_endpoint()
+    slow_queries.inc(endpoint)
+    record = {
+        'event': 'slow_query',
+        'duration_ms': round(seconds * 1000, 3),
+        'threshold_ms': config.SLOW_QUERY_THRESHOLD_MS,
+        'endpoint': endpoint,
+        'fingerprint_id': fingerprint_id(sql_fingerprint),
+        'fingerprint': sql_fingerprint,
+        'params': redact_params(params),
+    }
+    if plan is not None:
+        record['plan'] = plan
+    logger.warning(json.dumps(record, default=str, separators=(',', ':')))
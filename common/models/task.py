@@ -2,6 +2,8 @@ from dataclasses import dataclass, field
 from rococo.models.versioned_model import VersionedModel
 from typing import ClassVar, Optional
 
+TITLE_MAX_LENGTH = 500
+
 
 @dataclass
 class Task(VersionedModel):
@@ -15,3 +17,6 @@ class Task(VersionedModel):
     def __post_init__(self, *args, **kwargs):
         super().__post_init__(*args, **kwargs)
 
+    def validate_title(self):
+        if isinstance(self.title, str) and len(self.title) > TITLE_MAX_LENGTH:
+            return f"Task title exceeds maximum length of {TITLE_MAX_LENGTH} characters."
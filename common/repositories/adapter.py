@@ -0,0 +1,151 @@
+import time
+
+import psycopg2.errors
+import psycopg2.extensions
+from rococo.data.postgresql import PostgreSQLAdapter
+
+from common.app_logger import logger
+from common.metrics import DB, EXPLAIN_PREFIX, is_slow, log_slow_query, should_explain, timed
+from common.metrics.query_budget import fingerprint, record_statement
+from common.repositories.ids import register_hex_uuid_typecasters
+from common.repositories.prepared import get_prepared_statements
+
+# Raised by the EXECUTE of a statement the server no longer has, or whose result columns changed
+# with the schema ("cached plan must not change result type")
+STALE_STATEMENT_ERRORS = (psycopg2.errors.InvalidSqlStatementName, psycopg2.errors.FeatureNotSupported)
+
+
+class PreparingCursorMixin:
+    """
+    Sends the statements repeated on a connection as server-side prepared statements (see
+    `common.repositories.prepared`) through the `execute` of the cursor class it is mixed into.
+    A statement the server no longer has is sent again unprepared when nothing else ran in the
+    transaction yet.
+    """
+
+    def _sql(self, query):
+        return query.as_string(self) if hasattr(query, 'as_string') else query
+
+    def _execute(self, query, vars):
+        sql = self._sql(query)
+        prepared = get_prepared_statements(self.connection) if isinstance(sql, str) else None
+        rewritten = prepared.rewrite(sql, vars) if prepared is not None else None
+        if rewritten is None:
+            return super().execute(query, vars)
+
+        was_idle = self.connection.get_transaction_status() == psycopg2.extensions.TRANSACTION_STATUS_IDLE
+        try:
+            return super().execute(rewritten, vars)
+        except STALE_STATEMENT_ERRORS:
+            prepared.clear()
+            if not was_idle:
+                raise
+            # Nothing else ran in the transaction, so the statement can be sent again as it is.
+            if not self.connection.autocommit:
+                self.connection.rollback()
+            return super().execute(query, vars)
+        except Exception:
+            # Whether the server kept a statement prepared by the failed round trip is unknown;
+            # its name is never reused, so it is only forgotten.
+            if rewritten.startswith(('PREPARE', 'DEALLOCATE')):
+                prepared.forget(sql)
+            raise
+
+
+class TimedCursor(PreparingCursorMixin, psycopg2.extensions.cursor):
+    """
+    A cursor recording the count and duration of its statements in the request metrics, and
+    the statements themselves for the query budgets. Statements over SLOW_QUERY_THRESHOLD_MS
+    are logged, a sample of them with their plan. Statements repeated on a connection run as
+    server-side prepared statements when PREPARED_STATEMENTS_THRESHOLD is set. uuid columns are
+    read as 32-character hex strings.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        register_hex_uuid_typecasters(self)
+
+    def _record(self, query, vars=None):
+        record_statement(self._sql(query), vars)
+
+    def execute(self, query, vars=None):
+        self._record(query, vars)
+        started = time.perf_counter()
+        with timed(DB):
+            result = self._execute(query, vars)
+        seconds = time.perf_counter() - started
+        if is_slow(seconds):
+            self._log_slow(self._sql(query), vars, seconds)
+        return result
+
+    def _log_slow(self, sql, vars, seconds):
+        sql_fingerprint = fingerprint(sql)
+        plan = self._explain(sql, vars) if should_explain(sql_fingerprint) else None
+        log_slow_query(sql_fingerprint, vars, seconds, plan)
+
+    def _explain(self, sql, vars):
+        """
+        The EXPLAIN ANALYZE plan of a statement, on a cursor of its own so this one keeps its
+        results. Anything the second run does is rolled back, and a failure leaves the caller's
+        transaction as it was.
+        """
+        in_transaction = not self.connection.autocommit
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute('SAVEPOINT slow_query_explain' if in_transaction else 'BEGIN')
+                try:
+                    cursor.execute(EXPLAIN_PREFIX + sql, vars)
+                    return cursor.fetchone()[0]
+                finally:
+                    if in_transaction:
+                        cursor.execute('ROLLBACK TO SAVEPOINT slow_query_explain')
+                        cursor.execute('RELEASE SAVEPOINT slow_query_explain')
+                    else:
+                        cursor.execute('ROLLBACK')
+        except Exception as error:
+            logger.warning(f"Could not explain a slow query: {error}")
+            return None
+
+    def executemany(self, query, vars_list):
+        self._record(query)
+        with timed(DB):
+            return super().executemany(query, vars_list)
+
+    def copy_expert(self, sql, file, size=8192):
+        self._record(sql)
+        with timed(DB):
+            return super().copy_expert(sql, file, size)
+
+
+class TimedPostgreSQLAdapter(PostgreSQLAdapter):
+    """
+    `PostgreSQLAdapter` whose statements are all timed, including the ones rococo issues on the
+    cursor directly (e.g. the audit copy and save of `save`).
+    """
+
+    def __enter__(self):
+        self._connection = self.connect
+        self._cursor = self._connection.cursor(cursor_factory=TimedCursor)
+        return self
+
+    def execute_statement(self, sql, values=()):
+        """
+        Runs one statement in the open transaction (see `commit`) and returns its column names
+        and rows, both empty when it returns none.
+        """
+        self._call_cursor('execute', sql, values)
+        if not self._cursor.description:
+            return [], []
+        return [column[0] for column in self._cursor.description], self._call_cursor('fetchall')
+
+    def copy_from(self, sql, file):
+        """
+        Runs a `COPY ... FROM STDIN` reading `file`, in the open transaction.
+        """
+        self._call_cursor('copy_expert', sql, file)
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
@@ -0,0 +1,167 @@
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Type
+
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+
+from rococo.data.postgresql import PostgreSQLAdapter
+from rococo.models.versioned_model import VersionedModel
+from rococo.repositories.postgresql import PostgreSQLRepository
+
+from common.app_logger import logger
+from common.metrics import DB, EXPLAIN_PREFIX, is_slow, log_slow_query, should_explain, timed, timed_pool_checkout
+from common.metrics.query_budget import fingerprint, record_statement
+from common.repositories.audit import AuditMode, get_audit_mode, get_audit_writer, get_save_query_capturing_previous
+from common.repositories.ids import clean_id_conditions
+
+
+class AsyncBaseRepository:
+    """
+    Async counterpart of `BaseRepository` for the ASGI serving mode.
+
+    SQL and the model <-> row conversion are delegated to rococo's `PostgreSQLAdapter` and
+    `PostgreSQLRepository`, so queries, audit handling and validation stay identical to the
+    sync repositories; only the I/O goes through an async psycopg connection pool.
+    """
+
+    def __init__(self, pool: AsyncConnectionPool, model: Type[VersionedModel], user_id: str = None):
+        self.pool = pool
+        self.model = model
+        self.user_id = user_id
+
+        # Never connects: only used to build queries and prepare rows for saving.
+        self._sql = PostgreSQLAdapter(None, None, None, None, None)
+        self._sync_repository = PostgreSQLRepository(self._sql, model, None, '', user_id=user_id)
+        self.table_name = self._sync_repository.table_name
+        self.audit_mode = get_audit_mode(self.table_name)
+
+    @staticmethod
+    def _transform_values(values):
+        return tuple(json.dumps(value) if isinstance(value, dict) else value for value in values)
+
+    def _build_select(self, conditions: Optional[Dict[str, Any]], sort=None, limit=None, offset=None):
+        condition_strs_values = []
+        if conditions:
+            condition_strs_values = [
+                self._sql._build_condition_string(self.table_name, key, value) for key, value in conditions.items()
+            ]
+        condition_strs_values.append((f"{self.table_name}.active = %s", ['true']))
+
+        query = f"SELECT {self.table_name}.* FROM {self.table_name}"
+        query += f" WHERE {' AND '.join(condition_str for condition_str, _ in condition_strs_values)}"
+        if sort:
+            query += f" ORDER BY {', '.join(f'{column} {direction}' for column, direction in sort)}"
+        if limit is not None:
+            query += f" LIMIT {int(limit)}"
+        if offset is not None:
+            query += f" OFFSET {int(offset)}"
+
+        values = sum((condition_values for _, condition_values in condition_strs_values), [])
+        return query, tuple(values)
+
+    @asynccontextmanager
+    async def connection(self):
+        """
+        `pool.connection()`, with the wait for a free connection recorded in the metrics.
+        """
+        with timed_pool_checkout('async'):
+            connection = await self.pool.getconn()
+        try:
+            async with connection:
+                yield connection
+        finally:
+            await self.pool.putconn(connection)
+
+    async def _execute(self, connection, sql: str, params=None, cursor=None):
+        """
+        Executes a statement on `cursor` (or the connection), timed, counted and, when slow, logged.
+        """
+        record_statement(sql, params)
+        started = time.perf_counter()
+        with timed(DB):
+            await (cursor or connection).execute(sql, params)
+        seconds = time.perf_counter() - started
+        if is_slow(seconds):
+            sql_fingerprint = fingerprint(sql)
+            plan = await self._explain(connection, sql, params) if should_explain(sql_fingerprint) else None
+            log_slow_query(sql_fingerprint, params, seconds, plan)
+
+    @staticmethod
+    async def _explain(connection, sql: str, params=None):
+        """
+        The EXPLAIN ANALYZE plan of a statement, in a savepoint (or transaction) that is always
+        rolled back, so a failure leaves the caller's transaction as it was.
+        """
+        try:
+            async with connection.transaction(force_rollback=True):
+                async with connection.cursor() as cursor:
+                    await cursor.execute(EXPLAIN_PREFIX + sql, params)
+                    return (await cursor.fetchone())[0]
+        except Exception as error:
+            logger.warning(f"Could not explain a slow query: {error}")
+            return None
+
+    async def execute_query(self, sql: str, params=None) -> Optional[List[Dict[str, Any]]]:
+        async with self.connection() as connection:
+            async with connection.cursor(row_factory=dict_row) as cursor:
+                await self._execute(connection, sql, params, cursor)
+                if cursor.description is not None:
+                    return await cursor.fetchall()
+        return None
+
+    async def get_one(self, conditions: Dict[str, Any] = None) -> Optional[VersionedModel]:
+        if conditions:
+            conditions = clean_id_conditions(conditions)
+            if conditions is None:
+                return None
+        query, values = self._build_select(conditions, limit=1)
+        records = await self.execute_query(query, values)
+        if not records:
+            return None
+        return self.model.from_dict(records[0])
+
+    async def get_many(
+        self, conditions: Dict[str, Any] = None, sort: List[tuple] = None, limit: int = None, offset: int = None
+    ) -> List[VersionedModel]:
+        if conditions:
+            conditions = clean_id_conditions(conditions)
+            if conditions is None:
+                return []
+        query, values = self._build_select(conditions, sort, limit, offset)
+        records = await self.execute_query(query, values)
+        return [self.model.from_dict(record) for record in records or []]
+
+    async def save(self, instance: VersionedModel) -> VersionedModel:
+        data = self._sync_repository._process_data_before_save(instance)
+        if self.audit_mode == AuditMode.SYNC:
+            move_entity_query, move_entity_values = self._sql.get_move_entity_to_audit_table_query(
+                self.table_name, instance.entity_id
+            )
+            save_query, save_values = self._sql.get_save_query(self.table_name, data)
+
+            async with self.connection() as connection:
+                async with connection.transaction():
+                    await self._execute(connection, move_entity_query, move_entity_values)
+                    await self._execute(connection, save_query, self._transform_values(save_values))
+            return instance
+
+        if self.audit_mode == AuditMode.OFF:
+            save_query, save_values = self._sql.get_save_query(self.table_name, data)
+        else:
+            save_query, save_values = get_save_query_capturing_previous(self.table_name, data)
+        records = await self.execute_query(save_query, self._transform_values(save_values))
+
+        previous = records[0]['previous'] if records and self.audit_mode == AuditMode.DEFERRED else None
+        if previous is not None:
+            audit_writer = get_audit_writer()
+            audit_writer.append(self.table_name, previous)
+            if audit_writer.backlogged:
+                await asyncio.to_thread(audit_writer.wait_for_capacity)
+        return instance
+
+    async def delete(self, instance: VersionedModel) -> VersionedModel:
+        instance.active = False
+        return await self.save(instance)
@@ -0,0 +1,68 @@
+from functools import partial
+
+from psycopg.conninfo import make_conninfo
+from psycopg_pool import AsyncConnectionPool
+
+from common.metrics import register_pool
+from common.repositories.async_base import AsyncBaseRepository
+from common.repositories.factory import RepositoryFactory, RepoType
+from common.repositories.ids import register_hex_uuid_loader
+
+
+_pool = None
+
+
+def get_pool_stats(pool: AsyncConnectionPool) -> dict:
+    stats = pool.get_stats()
+    size, available = stats.get('pool_size', 0), stats.get('pool_available', 0)
+    return {
+        'in_use': size - available,
+        'idle': available,
+        'max': pool.max_size,
+        'waiting': stats.get('requests_waiting', 0),
+    }
+
+
+async def configure_connection(config, connection):
+    connection.prepared_max = config.PREPARED_STATEMENTS_MAX
+    register_hex_uuid_loader(connection.adapters)
+
+
+def get_async_pool(config) -> AsyncConnectionPool:
+    """
+    Process-wide async connection pool. It is created closed; the ASGI lifespan opens it on
+    startup and closes it on shutdown.
+    """
+    global _pool
+    if _pool is None:
+        conninfo = make_conninfo(
+            host=config.POSTGRES_HOST,
+            port=int(config.POSTGRES_PORT),
+            user=config.POSTGRES_USER,
+            password=config.POSTGRES_PASSWORD,
+            dbname=config.POSTGRES_DB,
+        )
+        _pool = AsyncConnectionPool(
+            conninfo,
+            min_size=int(config.POSTGRES_ASYNC_POOL_MIN_SIZE),
+            max_size=int(config.POSTGRES_ASYNC_POOL_MAX_SIZE),
+            # psycopg prepares repeated statements itself; it only needs the same settings
+            kwargs={'prepare_threshold': config.PREPARED_STATEMENTS_THRESHOLD or None},
+            configure=partial(configure_connection, config),
+            open=False,
+        )
+        register_pool('async', lambda: get_pool_stats(_pool))
+    return _pool
+
+
+class AsyncRepositoryFactory:
+
+    def __init__(self, config):
+        self.config = config
+
+    def get_repository(self, repo_type: RepoType, person_id=None) -> AsyncBaseRepository:
+        repo_class = RepositoryFactory._repositories.get(repo_type)
+        if repo_class is None:
+            raise ValueError(f"No repository found with the name '{repo_type}'")
+
+        return AsyncBaseRepository(get_async_pool(self.config), repo_class.MODEL, user_id=person_id)
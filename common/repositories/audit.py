@@ -0,0 +1,251 @@
+import atexit
+import json
+import threading
+import time
+from enum import Enum
+from typing import Dict, List, Optional
+
+import psycopg2
+
+from common.app_config import config
+from common.app_logger import logger
+
+
+class AuditMode(str, Enum):
+    # The previous version is copied to the audit table in the save transaction (rococo's behavior).
+    SYNC = 'sync'
+    # The previous version is captured by the save statement and written later, in batches.
+    DEFERRED = 'deferred'
+    # No audit rows are written.
+    OFF = 'off'
+
+    def __repr__(self):
+        return str(self.value)
+
+
+def get_table_audit_modes() -> Dict[str, AuditMode]:
+    """
+    Returns the per-table audit modes of AUDIT_MODES (e.g. "task=deferred,login_method=off").
+    """
+    modes = {}
+    for entry in config.AUDIT_MODES.split(','):
+        table, _, mode = entry.partition('=')
+        if table.strip():
+            modes[table.strip()] = AuditMode(mode.strip())
+    return modes
+
+
+def get_audit_mode(table_name: str) -> AuditMode:
+    """
+    Returns the audit mode of a table: its entry in AUDIT_MODES, otherwise AUDIT_MODE.
+    """
+    return get_table_audit_modes().get(table_name, AuditMode(config.AUDIT_MODE))
+
+
+def is_audit_deferred() -> bool:
+    """
+    Whether any table may be audited in deferred mode, so every process may open the audit
+    writer's connection next to its pool.
+    """
+    return AuditMode.DEFERRED in (AuditMode(config.AUDIT_MODE), *get_table_audit_modes().values())
+
+
+def get_save_query_capturing_previous(table_name: str, data: dict):
+    """
+    Returns rococo's update-or-insert as a single statement that also returns the row it replaced
+    as JSON (no row for an insert). All parts of the statement see the same snapshot, so
+    `previous` is the version before the update.
+    """
+    columns = list(data.keys())
+    unique_column = columns[0]
+    query = (
+        f"WITH previous AS ("
+        f"  SELECT * FROM {table_name} WHERE {unique_column} = %s"
+        f"), updated AS ("
+        f"  UPDATE {table_name} SET {', '.join(f'{column} = %s' for column in columns)} "
+        f"  WHERE {unique_column} = %s RETURNING 1"
+        f"), inserted AS ("
+        f"  INSERT INTO {table_name} ({', '.join(columns)}) "
+        f"  SELECT {', '.join(['%s'] * len(columns))} WHERE NOT EXISTS (SELECT 1 FROM updated) RETURNING 1"
+        f") "
+        f"SELECT to_jsonb(previous) AS previous FROM previous"
+    )
+    values = (data[unique_column],) + tuple(data.values()) + (data[unique_column],) + tuple(data.values())
+    return query, values
+
+
+def get_insert_audit_rows_query(table_name: str, rows: List[dict]):
+    # The audit table mirrors the main table, so the captured rows map onto it column by column.
+    # A row already present (e.g. a retried batch) is skipped instead of failing the batch.
+    query = (
+        f"INSERT INTO {table_name}_audit "
+        f"SELECT * FROM jsonb_populate_recordset(NULL::{table_name}_audit, %s::jsonb) "
+        f"ON CONFLICT DO NOTHING"
+    )
+    return query, (json.dumps(rows),)
+
+
+class AuditWriter:
+    """
+    Buffers the previous versions captured by saves in deferred mode and writes them to the audit
+    tables in multi-row batches: whenever AUDIT_BATCH_SIZE rows are pending, every
+    AUDIT_FLUSH_INTERVAL seconds, and on shutdown.
+
+    Rows still pending when the process dies are lost; use sync mode for tables whose history
+    must survive a crash. A failed batch is kept and retried, up to AUDIT_MAX_PENDING rows.
+    """
+
+    def __init__(self, batch_size: int, flush_interval: float, max_pending: int):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._pending: Dict[str, List[dict]] = {}
+        self._pending_count = 0
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._connection = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+        self._thread.start()
+
+        self.written = 0
+        self.failed_batches = 0
+        self.dropped = 0
+
+    @property
+    def backlogged(self) -> bool:
+        return self._pending_count >= self.max_pending
+
+    def append(self, table_name: str, row: dict):
+        with self._condition:
+            self._pending.setdefault(table_name, []).append(row)
+            self._pending_count += 1
+            if self._pending_count >= self.batch_size:
+                self._condition.notify()
+
+    def wait_for_capacity(self, timeout: float = None):
+        """
+        Blocks while the buffer is full, so writers slow down instead of growing it without bound.
+        """
+        with self._condition:
+            self._condition.notify()
+            self._condition.wait_for(lambda: not self.backlogged or self._closed, timeout)
+
+    def _connect(self):
+        if self._connection is None or self._connection.closed:
+            self._connection = psycopg2.connect(
+                host=config.POSTGRES_HOST,
+                port=int(config.POSTGRES_PORT),
+                user=config.POSTGRES_USER,
+                password=config.POSTGRES_PASSWORD,
+                database=config.POSTGRES_DB,
+            )
+        return self._connection
+
+    def flush(self) -> bool:
+        """
+        Writes the pending rows, returning False when some could not be written.
+        """
+        with self._flush_lock:
+            with self._condition:
+                pending, self._pending = self._pending, {}
+                count, self._pending_count = self._pending_count, 0
+            if not count:
+                return True
+
+            started = time.perf_counter()
+            failed = {}
+            for table_name, rows in pending.items():
+                try:
+                    connection = self._connect()
+                    with connection.cursor() as cursor:
+                        for offset in range(0, len(rows), self.batch_size):
+                            cursor.execute(*get_insert_audit_rows_query(table_name, rows[offset:offset + self.batch_size]))
+                    connection.commit()
+                    self.written += len(rows)
+                except psycopg2.Error as e:
+                    logger.error(f"Could not write {len(rows)} deferred {table_name}_audit rows: {e}")
+                    self.failed_batches += 1
+                    if self._connection is not None:
+                        self._connection.close()
+                    failed[table_name] = rows
+
+            with self._condition:
+                for table_name, rows in failed.items():
+                    room = self.max_pending - self._pending_count
+                    if len(rows) > room:
+                        logger.error(f"Dropping {len(rows) - max(room, 0)} deferred {table_name}_audit rows")
+                        self.dropped += len(rows) - max(room, 0)
+                        rows = rows[:max(room, 0)]
+                    self._pending[table_name] = rows + self._pending.get(table_name, [])
+                    self._pending_count += len(rows)
+                self._condition.notify_all()
+            logger.debug(f"Flushed {count} deferred audit rows in {(time.perf_counter() - started) * 1000:.1f} ms")
+            return not failed
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._closed or self._pending_count >= self.batch_size, self.flush_interval
+                )
+                closed = self._closed
+            try:
+                flushed = self.flush()
+            except Exception:
+                logger.exception("Deferred audit flush failed")
+                flushed = False
+            if closed:
+                return
+            if not flushed:
+                # Back off before retrying, however many rows are pending.
+                with self._condition:
+                    self._condition.wait_for(lambda: self._closed, self.flush_interval)
+
+    def close(self):
+        """
+        Flushes what is pending and stops the writer thread.
+        """
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+        if self._connection is not None:
+            self._connection.close()
+
+    def as_dict(self) -> dict:
+        return {
+            'pending': self._pending_count,
+            'written': self.written,
+            'failed_batches': self.failed_batches,
+            'dropped': self.dropped,
+        }
+
+
+_audit_writer: Optional[AuditWriter] = None
+_audit_writer_lock = threading.Lock()
+
+
+def get_audit_writer() -> AuditWriter:
+    """
+    Returns the process-wide audit writer, starting it on first use. Call after forking.
+    """
+    global _audit_writer
+    with _audit_writer_lock:
+        if _audit_writer is None:
+            _audit_writer = AuditWriter(config.AUDIT_BATCH_SIZE, config.AUDIT_FLUSH_INTERVAL, config.AUDIT_MAX_PENDING)
+            atexit.register(_audit_writer.close)
+        return _audit_writer
+
+
+def close_audit_writer():
+    """
+    Flushes and stops the audit writer if one was started; for shutdown paths that skip atexit.
+    """
+    with _audit_writer_lock:
+        writer = _audit_writer
+    if writer is not None:
+        writer.close()
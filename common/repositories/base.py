@@ -1,7 +1,30 @@
+import json
+
 from rococo.repositories.postgresql import PostgreSQLRepository
 from rococo.data.postgresql import PostgreSQLAdapter
 from rococo.messaging.base import MessageAdapter
-from typing import Optional
+from rococo.models.versioned_model import VersionedModel
+from typing import Any, Dict, List, Optional
+
+from common.repositories.audit import AuditMode, get_audit_mode, get_audit_writer, get_save_query_capturing_previous
+from common.repositories.ids import clean_id_conditions
+
+
+def get_identity_map() -> Optional[dict]:
+    """
+    Returns the identity map of the current request (keyed by table and entity_id), or None
+    outside a Flask app context.
+    """
+    try:
+        from flask import g, has_app_context
+    except ImportError:
+        return None
+
+    if not has_app_context():
+        return None
+    if 'identity_map' not in g:
+        g.identity_map = {}
+    return g.identity_map
 
 
 class BaseRepository(PostgreSQLRepository):
@@ -18,3 +41,86 @@ class BaseRepository(PostgreSQLRepository):
     ):
         # Pass MODEL as the model to the BaseRepository
         super().__init__(db_adapter, self.MODEL, message_adapter, queue_name, user_id=user_id)
+        self.audit_mode = get_audit_mode(self.table_name)
+
+    @staticmethod
+    def _matches(instance: VersionedModel, conditions: Dict[str, Any]) -> bool:
+        # get_one only returns active rows; list conditions (IN) are left to the database.
+        if not instance.active:
+            return False
+        return all(
+            not isinstance(value, (list, tuple)) and getattr(instance, field, None) == value
+            for field, value in conditions.items()
+        )
+
+    def get_one(self, conditions: Dict[str, Any] = None, fetch_related: List[str] = None):
+        """
+        Within a request, a repeated lookup by entity_id returns the instance already loaded (or
+        saved) by any repository of the same table, provided it matches the other conditions too.
+        """
+        if conditions:
+            conditions = clean_id_conditions(conditions)
+            if conditions is None:
+                return None
+
+        entity_id = (conditions or {}).get('entity_id')
+        identity_map = get_identity_map() if isinstance(entity_id, str) and not fetch_related else None
+        if identity_map is None:
+            return super().get_one(conditions, fetch_related)
+
+        key = (self.table_name, entity_id)
+        instance = identity_map.get(key)
+        if instance is not None and self._matches(instance, conditions):
+            return instance
+
+        instance = super().get_one(conditions, fetch_related)
+        if instance is not None:
+            identity_map[key] = instance
+        return instance
+
+    def get_many(self, conditions: Dict[str, Any] = None, sort: List[tuple] = None, limit: int = None,
+                 offset: int = None, fetch_related: List[str] = None):
+        if conditions:
+            conditions = clean_id_conditions(conditions)
+            if conditions is None:
+                return []
+        return super().get_many(conditions, sort, limit, offset, fetch_related)
+
+    def _save_without_audit_copy(self, instance: VersionedModel) -> Optional[dict]:
+        """
+        Saves in one statement without copying to the audit table; in deferred mode the statement
+        also returns the replaced row, which is returned for the audit writer.
+        """
+        data = self._process_data_before_save(instance)
+        if self.audit_mode == AuditMode.OFF:
+            query, values = self.adapter.get_save_query(self.table_name, data)
+        else:
+            query, values = get_save_query_capturing_previous(self.table_name, data)
+        values = tuple(json.dumps(value) if isinstance(value, dict) else value for value in values)
+
+        with self.adapter:
+            _, rows = self.adapter.execute_statement(query, values)
+            self.adapter.commit()
+        return rows[0][0] if rows and self.audit_mode == AuditMode.DEFERRED else None
+
+    def save(self, instance: VersionedModel, send_message: bool = False):
+        """
+        Saves according to the table's audit mode; see `common.repositories.audit`.
+        """
+        if self.audit_mode == AuditMode.SYNC:
+            instance = super().save(instance, send_message)
+        else:
+            previous = self._save_without_audit_copy(instance)
+            if previous is not None:
+                audit_writer = get_audit_writer()
+                audit_writer.append(self.table_name, previous)
+                if audit_writer.backlogged:
+                    audit_writer.wait_for_capacity()
+            if send_message:
+                message = json.dumps(instance.as_dict(convert_datetime_to_iso_string=True))
+                self.message_adapter.send_message(self.queue_name, message)
+
+        identity_map = get_identity_map()
+        if identity_map is not None:
+            identity_map[(self.table_name, instance.entity_id)] = instance
+        return instance
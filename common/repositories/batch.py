@@ -0,0 +1,79 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from rococo.models.versioned_model import VersionedModel
+
+from common.repositories.base import BaseRepository, get_identity_map
+from common.repositories.ids import clean_id_conditions
+
+# Leads the columns of each lookup in the combined row; NULL when the lookup found nothing
+FOUND_COLUMN = '_batch_found'
+
+Lookup = Tuple[BaseRepository, Dict[str, Any]]
+
+
+def build_get_one_query(repository: BaseRepository, conditions: Dict[str, Any]):
+    """
+    The query and values `get_one` sends for `conditions`.
+    """
+    table = repository.table_name
+    condition_strs_values = [
+        repository.adapter._build_condition_string(table, key, value) for key, value in conditions.items()
+    ]
+    condition_strs_values.append((f"{table}.active = %s", ['true']))
+    query = f"SELECT {table}.* FROM {table}"
+    query += f" WHERE {' AND '.join(condition_str for condition_str, _ in condition_strs_values)} LIMIT 1"
+    values = sum((condition_values for _, condition_values in condition_strs_values), [])
+    return query, values
+
+
+def get_one_each(*lookups: Lookup) -> List[Optional[VersionedModel]]:
+    """
+    `repository.get_one(conditions)` for independent lookups in a single statement, so a single
+    round trip: each lookup is a LATERAL subquery of one combined row. Returns the instances
+    (or None) in the order of the lookups. Lookups by entity_id already in the request's
+    identity map are not sent, and the instances found are added to it.
+    """
+    results: List[Optional[VersionedModel]] = [None] * len(lookups)
+    identity_map = get_identity_map()
+    pending = []
+    for index, (repository, conditions) in enumerate(lookups):
+        conditions = clean_id_conditions(conditions)
+        if conditions is None:
+            continue  # A malformed id matches no row
+        entity_id = conditions.get('entity_id')
+        if identity_map is not None and isinstance(entity_id, str):
+            instance = identity_map.get((repository.table_name, entity_id))
+            if instance is not None and BaseRepository._matches(instance, conditions):
+                results[index] = instance
+                continue
+        pending.append((index, repository, conditions))
+    if not pending:
+        return results
+
+    joins = []
+    values = []
+    for position, (_, repository, conditions) in enumerate(pending):
+        query, query_values = build_get_one_query(repository, conditions)
+        joins.append(
+            f"LEFT JOIN LATERAL (SELECT true AS {FOUND_COLUMN}, lookup.* FROM ({query}) AS lookup) "
+            f"AS lookup_{position} ON true"
+        )
+        values.extend(query_values)
+    columns = ', '.join(f"lookup_{position}.*" for position in range(len(pending)))
+    sql = f"SELECT {columns} FROM (SELECT 1) AS batch {' '.join(joins)}"
+
+    adapter = pending[0][1].adapter
+    with adapter:
+        names, (row,) = adapter.execute_statement(sql, tuple(values))
+
+    # Split the combined row at each lookup's found column
+    starts = [position for position, name in enumerate(names) if name == FOUND_COLUMN] + [len(names)]
+    for position, (index, repository, _) in enumerate(pending):
+        start, end = starts[position], starts[position + 1]
+        if row[start] is None:
+            continue
+        instance = repository.model.from_dict(dict(zip(names[start + 1:end], row[start + 1:end])))
+        results[index] = instance
+        if identity_map is not None:
+            identity_map[(repository.table_name, instance.entity_id)] = instance
+    return results
@@ -1,9 +1,10 @@
 from common.repositories import *
 from enum import Enum, auto
-from rococo.data.postgresql import PostgreSQLAdapter
 from rococo.messaging.rabbitmq import RabbitMqConnection
 from typing import Optional
 from common.app_logger import logger
+from common.metrics import timed_pool_checkout
+from common.repositories.adapter import TimedPostgreSQLAdapter
 
 
 def get_flask_pooled_db():
@@ -41,7 +42,16 @@ class MessageAdapterType(str, Enum):
 def get_connection_resolver():
     pooled_db = get_flask_pooled_db()
     if pooled_db:
-        return pooled_db.get_connection
+        def get_connection(*args, **kwargs):
+            from flask import g
+
+            # Only the request's first lookup checks a connection out; later ones reuse it.
+            if getattr(g, 'db_conn', None):
+                return g.db_conn
+            with timed_pool_checkout('sync'):
+                return pooled_db.get_connection(*args, **kwargs)
+
+        return get_connection
 
 
 def get_connection_closer():
@@ -86,7 +96,7 @@ class RepositoryFactory:
         password = self.config.POSTGRES_PASSWORD
         database = self.config.POSTGRES_DB
 
-        return PostgreSQLAdapter(host, port, user, password, database, connection_resolver=get_connection_resolver(), connection_closer=get_connection_closer())
+        return TimedPostgreSQLAdapter(host, port, user, password, database, connection_resolver=get_connection_resolver(), connection_closer=get_connection_closer())
 
     def _get_rabbitmq_connection(self):
         return RabbitMqConnection(
@@ -0,0 +1,74 @@
+import re
+from typing import Any, Dict, Optional
+
+import psycopg2.extensions
+
+# Columns stored as native uuid (varchar(32) before migration 0000000009). The API and the models
+# keep using 32-character hex strings; the conversion happens here, at the database boundary.
+UUID_COLUMNS = frozenset({
+    'entity_id', 'version', 'previous_version', 'changed_by_id', 'person_id', 'email_id', 'organization_id',
+})
+
+UUID_OID = 2950
+UUID_ARRAY_OID = 2951
+
+_UUID_TEXT = re.compile(r'^(?:[0-9a-fA-F]{32}|[0-9a-fA-F]{8}-(?:[0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12})$')
+
+
+def is_valid_id(value: Any) -> bool:
+    return isinstance(value, str) and _UUID_TEXT.match(value) is not None
+
+
+def _cast_hex_uuid(value, cursor):
+    return value.replace('-', '') if value is not None else None
+
+
+HEX_UUID = psycopg2.extensions.new_type((UUID_OID,), 'HEX_UUID', _cast_hex_uuid)
+HEX_UUID_ARRAY = psycopg2.extensions.new_array_type((UUID_ARRAY_OID,), 'HEX_UUID[]', HEX_UUID)
+
+
+def register_hex_uuid_typecasters(scope):
+    """
+    Makes psycopg2 return uuid columns as 32-character hex strings, like the former varchar(32)
+    columns, on `scope` (a connection or cursor) only; other psycopg2 users of the process keep
+    its default.
+    """
+    psycopg2.extensions.register_type(HEX_UUID, scope)
+    psycopg2.extensions.register_type(HEX_UUID_ARRAY, scope)
+
+
+def register_hex_uuid_loader(adapters_map):
+    """
+    The psycopg 3 (async repositories) counterpart of `register_hex_uuid_typecasters`, on a
+    connection's `adapters`.
+    """
+    from psycopg.adapt import Loader
+
+    class HexUuidLoader(Loader):
+        def load(self, data):
+            return bytes(data).decode().replace('-', '')
+
+    adapters_map.register_loader('uuid', HexUuidLoader)
+
+
+def clean_id_conditions(conditions: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Returns the conditions with malformed ids (e.g. from a URL) removed from IN lists, or None when
+    a condition can match no row because its id is malformed. Casting such a value to uuid would
+    fail the whole query instead.
+    """
+    if not conditions:
+        return conditions
+
+    cleaned = dict(conditions)
+    for column, value in conditions.items():
+        if column not in UUID_COLUMNS or value is None:
+            continue
+        if isinstance(value, (list, tuple)):
+            valid = [item for item in value if not isinstance(item, str) or is_valid_id(item)]
+            if not valid:
+                return None
+            cleaned[column] = valid
+        elif isinstance(value, str) and not is_valid_id(value):
+            return None
+    return cleaned
@@ -0,0 +1,189 @@
+import asyncio
+import math
+import threading
+import time
+from typing import Dict, List, Optional
+
+from common.app_logger import logger
+from common.metrics import get_checkout_window
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def summarize_waits(waits: List[float]) -> dict:
+    if not waits:
+        return {'count': 0, 'p50_ms': None, 'p95_ms': None, 'max_ms': None}
+    return {
+        'count': len(waits),
+        'p50_ms': round(percentile(waits, 0.5) * 1000, 3),
+        'p95_ms': round(percentile(waits, 0.95) * 1000, 3),
+        'max_ms': round(max(waits) * 1000, 3),
+    }
+
+
+class PoolSizer:
+    """
+    Decides how many connections a pool keeps open, from the checkout waits seen since the last
+    decision: one step more while their p95 is above `target_wait` seconds, one step fewer after
+    `shrink_after` intervals in a row without slow waits and with more than a step of idle
+    connections. The size stays within [minimum, maximum].
+    """
+
+    def __init__(self, minimum: int, maximum: int, target_wait: float, step: int = 1, shrink_after: int = 3):
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.target_wait = target_wait
+        self.step = step
+        self.shrink_after = shrink_after
+        self.size = minimum
+        self._quiet_intervals = 0
+
+    def update(self, waits: List[float], idle: int) -> int:
+        if waits and percentile(waits, 0.95) > self.target_wait:
+            self._quiet_intervals = 0
+            self.size = min(self.maximum, self.size + self.step)
+        elif idle > self.step:
+            self._quiet_intervals += 1
+            if self._quiet_intervals >= self.shrink_after:
+                self._quiet_intervals = 0
+                self.size = max(self.minimum, self.size - self.step)
+        else:
+            self._quiet_intervals = 0
+        return self.size
+
+    def describe(self) -> dict:
+        return {'size': self.size, 'minimum': self.minimum, 'maximum': self.maximum,
+                'target_wait_ms': self.target_wait * 1000}
+
+
+# Pool name -> the sizer adapting it, when adaptive sizing is on
+sizers: Dict[str, PoolSizer] = {}
+
+
+def advise(stats: dict, waits: List[float], target_wait: float, minimum: int) -> str:
+    """
+    A sizing hint for a pool from its current counts and recent checkout waits.
+    """
+    slow = bool(waits) and percentile(waits, 0.95) > target_wait
+    maximum: Optional[int] = stats.get('max')
+    in_use, idle = stats.get('in_use') or 0, stats.get('idle') or 0
+    if slow and maximum and in_use >= maximum:
+        return "Checkouts wait for a connection at the maximum: raise the maximum or serve fewer concurrent requests."
+    if slow:
+        return "Checkouts wait for new connections to open: raise the minimum or enable adaptive sizing."
+    if idle > max(minimum, in_use):
+        return "Most connections are idle: the minimum can be lowered."
+    return "Checkout waits are within the target."
+
+
+def get_pooled_db_counts(pool):
+    """
+    Checked out and idle connections of a DBUtils `PooledDB`. Reads its private counters, which
+    are only checked against the DBUtils version pinned in pyproject.toml.
+    """
+    with pool._lock:
+        return pool._connections, len(pool._idle_cache)
+
+
+def open_idle_connections(pool, count: int) -> int:
+    """
+    Checks `count` connections out of a `PooledDB` through its public API, each validated with a
+    query, then returns them all, so that at least `count` are open while none is checked out.
+    Idle connections are reused before new ones are opened; stops at the first failure. Returns
+    how many were validated.
+    """
+    checked_out = []
+    opened = 0
+    try:
+        for _ in range(count):
+            connection = pool.connection(shareable=False)
+            checked_out.append(connection)
+            cursor = connection.cursor()
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+            cursor.close()
+            opened += 1
+    except Exception as error:
+        logger.warning(f"Could not open a pooled database connection: {error}")
+    finally:
+        # Closing a pooled connection rolls it back and returns it to the idle cache
+        for connection in checked_out:
+            connection.close()
+    return opened
+
+
+def close_idle_connections(pool, count: int) -> int:
+    """
+    Closes up to `count` idle connections of a `PooledDB`, most recently returned first. Returns
+    how many were closed.
+    """
+    with pool._lock:
+        closing = [pool._idle_cache.pop() for _ in range(min(count, len(pool._idle_cache)))]
+    for connection in closing:
+        try:
+            connection.close()
+        except Exception:
+            pass
+    return len(closing)
+
+
+def resize_pooled_db(pool, size: int):
+    """
+    Opens or closes idle connections of a `PooledDB` so that `size` are open, counting the checked
+    out ones; those are never touched, nor is the pool's maximum.
+    """
+    in_use, idle = get_pooled_db_counts(pool)
+    if in_use + idle < size:
+        open_idle_connections(pool, size - in_use)
+    elif idle and in_use + idle > size:
+        close_idle_connections(pool, min(idle, in_use + idle - size))
+
+
+class PooledDbResizer(threading.Thread):
+    """
+    Applies a `PoolSizer` to a `PooledDB` every `interval` seconds.
+    """
+
+    def __init__(self, pool, sizer: PoolSizer, interval: float, name: str = 'sync'):
+        super().__init__(name=f"pool-resizer-{name}", daemon=True)
+        self.pool = pool
+        self.sizer = sizer
+        self.interval = interval
+        self.window = get_checkout_window(name)
+        self._stopped = threading.Event()
+
+    def run(self):
+        since = time.monotonic()
+        while not self._stopped.wait(self.interval):
+            now = time.monotonic()
+            try:
+                _, idle = get_pooled_db_counts(self.pool)
+                resize_pooled_db(self.pool, self.sizer.update(self.window.waits_since(since), idle))
+            except Exception as error:
+                logger.warning(f"Could not resize the database pool: {error}")
+            since = now
+
+    def stop(self):
+        self._stopped.set()
+
+
+async def resize_async_pool(pool, sizer: PoolSizer, interval: float, get_stats, name: str = 'async'):
+    """
+    Applies a `PoolSizer` to the minimum size of a psycopg `AsyncConnectionPool` every `interval`
+    seconds, until cancelled; the pool opens and closes the connections itself.
+    """
+    window = get_checkout_window(name)
+    since = time.monotonic()
+    while True:
+        await asyncio.sleep(interval)
+        now = time.monotonic()
+        try:
+            size = sizer.update(window.waits_since(since), get_stats()['idle'])
+            if size != pool.min_size:
+                await pool.resize(min_size=size, max_size=max(size, pool.max_size))
+        except Exception as error:
+            logger.warning(f"Could not resize the async database pool: {error}")
+        since = now
@@ -0,0 +1,122 @@
+import itertools
+import re
+import weakref
+from collections import OrderedDict
+from typing import Optional
+
+from common.app_config import config
+
+_PLACEHOLDERS = re.compile(r'%%|%s|%\(|%')
+# Only reads: in the saves' `INSERT ... SELECT %s, ...` a parameter's type cannot be inferred from
+# its context at PREPARE time, while a literal would be coerced to the column type
+_PREPARABLE = re.compile(r'^\s*SELECT\b', re.I)
+
+_names = itertools.count(1)
+# psycopg2 connection -> its PreparedStatements
+_connections = weakref.WeakKeyDictionary()
+
+
+def to_server_placeholders(sql: str, param_count: int) -> Optional[str]:
+    """
+    The statement with its `%s` placeholders numbered for PREPARE ($1, $2, ...), or None when it
+    cannot be prepared (not a SELECT, named placeholders, dollar signs, a parameter count mismatch).
+    `%%` is kept: the PREPARE goes through the same parameter interpolation as the EXECUTE.
+    """
+    if not _PREPARABLE.match(sql) or '$' in sql:
+        return None
+    position = 0
+    parts = []
+    last = 0
+    for match in _PLACEHOLDERS.finditer(sql):
+        token = match.group()
+        if token == '%%':
+            continue
+        if token != '%s':
+            return None
+        position += 1
+        parts.append(sql[last:match.start()])
+        parts.append(f"${position}")
+        last = match.end()
+    if position != param_count or (position == 0 and '%' in sql):
+        return None
+    parts.append(sql[last:])
+    return ''.join(parts)
+
+
+class PreparedStatements:
+    """
+    The statements prepared on one connection, by SQL text. A statement is prepared the
+    `threshold`-th time it is executed on the connection, so the PREPARE only costs a round trip
+    on connections that are reused (pooled ones); the least recently used statements beyond
+    `max_size` are deallocated.
+    """
+
+    def __init__(self, threshold: int, max_size: int):
+        self.threshold = threshold
+        self.max_size = max_size
+        self.names = OrderedDict()
+        self.counts = {}
+
+    def rewrite(self, sql: str, params):
+        """
+        The SQL to send instead of `sql`: an EXECUTE of the prepared statement, preceded by its
+        PREPARE (and the DEALLOCATE of an evicted one) in the same round trip when it is new.
+        Returns None to send `sql` as it is.
+        """
+        if isinstance(params, dict):
+            return None
+        name = self.names.get(sql)
+        if name is not None:
+            self.names.move_to_end(sql)
+            return self._execute(name, len(params or ()))
+
+        count = self.counts.get(sql, 0) + 1
+        if count < self.threshold:
+            if len(self.counts) >= self.max_size * 4:
+                self.counts.clear()  # Mostly one-off statements; start counting afresh
+            self.counts[sql] = count
+            return None
+
+        self.counts.pop(sql, None)
+        body = to_server_placeholders(sql, len(params or ()))
+        if body is None:
+            return None
+        name = f"todomvc_{next(_names)}"
+        statements = []
+        if len(self.names) >= self.max_size:
+            _, evicted = self.names.popitem(last=False)
+            statements.append(f"DEALLOCATE {evicted}")
+        statements.append(f"PREPARE {name} AS {body}")
+        statements.append(self._execute(name, len(params or ())))
+        self.names[sql] = name
+        return '; '.join(statements)
+
+    @staticmethod
+    def _execute(name: str, param_count: int) -> str:
+        if not param_count:
+            return f"EXECUTE {name}"
+        return f"EXECUTE {name}({', '.join(['%s'] * param_count)})"
+
+    def forget(self, sql: str):
+        self.names.pop(sql, None)
+
+    def clear(self):
+        """
+        Forgets every statement, e.g. after the schema changed under them. Their names are never
+        reused, so whatever is left on the server cannot be mistaken for a new statement.
+        """
+        self.names.clear()
+        self.counts.clear()
+
+
+def get_prepared_statements(connection) -> Optional[PreparedStatements]:
+    """
+    The prepared statements of a psycopg2 connection; None when PREPARED_STATEMENTS_THRESHOLD is 0.
+    """
+    if config.PREPARED_STATEMENTS_THRESHOLD <= 0:
+        return None
+    statements = _connections.get(connection)
+    if statements is None:
+        statements = PreparedStatements(config.PREPARED_STATEMENTS_THRESHOLD, config.PREPARED_STATEMENTS_MAX)
+        _connections[connection] = statements
+    return statements
@@ -1,3 +1,7 @@
+import csv
+import io
+from typing import Iterable, List
+
 from common.repositories.base import BaseRepository
 from common.models.task import Task
 
@@ -5,3 +9,37 @@ from common.models.task import Task
 class TaskRepository(BaseRepository):
     MODEL = Task
 
+    COPY_COLUMNS = (
+        'entity_id', 'version', 'previous_version', 'active', 'changed_by_id', 'changed_on',
+        'person_id', 'title', 'completed',
+    )
+
+    def copy_tasks(self, chunks: Iterable[List[Task]]) -> int:
+        """
+        Insert new tasks with one `COPY ... FROM STDIN` per chunk, all in one transaction: either
+        every chunk is committed or, when any chunk (or producing the next one) fails, none is.
+
+        Only the `task` table is written: like `save()` on a new entity, there is no previous
+        version to move into `task_audit` yet.
+        """
+        query = f"COPY {self.table_name} ({', '.join(self.COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+        copied = 0
+        with self.adapter:
+            try:
+                for tasks in chunks:
+                    if not tasks:
+                        continue
+                    buffer = io.StringIO()
+                    writer = csv.writer(buffer)
+                    for task in tasks:
+                        data = self._process_data_before_save(task)
+                        writer.writerow([data.get(column) for column in self.COPY_COLUMNS])
+                    buffer.seek(0)
+                    self.adapter.copy_from(query, buffer)
+                    copied += len(tasks)
+                if copied:
+                    self.adapter.commit()
+            except BaseException:
+                self.adapter.rollback()
+                raise
+        return copied
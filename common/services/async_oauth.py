@@ -0,0 +1,81 @@
+import httpx
+
+from common.app_logger import logger
+from common.metrics import OAUTH, timed
+
+
+class AsyncOAuthClient:
+    """
+    Async counterpart of `OAuthClient` for the ASGI serving mode. The provider round-trips are
+    awaited on the event loop instead of blocking a worker thread.
+    """
+
+    def __init__(self, config, http_client: httpx.AsyncClient):
+        self.config = config
+        self.http_client = http_client
+
+    async def _post_for_json(self, url: str, data: dict, provider: str):
+        with timed(OAUTH):
+            response = await self.http_client.post(url, data=data)
+        logger.info(f"{provider} OAuth response status: {response.status_code}")
+        if response.status_code != 200:
+            logger.error(f"{provider} OAuth error: {response.status_code} - {response.text}")
+        response.raise_for_status()
+        return response.json()
+
+    async def _get_json(self, url: str, access_token: str):
+        with timed(OAUTH):
+            response = await self.http_client.get(url, headers={'Authorization': f'Bearer {access_token}'})
+        response.raise_for_status()
+        return response.json()
+
+    async def get_google_token(self, code: str, redirect_uri: str, code_verifier: str):
+        """
+        Exchange Google OAuth authorization code for access token
+
+        Raises:
+            httpx.HTTPError: If the request fails
+        """
+        token_data = {
+            'client_id': self.config.GOOGLE_CLIENT_ID,
+            'client_secret': self.config.GOOGLE_CLIENT_SECRET,
+            'code': code,
+            'grant_type': 'authorization_code',
+            'redirect_uri': redirect_uri,
+            'code_verifier': code_verifier
+        }
+        return await self._post_for_json('https://oauth2.googleapis.com/token', token_data, 'Google')
+
+    async def get_google_user_info(self, access_token: str):
+        """
+        Get Google user info using access token
+        """
+        return await self._get_json('https://openidconnect.googleapis.com/v1/userinfo', access_token)
+
+    async def get_microsoft_token(self, code: str, redirect_uri: str, code_verifier: str):
+        """
+        Exchange Microsoft OAuth authorization code for access token.
+        Uses PKCE code_verifier if provided.
+        """
+        token_data = {
+            'client_id': self.config.MICROSOFT_CLIENT_ID,
+            'client_secret': self.config.MICROSOFT_CLIENT_SECRET,
+            'scope': 'User.Read',
+            'code': code,
+            'grant_type': 'authorization_code',
+            'redirect_uri': redirect_uri,
+            'code_verifier': code_verifier
+        }
+        return await self._post_for_json(
+            'https://login.microsoftonline.com/common/oauth2/v2.0/token', token_data, 'Microsoft'
+        )
+
+    async def get_microsoft_user_info(self, access_token: str):
+        """
+        Get Microsoft user info from Microsoft Graph API
+        """
+        user_data = await self._get_json('https://graph.microsoft.com/v1.0/me', access_token)
+        return {
+            "email": user_data.get("userPrincipalName") or user_data.get("mail"),
+            "name": user_data.get("displayName", "")
+        }
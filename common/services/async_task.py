@@ -0,0 +1,72 @@
+import asyncio
+
+from common.cache import dump_models, get_cache_namespace, get_single_flight, load_models
+from common.repositories.async_factory import AsyncRepositoryFactory
+from common.repositories.factory import RepoType
+from common.models.task import Task
+from common.tasks.async_task_events import AsyncTaskEventPublisher
+from common.tasks.task_events import TaskEvent
+
+
+class AsyncTaskService:
+    """
+    Async counterpart of `TaskService` with the same methods and event semantics.
+    """
+
+    def __init__(self, config, event_publisher: AsyncTaskEventPublisher, person_id: str = None):
+        self.config = config
+        self.repository_factory = AsyncRepositoryFactory(config)
+        self.task_repo = self.repository_factory.get_repository(RepoType.TASK, person_id=person_id)
+        self.event_publisher = event_publisher
+        self.task_list_flight = get_single_flight('async_task_list', asynchronous=True)
+        # Reads stay on the database, but writes must still invalidate lists cached by `TaskService`.
+        self.task_list_cache = None
+        if int(config.TASK_LIST_CACHE_TTL) > 0:
+            self.task_list_cache = get_cache_namespace('task_list', int(config.TASK_LIST_CACHE_TTL))
+
+    async def _invalidate_task_lists(self, person_id: str):
+        for completed in (None, True, False):
+            key = f"{person_id}:{completed}"
+            self.task_list_flight.forget(key)
+            if self.task_list_cache is not None:
+                # The cache client blocks on the network, so it runs off the event loop.
+                await asyncio.to_thread(self.task_list_cache.invalidate, key)
+
+    async def _publish_task_event(self, event: TaskEvent, task: Task):
+        await self.event_publisher.publish(
+            task.person_id, event, {"task": task.as_dict(convert_datetime_to_iso_string=True)}
+        )
+
+    async def save_task(self, task: Task):
+        event = TaskEvent.CREATED if task.previous_version is None else TaskEvent.UPDATED
+        task = await self.task_repo.save(task)
+        await self._invalidate_task_lists(task.person_id)
+        await self._publish_task_event(event, task)
+        return task
+
+    async def set_task_completed(self, task: Task, completed: bool):
+        task.completed = completed
+        task = await self.task_repo.save(task)
+        await self._invalidate_task_lists(task.person_id)
+        await self._publish_task_event(TaskEvent.COMPLETED if completed else TaskEvent.UNCOMPLETED, task)
+        return task
+
+    async def get_tasks_by_person_id(self, person_id: str, completed: bool = None):
+        filters = {"person_id": person_id, "active": True}
+        if completed is not None:
+            filters["completed"] = completed
+
+        async def load():
+            return dump_models(await self.task_repo.get_many(filters))
+
+        # Identical concurrent reads share one query; each caller decodes its own copy of the rows.
+        value, _ = await self.task_list_flight.do(f"{person_id}:{completed}", load)
+        return load_models(Task, value)
+
+    async def get_task_by_id(self, task_id: str, person_id: str):
+        return await self.task_repo.get_one({"entity_id": task_id, "person_id": person_id, "active": True})
+
+    async def delete_task(self, task: Task):
+        await self.task_repo.delete(task)
+        await self._invalidate_task_lists(task.person_id)
+        await self._publish_task_event(TaskEvent.DELETED, task)
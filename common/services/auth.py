@@ -9,6 +9,7 @@ from common.services import (
 )
 from common.models import Person, Email, LoginMethod, Organization, PersonOrganizationRole
 from common.models.login_method import LoginMethodType
+from common.repositories.batch import get_one_each
 from common.tasks.send_message import MessageSender
 from common.app_logger import logger
 
@@ -109,7 +110,7 @@ class AuthService:
             self.message_sender.send_message(self.EMAIL_TRANSMITTER_QUEUE_NAME, message)
 
     def login_user_by_email_password(self, email: str, password: str):
-        email_obj = self.email_service.get_email_by_email_address(email)
+        email_obj = self.email_service.get_email_by_email_address(email, cache_missing=True)
 
         if not email_obj:
             raise InputValidationError("Email is not registered.")
@@ -138,7 +139,7 @@ class AuthService:
 
         access_token, expiry = generate_access_token(login_method, person=person, email=email_obj)
 
-        return access_token, expiry
+        return access_token, expiry, person
 
     def login_user_by_oauth(self, email: str, first_name: str, last_name: str, provider: str, provider_data: dict, person_id: str = None):
         """
@@ -254,8 +255,19 @@ class AuthService:
         except jwt.ExpiredSignatureError:
             return
 
+    @staticmethod
+    def peek_reset_password_token(token) -> dict:
+        """
+        The claims of a reset password token, unverified: only to look up what it names, which
+        must not be used before `parse_reset_password_token` has verified it.
+        """
+        try:
+            return jwt.decode(token, options={'verify_signature': False})
+        except jwt.InvalidTokenError:
+            return {}
+
     def trigger_forgot_password_email(self, email: str):
-        email_obj = self.email_service.get_email_by_email_address(email)
+        email_obj = self.email_service.get_email_by_email_address(email, cache_missing=True)
         if not email_obj:
             raise APIException("Email is not registered.")
         
@@ -288,7 +300,15 @@ class AuthService:
         )
 
         login_method_id = force_str(urlsafe_base64_decode(uidb64))
-        login_method = self.login_method_service.get_login_method_by_id(login_method_id)
+        # The email and person the token names are fetched with the login method whose password
+        # verifies it, in one round trip, and only used once it is verified.
+        claims = self.peek_reset_password_token(token)
+        email_id, person_id = claims.get('email_id'), claims.get('person_id')
+        login_method, email_obj, person_obj = get_one_each(
+            (self.login_method_service.login_method_repo, {"entity_id": login_method_id}),
+            (self.email_service.email_repo, {"entity_id": email_id} if isinstance(email_id, str) else None),
+            (self.person_service.person_repo, {"entity_id": person_id} if isinstance(person_id, str) else None),
+        )
 
         if not login_method:
             raise APIException("Invalid password reset URL.")
@@ -298,11 +318,9 @@ class AuthService:
         if not parsed_token:
             raise APIException("Invalid reset password token.")
         
-        email_obj = self.email_service.get_email_by_id(parsed_token['email_id'])
         if not email_obj:
             raise APIException("Email not found.")
         
-        person_obj = self.person_service.get_person_by_id(parsed_token['person_id'])
         if not person_obj:
             raise APIException("Person with email not found.")
 
@@ -1,5 +1,6 @@
 from common.repositories.factory import RepositoryFactory, RepoType
 from common.models import Email
+from common.cache import get_email_cache
 
 
 class EmailService:
@@ -8,17 +9,36 @@ class EmailService:
         self.config = config
         self.repository_factory = RepositoryFactory(config)
         self.email_repo = self.repository_factory.get_repository(RepoType.EMAIL)
+        self.email_cache = get_email_cache()
 
     def save_email(self, email: Email):
         email = self.email_repo.save(email)
+        if self.email_cache is not None:
+            self.email_cache.set(email)
         return email
 
-    def get_email_by_email_address(self, email_address: str):
-        email = self.email_repo.get_one({'email': email_address})
+    def get_email_by_email_address(self, email_address: str, cache_missing: bool = False):
+        """
+        With `cache_missing` and a shared cache backend, unknown addresses are remembered for
+        NEGATIVE_EMAIL_CACHE_TTL seconds so repeated lookups (credential stuffing, forgot-password
+        spam) skip the database. Flows that create emails must not pass it.
+        """
+        load = lambda: self.email_repo.get_one({'email': email_address})
+        if self.email_cache is None:
+            return load()
+        if cache_missing and self.email_cache.is_known_absent(email_address):
+            return None
+
+        email = self.email_cache.get_by_address_or_load(email_address, load)
+        if email is None and cache_missing:
+            self.email_cache.remember_absent(email_address)
         return email
 
     def get_email_by_id(self, entity_id: str):
-        email = self.email_repo.get_one({'entity_id': entity_id})
+        load = lambda: self.email_repo.get_one({'entity_id': entity_id})
+        if self.email_cache is None:
+            return load()
+        email = self.email_cache.get_or_load(entity_id, load)
         return email
 
     def verify_email(self, email: Email) -> Email:
@@ -1,6 +1,7 @@
 import requests
 from common.app_config import config
 from common.app_logger import logger
+from common.metrics import OAUTH, timed
 import jwt
 
 
@@ -36,7 +37,8 @@ class OAuthClient:
         logger.info(f"Google OAuth token request data: {token_data}")
         
         try:
-            response = requests.post(token_url, data=token_data)
+            with timed(OAUTH):
+                response = requests.post(token_url, data=token_data)
             logger.info(f"Google OAuth response status: {response.status_code}")
             logger.info(f"Google OAuth response: {response.text}")
             
@@ -69,7 +71,8 @@ class OAuthClient:
             'Authorization': f'Bearer {access_token}'
         }
 
-        response = requests.get(userinfo_url, headers=headers)
+        with timed(OAUTH):
+            response = requests.get(userinfo_url, headers=headers)
         logger.info(response.json())
         response.raise_for_status()
         
@@ -93,7 +96,8 @@ class OAuthClient:
 
         logger.info(token_data)
 
-        response = requests.post(token_url, data=token_data)
+        with timed(OAUTH):
+            response = requests.post(token_url, data=token_data)
         logger.info(response.json())
         response.raise_for_status()
         return response.json()
@@ -113,7 +117,8 @@ class OAuthClient:
             'Authorization': f'Bearer {access_token}'
         }
 
-        response = requests.get(userinfo_url, headers=headers)
+        with timed(OAUTH):
+            response = requests.get(userinfo_url, headers=headers)
         logger.info(response.json())
         response.raise_for_status()
         
@@ -1,5 +1,7 @@
+from common.repositories.batch import get_one_each
 from common.repositories.factory import RepositoryFactory, RepoType
 from common.models import Organization
+from common.cache import get_organization_roles_cache
 
 
 class OrganizationService:
@@ -8,15 +10,30 @@ class OrganizationService:
         self.config = config
         self.repository_factory = RepositoryFactory(config)
         self.organization_repo = self.repository_factory.get_repository(RepoType.ORGANIZATION)
+        self.person_organization_role_repo = self.repository_factory.get_repository(RepoType.PERSON_ORGANIZATION_ROLE)
+        self.organization_roles_cache = get_organization_roles_cache()
 
     def save_organization(self, organization: Organization):
         organization = self.organization_repo.save(organization)
+        roles = self.person_organization_role_repo.get_many({"organization_id": organization.entity_id})
+        self.organization_roles_cache.invalidate_persons(role.person_id for role in roles)
         return organization
 
     def get_organization_by_id(self, entity_id: str):
         organization = self.organization_repo.get_one({"entity_id": entity_id})
         return organization
 
+    def get_organization_and_role_of_person(self, entity_id: str, person_id: str):
+        """
+        The organization and the person's role in it (either may be None), in one round trip.
+        """
+        return get_one_each(
+            (self.organization_repo, {"entity_id": entity_id}),
+            (self.person_organization_role_repo, {"person_id": person_id, "organization_id": entity_id}),
+        )
+
     def get_organizations_with_roles_by_person(self, person_id: str):
-        results = self.organization_repo.get_organizations_by_person_id(person_id)
+        results = self.organization_roles_cache.get_or_load(
+            person_id, lambda: self.organization_repo.get_organizations_by_person_id(person_id)
+        )
         return results
@@ -1,5 +1,6 @@
 from common.repositories.factory import RepositoryFactory, RepoType
 from common.models.person import Person
+from common.cache import get_person_cache
 
 
 class PersonService:
@@ -12,9 +13,12 @@ class PersonService:
 
         self.repository_factory = RepositoryFactory(config)
         self.person_repo = self.repository_factory.get_repository(RepoType.PERSON)
+        self.person_cache = get_person_cache()
 
     def save_person(self, person: Person):
         person = self.person_repo.save(person)
+        if self.person_cache is not None:
+            self.person_cache.set(person)
         return person
 
     def get_person_by_email_address(self, email_address: str):
@@ -22,11 +26,13 @@ class PersonService:
         if not email_obj:
             return
         
-        person = self.person_repo.get_one({"entity_id": email_obj.person_id})
-        return person
+        return self.get_person_by_id(email_obj.person_id)
 
     def get_person_by_id(self, entity_id: str):
-        person = self.person_repo.get_one({"entity_id": entity_id})
+        load = lambda: self.person_repo.get_one({"entity_id": entity_id})
+        if self.person_cache is None:
+            return load()
+        person = self.person_cache.get_or_load(entity_id, load)
         return person
 
     def update_person_name(self, person: Person, first_name: str, last_name: str):
@@ -1,5 +1,6 @@
 from common.repositories.factory import RepositoryFactory, RepoType
 from common.models import PersonOrganizationRole
+from common.cache import get_organization_roles_cache
 
 
 class PersonOrganizationRoleService:
@@ -11,6 +12,7 @@ class PersonOrganizationRoleService:
 
     def save_person_organization_role(self, person_organization_role: PersonOrganizationRole):
         person_organization_role = self.person_organization_role_repo.save(person_organization_role)
+        get_organization_roles_cache().invalidate_person(person_organization_role.person_id)
         return person_organization_role
 
     def get_roles_by_person_id(self, person_id: str):
@@ -1,5 +1,10 @@
+import time
+
+from common.cache import dump_models, get_cache_namespace, get_single_flight, load_models
 from common.repositories.factory import RepositoryFactory, RepoType
 from common.models.task import Task
+from common.app_logger import logger
+from common.tasks.task_events import TaskEvent, get_task_event_publisher
 
 
 class TaskService:
@@ -8,15 +13,57 @@ class TaskService:
         self.config = config
         self.repository_factory = RepositoryFactory(config)
         self.task_repo = self.repository_factory.get_repository(RepoType.TASK)
+        self.event_publisher = get_task_event_publisher()
+        self.task_list_flight = get_single_flight('task_list')
+        # Opt-in: task lists change often, so they are only cached when a TTL is configured.
+        self.task_list_cache = None
+        if int(config.TASK_LIST_CACHE_TTL) > 0:
+            self.task_list_cache = get_cache_namespace('task_list', int(config.TASK_LIST_CACHE_TTL))
+
+    @staticmethod
+    def _task_list_key(person_id: str, completed: bool = None) -> str:
+        return f"{person_id}:{completed}"
+
+    def _invalidate_task_lists(self, person_id: str):
+        for completed in (None, True, False):
+            key = self._task_list_key(person_id, completed)
+            self.task_list_flight.forget(key)
+            if self.task_list_cache is not None:
+                self.task_list_cache.invalidate(key)
+
+    def _publish_task_event(self, event: TaskEvent, task: Task):
+        self.event_publisher.publish(
+            task.person_id, event, {"task": task.as_dict(convert_datetime_to_iso_string=True)}
+        )
 
     def save_task(self, task: Task):
-        return self.task_repo.save(task)
+        # Tasks that were never saved have no previous version yet.
+        event = TaskEvent.CREATED if task.previous_version is None else TaskEvent.UPDATED
+        task = self.task_repo.save(task)
+        self._invalidate_task_lists(task.person_id)
+        self._publish_task_event(event, task)
+        return task
+
+    def set_task_completed(self, task: Task, completed: bool):
+        task.completed = completed
+        task = self.task_repo.save(task)
+        self._invalidate_task_lists(task.person_id)
+        self._publish_task_event(TaskEvent.COMPLETED if completed else TaskEvent.UNCOMPLETED, task)
+        return task
 
     def get_tasks_by_person_id(self, person_id: str, completed: bool = None):
         filters = {"person_id": person_id, "active": True}
         if completed is not None:
             filters["completed"] = completed
-        return self.task_repo.get_many(filters)
+
+        # Identical concurrent reads share one query; each caller decodes its own copy of the rows.
+        key = self._task_list_key(person_id, completed)
+        load = lambda: dump_models(self.task_repo.get_many(filters))
+        if self.task_list_cache is not None:
+            value = self.task_list_cache.get_or_load(key, load)
+        else:
+            value, _ = self.task_list_flight.do(key, load)
+        return load_models(Task, value)
 
     def get_task_by_id(self, task_id: str, person_id: str):
         task = self.task_repo.get_one({"entity_id": task_id, "person_id": person_id, "active": True})
@@ -24,4 +71,68 @@ class TaskService:
 
     def delete_task(self, task: Task):
         self.task_repo.delete(task)
+        self._invalidate_task_lists(task.person_id)
+        self._publish_task_event(TaskEvent.DELETED, task)
+
+    def import_tasks(self, person_id: str, rows) -> dict:
+        """
+        Bulk-create tasks for a person from parsed import rows.
+
+        Rows are validated one at a time and loaded with `COPY` every `TASK_IMPORT_CHUNK_SIZE`
+        accepted rows, so memory use stays bounded regardless of the size of the import. The
+        chunks share one transaction: an import that fails part way (e.g. the connection drops)
+        raises and leaves no tasks behind.
+
+        Args:
+            person_id: Owner of the imported tasks
+            rows: Iterable of `(line_number, row, error)` tuples from `iter_task_import_rows`
+
+        Returns:
+            dict: Accepted/rejected counts, the first rejected rows and the import throughput
+        """
+        chunk_size = int(self.config.TASK_IMPORT_CHUNK_SIZE)
+        max_reported_errors = int(self.config.TASK_IMPORT_MAX_REPORTED_ERRORS)
+
+        rejected, errors = 0, []
+        started = time.perf_counter()
+
+        def chunks():
+            nonlocal rejected
+            chunk = []
+            for line_number, row, error in rows:
+                if error is None:
+                    task = Task(person_id=person_id, title=row['title'], completed=row['completed'])
+                    error = task.validate_title()
+
+                if error is not None:
+                    rejected += 1
+                    if len(errors) < max_reported_errors:
+                        errors.append({'line': line_number, 'error': error})
+                    continue
+
+                chunk.append(task)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+            yield chunk
+
+        accepted = self.task_repo.copy_tasks(chunks())
+
+        if accepted:
+            self._invalidate_task_lists(person_id)
+            self.event_publisher.publish(person_id, TaskEvent.IMPORTED, {"count": accepted})
+
+        elapsed = time.perf_counter() - started
+        rows_per_second = round((accepted + rejected) / elapsed, 1) if elapsed > 0 else None
+        logger.info(
+            f"Imported tasks for person {person_id}: accepted={accepted} rejected={rejected} "
+            f"elapsed={elapsed:.3f}s rows_per_second={rows_per_second}"
+        )
 
+        return {
+            'accepted': accepted,
+            'rejected': rejected,
+            'errors': errors,
+            'elapsed_seconds': round(elapsed, 3),
+            'rows_per_second': rows_per_second,
+        }
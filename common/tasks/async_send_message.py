@@ -0,0 +1,85 @@
+import asyncio
+import json
+from typing import Optional
+
+import aio_pika
+
+from common.app_config import config
+from common.app_logger import logger
+from common.metrics import RABBITMQ, timed
+
+
+def get_connection_url() -> str:
+    virtual_host = config.RABBITMQ_VIRTUAL_HOST.lstrip('/')
+    return (
+        f"amqp://{config.RABBITMQ_USER}:{config.RABBITMQ_PASSWORD}"
+        f"@{config.RABBITMQ_HOST}:{config.RABBITMQ_PORT}/{virtual_host}"
+    )
+
+
+class AsyncMessageSender:
+    """
+    Async counterpart of `MessageSender` sharing one robust (auto-reconnecting) connection
+    and channel per event loop instead of connecting for every message.
+    """
+
+    def __init__(self):
+        self._connection: Optional[aio_pika.abc.AbstractRobustConnection] = None
+        self._channel: Optional[aio_pika.abc.AbstractChannel] = None
+        self._exchanges = {}
+        self._lock = asyncio.Lock()
+
+    async def connect(self):
+        async with self._lock:
+            if self._connection is None or self._connection.is_closed:
+                self._connection = await aio_pika.connect_robust(get_connection_url())
+                self._channel = await self._connection.channel()
+                self._exchanges = {}
+        return self._channel
+
+    async def close(self):
+        if self._connection is not None:
+            await self._connection.close()
+        self._connection = None
+        self._channel = None
+        self._exchanges = {}
+
+    async def get_topic_exchange(self, exchange_name: str) -> aio_pika.abc.AbstractExchange:
+        channel = await self.connect()
+        if exchange_name not in self._exchanges:
+            self._exchanges[exchange_name] = await channel.declare_exchange(
+                exchange_name, aio_pika.ExchangeType.TOPIC, durable=True
+            )
+        return self._exchanges[exchange_name]
+
+    async def send_message(self, queue_name: str, data: dict) -> None:
+        """
+        Sends a persistent message to the specified RabbitMQ queue.
+
+        :param queue_name: Name of the RabbitMQ queue to send the message to.
+        :param data: The data to send to the queue as a dictionary.
+        :return: None
+        """
+        with timed(RABBITMQ):
+            channel = await self.connect()
+            await channel.declare_queue(queue_name, durable=True)
+            await channel.default_exchange.publish(
+                aio_pika.Message(body=json.dumps(data).encode(), delivery_mode=aio_pika.DeliveryMode.PERSISTENT),
+                routing_key=queue_name,
+            )
+        logger.info(f"Sent message to queue: {queue_name}")
+
+    async def publish(self, exchange_name: str, routing_key: str, data: dict) -> None:
+        """
+        Publishes a transient JSON message to a topic exchange.
+        """
+        with timed(RABBITMQ):
+            exchange = await self.get_topic_exchange(exchange_name)
+            await exchange.publish(
+                aio_pika.Message(
+                    body=json.dumps(data, default=str).encode(),
+                    content_type='application/json',
+                    delivery_mode=aio_pika.DeliveryMode.NOT_PERSISTENT,
+                ),
+                routing_key=routing_key,
+            )
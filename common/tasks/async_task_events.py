@@ -0,0 +1,113 @@
+import asyncio
+import json
+from typing import Optional
+
+from common.app_config import config
+from common.app_logger import logger
+from common.tasks.async_send_message import AsyncMessageSender
+from common.tasks.task_events import TaskEvent, get_routing_key
+
+
+class AsyncTaskEventPublisher:
+    """
+    Async counterpart of `TaskEventPublisher`; failures are logged and never fail the write.
+    """
+
+    def __init__(self, message_sender: AsyncMessageSender):
+        self.message_sender = message_sender
+        self.exchange_name = config.TASK_EVENTS_EXCHANGE_NAME
+
+    async def publish(self, person_id: str, event: TaskEvent, data: dict) -> None:
+        try:
+            await self.message_sender.publish(
+                self.exchange_name, get_routing_key(person_id, event.value), {"event": event.value, **data}
+            )
+        except Exception as e:
+            logger.warning(f"Could not publish task event {event.value} for person {person_id}: {e}")
+
+
+class AsyncTaskEventBroker:
+    """
+    Fans task events out to `asyncio.Queue` subscribers on the event loop, through one exclusive
+    queue per process that is bound per subscribed person.
+
+    Idle subscribers are plain awaiting coroutines, so an open stream costs neither a thread
+    nor a database connection. The queue is only consumed while someone is subscribed: the last
+    unsubscribe cancels the consumer, which deletes the auto-deleted queue and its bindings.
+    """
+
+    def __init__(self, message_sender: AsyncMessageSender, max_subscribers: int):
+        self.message_sender = message_sender
+        self.exchange_name = config.TASK_EVENTS_EXCHANGE_NAME
+        self.max_subscribers = max_subscribers
+
+        self._subscribers = {}  # person_id -> set of asyncio.Queue
+        self._subscriber_count = 0
+        self._queue = None
+        self._consumer_tag = None
+        self._exchange = None
+        self._lock = asyncio.Lock()
+
+    async def _get_queue(self):
+        if self._queue is None:
+            channel = await self.message_sender.connect()
+            self._exchange = await self.message_sender.get_topic_exchange(self.exchange_name)
+            self._queue = await channel.declare_queue(exclusive=True, auto_delete=True)
+            self._consumer_tag = await self._queue.consume(self._on_message, no_ack=True)
+        return self._queue
+
+    async def _release_queue(self):
+        event_queue, consumer_tag = self._queue, self._consumer_tag
+        self._queue = self._consumer_tag = None
+        try:
+            await event_queue.cancel(consumer_tag)
+        except Exception as e:
+            logger.warning(f"Could not stop consuming task events: {e}")
+
+    async def subscribe(self, person_id: str) -> Optional[asyncio.Queue]:
+        async with self._lock:
+            if self._subscriber_count >= self.max_subscribers:
+                return None
+
+            event_queue = await self._get_queue()
+            if person_id not in self._subscribers:
+                await event_queue.bind(self._exchange, routing_key=get_routing_key(person_id))
+
+            subscription = asyncio.Queue(maxsize=100)
+            self._subscribers.setdefault(person_id, set()).add(subscription)
+            self._subscriber_count += 1
+        return subscription
+
+    async def unsubscribe(self, person_id: str, subscription: asyncio.Queue) -> None:
+        async with self._lock:
+            subscriptions = self._subscribers.get(person_id)
+            if not subscriptions or subscription not in subscriptions:
+                return
+
+            subscriptions.discard(subscription)
+            self._subscriber_count -= 1
+            if subscriptions:
+                return
+
+            del self._subscribers[person_id]
+            if not self._subscribers:
+                await self._release_queue()
+                return
+            try:
+                await self._queue.unbind(self._exchange, routing_key=get_routing_key(person_id))
+            except Exception as e:
+                logger.warning(f"Could not unbind task events for person {person_id}: {e}")
+
+    async def _on_message(self, message):
+        try:
+            event = json.loads(message.body)
+        except ValueError:
+            logger.warning(f"Discarding malformed task event with routing key {message.routing_key}")
+            return
+
+        person_id = message.routing_key.split('.')[1]
+        for subscription in list(self._subscribers.get(person_id, ())):
+            try:
+                subscription.put_nowait(event)
+            except asyncio.QueueFull:
+                logger.warning(f"Dropping task event for slow subscriber of person {person_id}")
@@ -1,10 +1,14 @@
 import pika
 import json
+import queue
+import threading
 import time
+from contextlib import contextmanager
 from pika.exchange_type import ExchangeType
 
 from common.app_config import config
 from common.app_logger import logger
+from common.metrics import RABBITMQ, timed
 
 
 def get_connection_parameters() -> pika.ConnectionParameters:
@@ -45,26 +49,80 @@ class MessageSender:
         :param data: The data to send to the queue as a dictionary.
         :return: None
         """
-        connection = establish_connection(self.parameters)
+        # A connection is opened per message, so connecting counts as publish time.
+        with timed(RABBITMQ):
+            connection = establish_connection(self.parameters)
 
-        with connection:
-            channel = connection.channel()
+            with connection:
+                channel = connection.channel()
 
-            if properties is None:
-                properties = pika.BasicProperties(
-                    delivery_mode=2,  # Make the message persistent
+                if properties is None:
+                    properties = pika.BasicProperties(
+                        delivery_mode=2,  # Make the message persistent
+                    )
+
+                if exchange_name is None:
+                    exchange_name = ""
+                else:
+                    channel.exchange_declare(exchange=exchange_name, exchange_type=ExchangeType.topic.value, durable=True)
+
+                channel.queue_declare(queue=queue_name, durable=True)
+                channel.basic_publish(
+                    exchange=exchange_name,
+                    routing_key=queue_name,
+                    body=json.dumps(data).encode(),
+                    properties=properties,
                 )
+                logger.info(f"Sent message to queue: {queue_name}")
+
+
+class ConnectionPool:
+    """
+    A bounded pool of long-lived RabbitMQ connections for high-frequency publishing.
+
+    `pika.BlockingConnection` is not thread-safe, so each connection (and its cached channel)
+    is used by one thread at a time. Connections that fail are discarded and replaced.
+    """
+
+    def __init__(self, parameters: pika.ConnectionParameters, max_connections: int):
+        self.parameters = parameters
+        self.max_connections = max_connections
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._idle = queue.LifoQueue()
+
+    def _checkout(self):
+        while True:
+            try:
+                connection, channel = self._idle.get_nowait()
+            except queue.Empty:
+                connection = establish_connection(self.parameters, max_retries=1)
+                return connection, connection.channel()
+
+            try:
+                # Services heartbeats that were missed while the connection sat idle.
+                connection.process_data_events(time_limit=0)
+                if connection.is_open and channel.is_open:
+                    return connection, channel
+            except Exception:
+                pass
+            self._close(connection)
+
+    @staticmethod
+    def _close(connection):
+        try:
+            if connection.is_open:
+                connection.close()
+        except Exception:
+            pass
 
-            if exchange_name is None:
-                exchange_name = ""
+    @contextmanager
+    def channel(self):
+        with self._slots:
+            connection, channel = self._checkout()
+            try:
+                yield channel
+            except Exception:
+                self._close(connection)
+                raise
             else:
-                channel.exchange_declare(exchange=exchange_name, exchange_type=ExchangeType.topic.value, durable=True)
-
-            channel.queue_declare(queue=queue_name, durable=True)
-            channel.basic_publish(
-                exchange=exchange_name,
-                routing_key=queue_name,
-                body=json.dumps(data).encode(),
-                properties=properties,
-            )
-            logger.info(f"Sent message to queue: {queue_name}")
+                self._idle.put((connection, channel))
@@ -0,0 +1,72 @@
+import json
+import threading
+from enum import Enum
+
+import pika
+from pika.exchange_type import ExchangeType
+
+from common.app_config import config
+from common.app_logger import logger
+from common.metrics import RABBITMQ, timed
+from common.tasks.send_message import ConnectionPool, get_connection_parameters
+
+
+class TaskEvent(str, Enum):
+    CREATED = "created"
+    UPDATED = "updated"
+    COMPLETED = "completed"
+    UNCOMPLETED = "uncompleted"
+    DELETED = "deleted"
+    IMPORTED = "imported"
+
+    def __repr__(self):
+        return str(self.value)
+
+
+def get_routing_key(person_id: str, event: str = '*') -> str:
+    return f"task.{person_id}.{event}"
+
+
+class TaskEventPublisher:
+    """
+    Publishes task change events to the task events topic exchange.
+
+    Events are fire-and-forget notifications for connected clients: a failed publish is logged
+    and never fails the write that triggered it.
+    """
+
+    def __init__(self):
+        self.exchange_name = config.TASK_EVENTS_EXCHANGE_NAME
+        self.pool = ConnectionPool(get_connection_parameters(), int(config.RABBITMQ_POOL_MAX_CONNECTIONS))
+
+    def publish(self, person_id: str, event: TaskEvent, data: dict) -> None:
+        message = {"event": event.value, **data}
+        try:
+            with timed(RABBITMQ), self.pool.channel() as channel:
+                # Marked on the channel itself, so a replacement channel declares the exchange again.
+                if not getattr(channel, 'task_events_exchange_declared', False):
+                    channel.exchange_declare(
+                        exchange=self.exchange_name, exchange_type=ExchangeType.topic.value, durable=True
+                    )
+                    channel.task_events_exchange_declared = True
+
+                channel.basic_publish(
+                    exchange=self.exchange_name,
+                    routing_key=get_routing_key(person_id, event.value),
+                    body=json.dumps(message, default=str).encode(),
+                    properties=pika.BasicProperties(content_type='application/json', delivery_mode=1),
+                )
+        except Exception as e:
+            logger.warning(f"Could not publish task event {event.value} for person {person_id}: {e}")
+
+
+_publisher = None
+_singleton_lock = threading.Lock()
+
+
+def get_task_event_publisher() -> TaskEventPublisher:
+    global _publisher
+    with _singleton_lock:
+        if _publisher is None:
+            _publisher = TaskEventPublisher()
+        return _publisher
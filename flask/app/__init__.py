@@ -7,6 +7,11 @@ from rococo.plugins.pooled_connection import PooledConnectionPlugin
 from rococo.models.versioned_model import ModelValidationError
 
 from common.helpers.exceptions import InputValidationError, APIException
+from app.helpers.compression import init_compression
+from app.helpers.metrics import init_metrics
+from app.helpers.openapi import init_precomputed_spec
+from app.helpers.pool import init_pool
+from app.helpers.traffic_capture import init_traffic_capture
 
 from common.app_config import get_config
 from common.utils.version import get_service_version, get_project_name
@@ -52,6 +57,12 @@ def create_app():
     api.init_app(app)
 
     PooledConnectionPlugin(app, database_type="postgres")
+    init_metrics(app)
+    init_pool(app)
+
+    init_compression(app)
+    init_traffic_capture(app)
+    init_precomputed_spec(app, api)
 
     @app.route('/')
     def hello_world():
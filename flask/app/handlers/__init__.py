@@ -0,0 +1 @@
+from .base import HandlerResponse, AwaitableMethods, authenticate, run_sync
@@ -0,0 +1,53 @@
+"""
+Auth route handlers shared by the Flask views (app/views/auth.py) and the native ASGI routes
+(asgi.py).
+"""
+from app.handlers.base import HandlerResponse
+from app.helpers.response import parse_json_body, validate_required_fields
+
+
+async def exchange_oauth_code(oauth_client, login_user_by_oauth, provider: str, body: bytes):
+    """
+    Exchange an OAuth authorization code for an access token and the user's info, then log the
+    user in (creating the account on a first login).
+
+    Args:
+        oauth_client: `AsyncOAuthClient`, or `OAuthClient` in `AwaitableMethods`
+        login_user_by_oauth: Awaitable `AuthService.login_user_by_oauth`
+        provider: OAuth provider (google, microsoft)
+        body: The raw request body
+    """
+    parsed_body = parse_json_body(body, ['code', 'redirect_uri', 'code_verifier'])
+    validate_required_fields(parsed_body)
+
+    try:
+        # Token exchange + user info retrieval
+        if provider == "google":
+            token_response = await oauth_client.get_google_token(
+                parsed_body['code'], parsed_body['redirect_uri'], parsed_body['code_verifier']
+            )
+            user_info = await oauth_client.get_google_user_info(token_response['access_token'])
+        elif provider == "microsoft":
+            token_response = await oauth_client.get_microsoft_token(
+                parsed_body['code'], parsed_body['redirect_uri'], parsed_body['code_verifier']
+            )
+            user_info = await oauth_client.get_microsoft_user_info(token_response['access_token'])
+        else:
+            return HandlerResponse.failure(message=f"Unsupported provider: {provider}")
+
+        email = user_info.get('email')
+        name = user_info.get('name', '')
+        if not email:
+            return HandlerResponse.failure(message=f"{provider.capitalize()} user info does not contain email.")
+
+        name_parts = name.split(' ', 1)
+        first_name, last_name = name_parts[0], name_parts[1] if len(name_parts) > 1 else ""
+
+        # Login or create user
+        access_token, expiry, person = await login_user_by_oauth(
+            email, first_name, last_name, provider=provider, provider_data=user_info
+        )
+        return HandlerResponse.success(person=person.as_dict(), access_token=access_token, expiry=expiry)
+
+    except Exception as e:
+        return HandlerResponse.failure(message=f"OAuth authentication failed: {str(e)}")
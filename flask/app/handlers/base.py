@@ -0,0 +1,65 @@
+from dataclasses import dataclass, field
+from typing import Optional, Tuple
+
+from common.helpers.auth import parse_access_token
+
+
+@dataclass
+class HandlerResponse:
+    """
+    What a shared handler answers, serialized by each serving mode with its own response class.
+    """
+    data: dict
+    status_code: int = 200
+    headers: dict = field(default_factory=dict)
+
+    @classmethod
+    def success(cls, status_code=200, **data):
+        return cls(dict(success=True, **data), status_code)
+
+    @classmethod
+    def failure(cls, message, status_code=200, headers=None):
+        return cls(dict(success=False, message=message), status_code, headers or {})
+
+
+def authenticate(authorization: Optional[str]) -> Tuple[Optional[dict], Optional[HandlerResponse]]:
+    """
+    Returns the parsed bearer token, or the 401 response to send instead.
+    """
+    if authorization is None:
+        return None, HandlerResponse.failure("Authorization header not present", status_code=401)
+
+    parsed_token = parse_access_token(str(authorization).replace('Bearer ', ''))
+    if not parsed_token:
+        return None, HandlerResponse.failure('Access token is invalid', status_code=401)
+    return parsed_token, None
+
+
+class AwaitableMethods:
+    """
+    Gives a sync service the awaitable methods of its async counterpart, so the Flask views can
+    run the shared handlers with `run_sync`. The calls block, they never suspend.
+    """
+
+    def __init__(self, service):
+        self.service = service
+
+    def __getattr__(self, name):
+        method = getattr(self.service, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+
+        return call
+
+
+def run_sync(coroutine):
+    """
+    Runs a handler that only awaits `AwaitableMethods` calls to completion, without an event loop.
+    """
+    try:
+        coroutine.send(None)
+    except StopIteration as stop:
+        return stop.value
+    coroutine.close()
+    raise RuntimeError("A handler run with run_sync awaited something that suspends.")
@@ -0,0 +1,66 @@
+"""
+Task route handlers shared by the Flask views (app/views/task.py) and the native ASGI routes
+(asgi.py). `task_service` is an `AsyncTaskService`, or a `TaskService` in `AwaitableMethods`.
+"""
+from app.handlers.base import HandlerResponse
+from app.helpers.response import parse_json_body, validate_required_fields
+from common.app_logger import logger
+from common.models.task import Task
+
+
+async def list_tasks(task_service, person, filter_type: str):
+    completed = None
+    if filter_type == 'active':
+        completed = False
+    elif filter_type == 'completed':
+        completed = True
+
+    tasks = await task_service.get_tasks_by_person_id(person.entity_id, completed)
+    return HandlerResponse.success(tasks=[task.as_dict() for task in tasks])
+
+
+async def create_task(task_service, person, body: bytes):
+    try:
+        parsed_body = parse_json_body(body, ['title'])
+        validate_required_fields(parsed_body)
+
+        task = Task(person_id=person.entity_id, title=parsed_body['title'], completed=False)
+        task = await task_service.save_task(task)
+        return HandlerResponse.success(task=task.as_dict(), message="Task created successfully.")
+    except Exception as e:
+        logger.exception(e)
+        return HandlerResponse.failure(message=f"Error creating task: {str(e)}")
+
+
+async def update_task(task_service, person, task_id: str, body: bytes):
+    parsed_body = parse_json_body(body, ['title'])
+    validate_required_fields(parsed_body)
+
+    task = await task_service.get_task_by_id(task_id, person.entity_id)
+    if not task:
+        return HandlerResponse.failure(message="Task not found.")
+
+    task.title = parsed_body['title']
+    task = await task_service.save_task(task)
+    return HandlerResponse.success(task=task.as_dict(), message="Task updated successfully.")
+
+
+async def delete_task(task_service, person, task_id: str):
+    task = await task_service.get_task_by_id(task_id, person.entity_id)
+    if not task:
+        return HandlerResponse.failure(message="Task not found.")
+
+    await task_service.delete_task(task)
+    return HandlerResponse.success(message="Task deleted successfully.")
+
+
+async def complete_task(task_service, person, task_id: str, body: bytes):
+    parsed_body = parse_json_body(body, ['completed'])
+    validate_required_fields(parsed_body)
+
+    task = await task_service.get_task_by_id(task_id, person.entity_id)
+    if not task:
+        return HandlerResponse.failure(message="Task not found.")
+
+    task = await task_service.set_task_completed(task, parsed_body['completed'])
+    return HandlerResponse.success(task=task.as_dict(), message="Task updated successfully.")
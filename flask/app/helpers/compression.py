@@ -0,0 +1,75 @@
+import gzip
+
+from flask import request
+
+from common.app_config import config
+
+try:
+    import brotli
+except ImportError:  # the optional compression dependency group; gzip is always available
+    brotli = None
+
+
+def get_compressible_mimetypes():
+    return {mimetype.strip() for mimetype in config.COMPRESSION_MIMETYPES.split(',') if mimetype.strip()}
+
+
+def get_supported_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(data, quality=config.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=config.COMPRESSION_LEVEL, mtime=0)
+
+
+def choose_encoding(accept_encodings, available=None):
+    """
+    Returns the supported encoding the client prefers, or None for an uncompressed response.
+    """
+    available = available or get_supported_encodings()
+    candidates = [(accept_encodings[encoding], encoding) for encoding in available if accept_encodings[encoding] > 0]
+    if not candidates:
+        return None
+    # Highest quality wins; on a tie the server preference order (brotli first) decides.
+    return max(candidates, key=lambda candidate: candidate[0])[1]
+
+
+def add_vary_accept_encoding(response):
+    if 'accept-encoding' not in response.vary:
+        response.vary.add('Accept-Encoding')
+
+
+def compress_response(response):
+    """
+    `after_request` hook compressing buffered responses of an allowed content type and size.
+    Streamed responses (e.g. the task events stream) are left untouched.
+    """
+    if response.direct_passthrough or response.is_streamed:
+        return response
+    if response.status_code < 200 or response.status_code in (204, 206, 304):
+        return response
+    if 'Content-Encoding' in response.headers or response.mimetype not in get_compressible_mimetypes():
+        return response
+
+    data = response.get_data()
+    if len(data) < config.COMPRESSION_MIN_SIZE:
+        return response
+
+    add_vary_accept_encoding(response)
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    response.set_data(compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        # A strong validator must differ between representations.
+        response.set_etag(f"{etag}-{encoding}")
+    return response
+
+
+def init_compression(app):
+    app.after_request(compress_response)
@@ -2,29 +2,25 @@ from functools import wraps
 from flask import request
 from flask import g, abort
 
-from app.helpers.response import get_failure_response
+from app.handlers import authenticate
+from app.helpers.response import get_failure_response, get_handler_response
 from inspect import signature
 from common.app_logger import logger
 from common.app_config import config
 
-from common.services import OrganizationService, PersonOrganizationRoleService
-from common.helpers.auth import parse_access_token, create_person_from_token, create_email_from_token
+from common.services import OrganizationService
+from common.helpers.auth import create_person_from_token, create_email_from_token
 
 
 def login_required():
     def decorator(func):
         @wraps(func)
         def wrapper(self, *args, **kwargs):
-            if 'Authorization' not in request.headers:
-                return get_failure_response(message="Authorization header not present", status_code=401)
-
-            data = request.headers['Authorization']
-            token = str.replace(str(data), 'Bearer ', '')
             try:
-                parsed_token = parse_access_token(token)
+                parsed_token, failure = authenticate(request.headers.get('Authorization'))
 
-                if not parsed_token:
-                    return get_failure_response(message='Access token is invalid', status_code=401)
+                if failure is not None:
+                    return get_handler_response(failure)
 
                 person = create_person_from_token(parsed_token)
                 email = create_email_from_token(parsed_token)
@@ -67,17 +63,14 @@ def organization_required(with_roles=None):
                 raise Exception("organization_required decorator should be used after login_required decorator.")
 
             organization_service = OrganizationService(config)
-            person_organization_role_service = PersonOrganizationRoleService(config)
 
             organization_id = request.headers['x-organization-id']
-            organization = organization_service.get_organization_by_id(organization_id)
+            organization, person_organization_role = organization_service.get_organization_and_role_of_person(
+                organization_id, person.entity_id
+            )
             if not organization:
                 return get_failure_response(message='Organization ID is invalid', status_code=403)
 
-            person_organization_role = person_organization_role_service.get_role_of_person_in_organization(
-                person_id=person.entity_id,
-                organization_id=organization.entity_id
-            )
             if not person_organization_role:
                 return get_failure_response(message="User is not authorized to use this organization.", status_code=401)
 
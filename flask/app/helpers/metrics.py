@@ -0,0 +1,89 @@
+import hmac
+
+from flask import Response, g, request
+
+from common.app_config import config
+from common.metrics import SnapshotWriter, finish_request, register_pool, registry, render_metrics, start_request
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_snapshot_writer = None
+
+
+def get_endpoint() -> str:
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+
+def start_request_metrics():
+    g.metrics_token = start_request(endpoint=get_endpoint())
+
+
+def record_response_status(response):
+    g.metrics_status = response.status_code
+    return response
+
+
+def finish_request_metrics(exception=None):
+    token = g.pop('metrics_token', None)
+    if token is None:
+        return
+    status = g.pop('metrics_status', 500 if exception is not None else 200)
+    finish_request(token, request.method, get_endpoint(), status)
+
+
+def get_pooled_db_stats(pooled_db):
+    def get_stats():
+        pool = pooled_db.pool
+        return {
+            'in_use': getattr(pool, '_connections', None),
+            'idle': len(getattr(pool, '_idle_cache', ())),
+            'max': getattr(pool, '_maxconnections', None) or None,
+        }
+    return get_stats
+
+
+def is_authorized(open_without_token: bool = True) -> bool:
+    """
+    Whether the request carries METRICS_TOKEN as its bearer token. When none is set, every
+    request is, unless `open_without_token` is False.
+    """
+    if not config.METRICS_TOKEN:
+        return open_without_token
+    token = request.headers.get('Authorization', '').replace('Bearer ', '')
+    return hmac.compare_digest(token, config.METRICS_TOKEN)
+
+
+def metrics():
+    if not is_authorized():
+        return Response('Unauthorized\n', status=401, content_type='text/plain')
+    return Response(render_metrics(registry, config.METRICS_DIR), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+def init_metrics(app):
+    """
+    Records latency, CPU time and dependency time per endpoint and serves them at /metrics.
+    Must be called after the pooled connection plugin is registered.
+    """
+    global _snapshot_writer
+    if not config.METRICS_ENABLED:
+        return
+
+    app.before_request(start_request_metrics)
+    app.after_request(record_response_status)
+    app.teardown_request(finish_request_metrics)
+    app.add_url_rule('/metrics', 'metrics', metrics)
+
+    pooled_db = app.extensions.get('pooled_db')
+    if pooled_db is not None:
+        register_pool('sync', get_pooled_db_stats(pooled_db))
+
+    if config.METRICS_DIR and _snapshot_writer is None:
+        _snapshot_writer = SnapshotWriter(registry, config.METRICS_DIR, config.METRICS_SNAPSHOT_INTERVAL).start()
+
+
+def close_metrics():
+    """
+    Writes the final snapshot of this worker, so its counters survive its exit.
+    """
+    if _snapshot_writer is not None:
+        _snapshot_writer.close()
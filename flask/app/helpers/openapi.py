@@ -0,0 +1,46 @@
+import hashlib
+import json
+
+from flask import request
+
+from app.helpers.compression import add_vary_accept_encoding, choose_encoding, compress, get_supported_encodings
+from common.app_config import config
+
+
+class PrecomputedSpec:
+    """
+    The OpenAPI document rendered once, with its compressed variants, served from memory
+    instead of being serialized by flask-restx on every request.
+    """
+
+    def __init__(self, app, api):
+        with app.test_request_context():
+            schema = api.__schema__
+
+        self.app = app
+        self.body = json.dumps(schema, separators=(',', ':'), sort_keys=True).encode()
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+        self.variants = {encoding: compress(self.body, encoding) for encoding in get_supported_encodings()}
+
+    def view(self):
+        encoding = choose_encoding(request.accept_encodings, available=tuple(self.variants))
+        body = self.variants[encoding] if encoding else self.body
+
+        response = self.app.response_class(body, mimetype='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.set_etag(f"{self.etag}-{encoding}" if encoding else self.etag)
+        response.cache_control.public = True
+        response.cache_control.max_age = config.OPENAPI_CACHE_MAX_AGE
+        add_vary_accept_encoding(response)
+        return response.make_conditional(request)
+
+
+def init_precomputed_spec(app, api):
+    """
+    Replaces the flask-restx `swagger.json` view with the precomputed document.
+    Must run after `api.init_app(app)` and after every namespace has been added.
+    """
+    spec = PrecomputedSpec(app, api)
+    app.view_functions['specs'] = spec.view
+    return spec
@@ -0,0 +1,87 @@
+import os
+import time
+
+from flask import Response
+
+from app.helpers.metrics import is_authorized
+from app.helpers.response import get_success_response
+from common.app_config import config
+from common.app_logger import logger
+from common.metrics import get_checkout_window, get_pool_stats
+from common.repositories.pools import (
+    PooledDbResizer, PoolSizer, advise, get_pooled_db_counts, open_idle_connections, sizers, summarize_waits,
+)
+
+_resizer = None
+
+
+def get_sync_pool_bounds():
+    """
+    The minimum and maximum connections of this process's sync pool; without a configured maximum
+    (outside the launcher) the server's connection budget bounds it.
+    """
+    maximum = config.POSTGRES_POOL_MAX_CONNECTIONS or (
+        config.POSTGRES_MAX_CONNECTIONS - config.POSTGRES_RESERVED_CONNECTIONS
+    )
+    return min(config.POSTGRES_POOL_MIN_CONNECTIONS, maximum), maximum
+
+
+def get_pool_bounds(name: str):
+    if name == 'async':
+        return config.POSTGRES_ASYNC_POOL_MIN_SIZE, config.POSTGRES_ASYNC_POOL_MAX_SIZE
+    return get_sync_pool_bounds()
+
+
+def warm_up(pool, minimum: int):
+    in_use, idle = get_pooled_db_counts(pool)
+    if in_use + idle < minimum:
+        open_idle_connections(pool, minimum - in_use)
+        in_use, idle = get_pooled_db_counts(pool)
+        logger.info(f"Opened {in_use + idle} of {minimum} database connections before serving")
+
+
+def pool_report():
+    # Pool internals are never public: without a METRICS_TOKEN nobody is authorized.
+    if not is_authorized(open_without_token=False):
+        return Response('Unauthorized\n', status=401, content_type='text/plain')
+
+    target_wait = config.POSTGRES_POOL_ADAPTIVE_TARGET_WAIT_MS / 1000
+    since = time.monotonic() - config.POSTGRES_POOL_REPORT_WINDOW
+    pools = {}
+    for name, stats in get_pool_stats().items():
+        waits = get_checkout_window(name).waits_since(since)
+        minimum, maximum = get_pool_bounds(name)
+        sizer = sizers.get(name)
+        pools[name] = {
+            **stats,
+            'minimum': minimum,
+            'checkout_waits': summarize_waits(waits),
+            'adaptive': sizer.describe() if sizer is not None else None,
+            'advice': advise(stats, waits, target_wait, minimum),
+        }
+    return get_success_response(pid=os.getpid(), window_seconds=config.POSTGRES_POOL_REPORT_WINDOW, pools=pools)
+
+
+def init_pool(app):
+    """
+    Opens and validates POSTGRES_POOL_MIN_CONNECTIONS connections of the pooled connection plugin
+    before the app serves, starts the adaptive sizing when POSTGRES_POOL_ADAPTIVE is set, and
+    serves the connection counts and checkout waits of this process's pools at /admin/pool
+    (only to requests carrying METRICS_TOKEN, so it answers 401 while none is set). Must be called
+    after the plugin is registered.
+    """
+    global _resizer
+    app.add_url_rule('/admin/pool', 'pool_report', pool_report)
+
+    pooled_db = app.extensions.get('pooled_db')
+    if pooled_db is None:
+        return
+    minimum, maximum = get_sync_pool_bounds()
+    warm_up(pooled_db.pool, minimum)
+
+    if config.POSTGRES_POOL_ADAPTIVE and _resizer is None:
+        sizer = sizers['sync'] = PoolSizer(
+            minimum, maximum, config.POSTGRES_POOL_ADAPTIVE_TARGET_WAIT_MS / 1000, config.POSTGRES_POOL_ADAPTIVE_STEP
+        )
+        _resizer = PooledDbResizer(pooled_db.pool, sizer, config.POSTGRES_POOL_ADAPTIVE_INTERVAL)
+        _resizer.start()
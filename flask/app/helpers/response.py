@@ -1,15 +1,30 @@
-from flask import current_app as app
+import hashlib
+import json
+
+from flask import current_app as app, request
+from werkzeug.exceptions import BadRequest
 from common.helpers.exceptions import InputValidationError
 
 
-def parse_request_body(request, keys, default_value=None):
+def parse_json_body(body: bytes, keys, default_value=None):
+    """
+    Parses a raw JSON request body the way `request.get_json(force=True)` does outside debug
+    mode, so both serving modes report a malformed body alike.
+    """
     try:
-        request_body = request.get_json(force=True)
+        try:
+            request_body = json.loads(body)
+        except ValueError:
+            raise BadRequest()
         return {key: request_body.get(key, default_value) for key in keys}
     except Exception as e:
         raise InputValidationError(f"Error parsing request body: {str(e)}")
 
 
+def parse_request_body(request, keys, default_value=None):
+    return parse_json_body(request.get_data(), keys, default_value)
+
+
 def validate_required_fields(required_fields):
     for field, value in required_fields.items():
         if value is None:
@@ -37,3 +52,33 @@ def get_failure_response(message, status_code=200):
 def get_success_response(status_code=200, **data):
     response = _get_response(dict(success=True, **data), status_code)
     return response
+
+
+def get_handler_response(result):
+    """
+    Serializes the `HandlerResponse` of a shared handler (see app/handlers).
+    """
+    response = _get_response(result.data, result.status_code)
+    response.headers.extend(result.headers)
+    return response
+
+
+def make_private_conditional(response):
+    """
+    Marks a per-user response as cacheable by the browser only, to be revalidated on every use,
+    and answers a matching If-None-Match with 304 Not Modified.
+    """
+    etag = hashlib.sha256(response.get_data()).hexdigest()[:32]
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response.vary.add('Authorization')
+
+    # Compressed representations carry an encoding-suffixed ETag (see helpers/compression.py).
+    if any(tag == etag or tag.startswith(f"{etag}-") for tag in request.if_none_match.as_set()):
+        not_modified = app.response_class(status=304)
+        not_modified.set_etag(etag)
+        not_modified.headers['Cache-Control'] = response.headers['Cache-Control']
+        not_modified.headers['Vary'] = response.headers['Vary']
+        return not_modified
+    return response
@@ -0,0 +1,170 @@
+import atexit
+import hashlib
+import hmac
+import json
+import logging
+import os
+import queue
+import random
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from flask import g, request
+
+from common.app_config import config
+
+# Path arguments that are not identifiers, recorded as they are
+PUBLIC_PATH_ARGS = {'provider'}
+# Query arguments whose values are recorded; only the length of any other value is
+PUBLIC_QUERY_ARGS = {'filter'}
+EXCLUDED_ROUTES = {'/metrics', '/admin/pool'}
+
+_listener = None
+_capture_logger = logging.getLogger('todomvc.traffic_capture')
+_capture_logger.propagate = False
+
+
+def pseudonym(value) -> str:
+    """
+    A stable stand-in for an identifier: the same person or task maps to the same pseudonym in
+    every process and capture file, but the identifier cannot be recovered from it.
+    """
+    return hmac.new(config.TRAFFIC_CAPTURE_SALT.encode(), str(value).encode(), hashlib.sha256).hexdigest()[:16]
+
+
+def shape(value):
+    """
+    The structure of a JSON value without its content: strings become their length.
+    """
+    if isinstance(value, dict):
+        return {key: shape(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return {'list': len(value), 'item': shape(value[0]) if value else None}
+    if isinstance(value, str):
+        return f"str:{len(value)}"
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, (int, float)):
+        return 'number'
+    return 'null'
+
+
+def get_body_shape():
+    if request.is_json:
+        body = request.get_json(silent=True)
+        return shape(body) if body is not None else None
+    if request.content_length:
+        return {'bytes': request.content_length}
+    return None
+
+
+def get_person_id(response):
+    person = g.get('person')
+    if person is not None:
+        return person.entity_id
+    # Logins are not authenticated yet: their person comes from the response.
+    if request.path.startswith('/auth/') and response.is_json and response.status_code == 200:
+        body = response.get_json(silent=True) or {}
+        person = body.get('person')
+        if isinstance(person, dict):
+            return person.get('entity_id')
+    return None
+
+
+def is_sampled() -> bool:
+    return random.random() < config.TRAFFIC_CAPTURE_SAMPLE_RATE
+
+
+def write_record(started, method, route, path_args, query_args, person_id, organization_id, content_type, body,
+                 status, response_bytes):
+    """
+    Queues the sanitized record of one request. `started` is the `(time.time(), time.perf_counter())`
+    pair taken when it arrived, `body` its shape.
+    """
+    started_at, started_counter = started
+    record = {
+        'ts': round(started_at, 6),
+        'method': method,
+        'route': route,
+        'path_args': {
+            name: value if name in PUBLIC_PATH_ARGS else pseudonym(value)
+            for name, value in path_args.items()
+        },
+        'query': {
+            name: value if name in PUBLIC_QUERY_ARGS else f"str:{len(value)}"
+            for name, value in query_args.items()
+        },
+        'person': pseudonym(person_id) if person_id else None,
+        'organization': pseudonym(organization_id) if organization_id else None,
+        'content_type': content_type or None,
+        'body': body,
+        'status': status,
+        'duration_ms': round((time.perf_counter() - started_counter) * 1000, 3),
+        'response_bytes': response_bytes,
+        'pid': os.getpid(),
+    }
+    _capture_logger.info(json.dumps(record, separators=(',', ':')))
+
+
+def start_capture():
+    if is_sampled():
+        g.traffic_started = (time.time(), time.perf_counter())
+
+
+def capture_request(response):
+    started = g.pop('traffic_started', None)
+    if started is None or request.url_rule is None or request.url_rule.rule in EXCLUDED_ROUTES:
+        return response
+
+    write_record(
+        started, request.method, request.url_rule.rule, request.view_args or {}, request.args,
+        get_person_id(response), request.headers.get('x-organization-id'), request.mimetype, get_body_shape(),
+        response.status_code, response.calculate_content_length(),
+    )
+    return response
+
+
+def init_traffic_capture(app):
+    """
+    Appends sanitized metadata of every request (a TRAFFIC_CAPTURE_SAMPLE_RATE share of them) to
+    rotating JSONL files in TRAFFIC_CAPTURE_DIR, one per process, for `benchmarks.replay`. No
+    header, identifier or body value is recorded: ids become pseudonyms, strings their length.
+    Register it after the compression, so it sees the response before it is compressed.
+
+    Requires TRAFFIC_CAPTURE_SALT, the key of the pseudonyms.
+    """
+    global _listener
+    if not config.TRAFFIC_CAPTURE_ENABLED:
+        return
+    if not config.TRAFFIC_CAPTURE_SALT:
+        raise ValueError("TRAFFIC_CAPTURE_SALT is required when TRAFFIC_CAPTURE_ENABLED is set.")
+
+    app.before_request(start_capture)
+    app.after_request(capture_request)
+
+    if _listener is None:
+        os.makedirs(config.TRAFFIC_CAPTURE_DIR, exist_ok=True)
+        file_handler = RotatingFileHandler(
+            os.path.join(config.TRAFFIC_CAPTURE_DIR, f"traffic-{os.getpid()}.jsonl"),
+            maxBytes=config.TRAFFIC_CAPTURE_MAX_BYTES,
+            backupCount=config.TRAFFIC_CAPTURE_BACKUPS,
+        )
+        # Requests only enqueue their record; a background thread writes the files.
+        records = queue.Queue()
+        _capture_logger.addHandler(QueueHandler(records))
+        _capture_logger.setLevel(logging.INFO)
+        _listener = QueueListener(records, file_handler)
+        _listener.start()
+        atexit.register(close_traffic_capture)
+
+
+def close_traffic_capture():
+    """
+    Writes the records still queued; for shutdown paths that skip atexit.
+    """
+    global _listener
+    if _listener is not None:
+        for handler in list(_capture_logger.handlers):
+            _capture_logger.removeHandler(handler)
+        _listener.stop()
+        _listener = None
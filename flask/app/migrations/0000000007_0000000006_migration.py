@@ -0,0 +1,91 @@
+revision = "0000000007"
+down_revision = "0000000006"
+
+AUDITED_TABLES = ["organization", "person", "email", "login_method", "person_organization_role", "task"]
+
+# Months of empty partitions created ahead of the current one; `maintenance.py audit-partitions`
+# keeps this window rolling.
+PREMAKE_MONTHS = 3
+
+
+def upgrade(migration):
+    # Creates the monthly partition of `parent` containing `month`, moving the rows that already
+    # landed in the default partition into it. Returns the partition name, or NULL if it exists.
+    # Percent signs are doubled: the statement goes through psycopg2 parameter formatting.
+    migration.execute(
+        """
+        CREATE OR REPLACE FUNCTION audit_ensure_partition(parent text, month date) RETURNS text AS $$
+        DECLARE
+            start_at timestamp := date_trunc('month', month);
+            end_at timestamp := date_trunc('month', month) + interval '1 month';
+            partition_name text := format('%%s_p%%s', parent, to_char(start_at, 'YYYYMM'));
+        BEGIN
+            IF to_regclass(partition_name) IS NOT NULL THEN
+                RETURN NULL;
+            END IF;
+            EXECUTE format('CREATE TABLE %%I (LIKE %%I INCLUDING DEFAULTS)', partition_name, parent);
+            EXECUTE format(
+                'WITH moved AS (DELETE FROM %%I WHERE changed_on >= %%L AND changed_on < %%L RETURNING *) '
+                'INSERT INTO %%I SELECT * FROM moved',
+                parent || '_default', start_at, end_at, partition_name
+            );
+            EXECUTE format(
+                'ALTER TABLE %%I ATTACH PARTITION %%I FOR VALUES FROM (%%L) TO (%%L)',
+                parent, partition_name, start_at, end_at
+            );
+            RETURN partition_name;
+        END
+        $$ LANGUAGE plpgsql;
+        """
+    )
+
+    for table in AUDITED_TABLES:
+        audit_table = f"{table}_audit"
+        migration.execute(f"ALTER TABLE {audit_table} RENAME TO {audit_table}_legacy;")
+        migration.execute(f"ALTER INDEX {audit_table}_pkey RENAME TO {audit_table}_legacy_pkey;")
+
+        # The partition key must be part of the primary key, and so NOT NULL.
+        migration.execute(
+            f"CREATE TABLE {audit_table} (LIKE {audit_table}_legacy INCLUDING DEFAULTS) PARTITION BY RANGE (changed_on);"
+        )
+        migration.execute(f"ALTER TABLE {audit_table} ALTER COLUMN changed_on SET NOT NULL;")
+        migration.execute(f"ALTER TABLE {audit_table} ADD PRIMARY KEY (entity_id, version, changed_on);")
+        # Audit rows are appended in changed_on order, which is what BRIN summarizes well.
+        migration.execute(
+            f"CREATE INDEX {audit_table}_changed_on_brin ON {audit_table} USING brin (changed_on) WITH (pages_per_range = 32);"
+        )
+        migration.execute(f"CREATE TABLE {audit_table}_default PARTITION OF {audit_table} DEFAULT;")
+
+        # Undated rows are filed under the oldest month, rather than creating partitions back to 1970.
+        migration.execute(
+            f"UPDATE {audit_table}_legacy SET changed_on = COALESCE((SELECT min(changed_on) FROM {audit_table}_legacy), now()) "
+            f"WHERE changed_on IS NULL;"
+        )
+        migration.execute(
+            f"""
+            SELECT audit_ensure_partition('{audit_table}', month::date)
+            FROM generate_series(
+                date_trunc('month', COALESCE((SELECT min(changed_on) FROM {audit_table}_legacy), now())),
+                date_trunc('month', now()) + interval '{PREMAKE_MONTHS} months',
+                interval '1 month'
+            ) AS month;
+            """
+        )
+        migration.execute(f"INSERT INTO {audit_table} SELECT * FROM {audit_table}_legacy;")
+        migration.drop_table(f"{audit_table}_legacy")
+
+    migration.update_version_table(version=revision)
+
+
+def downgrade(migration):
+    for table in AUDITED_TABLES:
+        audit_table = f"{table}_audit"
+        migration.execute(f"CREATE TABLE {audit_table}_plain (LIKE {audit_table} INCLUDING DEFAULTS);")
+        migration.execute(f"ALTER TABLE {audit_table}_plain ALTER COLUMN changed_on DROP NOT NULL;")
+        migration.execute(f"INSERT INTO {audit_table}_plain SELECT * FROM {audit_table};")
+        migration.drop_table(audit_table)
+        migration.change_table_name(f"{audit_table}_plain", audit_table)
+        migration.execute(f'ALTER TABLE {audit_table} ADD CONSTRAINT {audit_table}_pkey PRIMARY KEY ("entity_id", "version");')
+
+    migration.execute("DROP FUNCTION IF EXISTS audit_ensure_partition(text, date);")
+    migration.update_version_table(version=down_revision)
@@ -0,0 +1,43 @@
+revision = "0000000008"
+down_revision = "0000000007"
+
+
+
+def upgrade(migration):
+    # Soft-deleted tasks are moved here by `maintenance.py archive-tasks`.
+    migration.create_table(
+        "task_archive",
+        """
+            "entity_id" varchar(32) NOT NULL,
+            "version" varchar(32) NOT NULL,
+            "previous_version" varchar(32) DEFAULT '00000000000000000000000000000000',
+            "active" boolean DEFAULT true,
+            "changed_by_id" varchar(32) DEFAULT NULL,
+            "changed_on" timestamp NULL DEFAULT CURRENT_TIMESTAMP,
+            "person_id" varchar(32) NOT NULL,
+            "title" varchar(500) NOT NULL,
+            "completed" boolean DEFAULT false,
+            "archived_on" timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY ("entity_id")
+        """
+    )
+    migration.add_index("task_archive", "task_archive_person_id_ind", "person_id")
+
+    # Lets the archiver find its candidates without scanning the live rows.
+    migration.execute("CREATE INDEX task_inactive_changed_on_ind ON task (changed_on) WHERE active = false;")
+    migration.update_version_table(version=revision)
+
+
+def downgrade(migration):
+    migration.remove_index("task", "task_inactive_changed_on_ind")
+    migration.execute(
+        """
+        INSERT INTO task (entity_id, version, previous_version, active, changed_by_id, changed_on, person_id, title, completed)
+        SELECT entity_id, version, previous_version, active, changed_by_id, changed_on, person_id, title, completed
+        FROM task_archive
+        ON CONFLICT (entity_id) DO NOTHING;
+        """
+    )
+    migration.drop_table(table_name="task_archive")
+
+    migration.update_version_table(version=down_revision)
@@ -0,0 +1,325 @@
+"""
+Converts the varchar(32) id columns to native uuid, online.
+
+The tables stay readable and writable throughout:
+
+1. every id column gets a `<column>__uuid` shadow column, kept in sync by a trigger;
+2. existing rows are backfilled in small keyset batches, each its own transaction;
+3. NOT NULL is proven with CHECK constraints validated without blocking writes;
+4. the indexes are rebuilt on the shadow columns with CREATE INDEX CONCURRENTLY (per partition
+   for the partitioned audit tables);
+5. one short transaction swaps the columns, indexes and primary keys of all tables at once, so
+   joins and the audit copies never see the two types mixed. The swap waits at most
+   SWAP_LOCK_TIMEOUT for its locks and is retried instead of queueing behind long queries.
+
+The old columns are dropped in the swap; their space in the heap is reused as rows are updated.
+"""
+import re
+import time
+
+import psycopg2
+from psycopg2 import errors
+
+revision = "0000000009"
+down_revision = "0000000008"
+
+BASE_ID_COLUMNS = ["entity_id", "version", "previous_version", "changed_by_id"]
+EXTRA_ID_COLUMNS = {
+    "organization": [],
+    "person": [],
+    "email": ["person_id"],
+    "login_method": ["person_id", "email_id"],
+    "person_organization_role": ["person_id", "organization_id"],
+    "task": ["person_id"],
+}
+SHADOW_SUFFIX = "__uuid"
+BATCH_SIZE = 5000
+SWAP_LOCK_TIMEOUT = "5s"
+SWAP_ATTEMPTS = 30
+
+_UUID_PATTERN = "^([0-9a-fA-F]{32}|[0-9a-fA-F]{8}-([0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12})$"
+
+
+def get_tables():
+    tables = {}
+    for table, extra_columns in EXTRA_ID_COLUMNS.items():
+        tables[table] = BASE_ID_COLUMNS + extra_columns
+        tables[f"{table}_audit"] = BASE_ID_COLUMNS + extra_columns
+    tables["task_archive"] = BASE_ID_COLUMNS + EXTRA_ID_COLUMNS["task"]
+    return tables
+
+
+def connect(migration, autocommit=True):
+    adapter = migration.db_adapter
+    connection = psycopg2.connect(
+        host=adapter._host, port=adapter._port, user=adapter._user, password=adapter._password,
+        database=adapter._database, application_name='todomvc-uuid-migration'
+    )
+    connection.autocommit = autocommit
+    return connection
+
+
+def fetch_values(cursor, query, params=None):
+    cursor.execute(query, params)
+    return [row[0] for row in cursor.fetchall()]
+
+
+def column_type(cursor, table, column):
+    cursor.execute(
+        "SELECT format_type(atttypid, atttypmod) FROM pg_attribute "
+        "WHERE attrelid = %s::regclass AND attname = %s AND NOT attisdropped",
+        (table, column)
+    )
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def is_partitioned(cursor, table):
+    return fetch_values(cursor, "SELECT relkind FROM pg_class WHERE oid = %s::regclass", (table,))[0] == 'p'
+
+
+def get_leaves(cursor, table):
+    """
+    The table itself, or all its partitions when it is partitioned.
+    """
+    return fetch_values(
+        cursor,
+        "WITH RECURSIVE tree AS ("
+        "  SELECT %s::regclass::oid AS relid"
+        "  UNION ALL SELECT inhrelid FROM pg_inherits JOIN tree ON inhparent = tree.relid"
+        ") SELECT relid::regclass::text FROM tree JOIN pg_class ON pg_class.oid = tree.relid WHERE relkind = 'r'",
+        (table,)
+    )
+
+
+def get_not_null_columns(cursor, table, columns):
+    return fetch_values(
+        cursor,
+        "SELECT attname FROM pg_attribute WHERE attrelid = %s::regclass AND attnotnull AND attname = ANY(%s)",
+        (table, columns)
+    )
+
+
+def get_primary_key_columns(cursor, relation):
+    return fetch_values(
+        cursor,
+        "SELECT attname FROM pg_index "
+        "JOIN pg_attribute ON attrelid = indrelid AND attnum = ANY(indkey) "
+        "WHERE indrelid = %s::regclass AND indisprimary "
+        "ORDER BY array_position(indkey::int2[], attnum)",
+        (relation,)
+    )
+
+
+def get_id_indexes(cursor, relation, columns):
+    """
+    Returns (name, definition, is_primary) of the indexes of `relation` using an id column.
+    """
+    cursor.execute(
+        "SELECT indexrelid::regclass::text, pg_get_indexdef(indexrelid), indisprimary FROM pg_index "
+        "WHERE indrelid = %s::regclass AND EXISTS ("
+        "  SELECT 1 FROM pg_attribute WHERE attrelid = indrelid AND attnum = ANY(indkey) AND attname = ANY(%s)"
+        ")",
+        (relation, columns)
+    )
+    return [row for row in cursor.fetchall() if not row[0].endswith(SHADOW_SUFFIX)]
+
+
+def shadow_index_definition(definition, name, columns):
+    shadow_name = f"{name}{SHADOW_SUFFIX}"
+    if len(shadow_name) > 63:
+        raise RuntimeError(f"Index name {shadow_name} exceeds the identifier limit")
+    head, _, tail = definition.partition(' USING ')
+    head = head.replace(f"INDEX {name} ON", f"INDEX CONCURRENTLY {shadow_name} ON", 1)
+    tail = re.sub(r'\b(' + '|'.join(columns) + r')\b', lambda match: match.group(1) + SHADOW_SUFFIX, tail)
+    return f"{head} USING {tail}"
+
+
+def preflight(cursor, tables):
+    invalid = []
+    for table, columns in tables.items():
+        for column in columns:
+            cursor.execute(
+                f"SELECT count(*) FROM {table} WHERE {column} IS NOT NULL AND {column} !~ %s", (_UUID_PATTERN,)
+            )
+            count = cursor.fetchone()[0]
+            if count:
+                invalid.append(f"{table}.{column}: {count}")
+    if invalid:
+        raise RuntimeError(f"Rows with ids that are not UUIDs, fix them before migrating: {', '.join(invalid)}")
+
+
+def add_shadow_columns(cursor, table, columns):
+    for column in columns:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column}{SHADOW_SUFFIX} uuid")
+
+    assignments = ' '.join(f"NEW.{column}{SHADOW_SUFFIX} := NEW.{column}::uuid;" for column in columns)
+    cursor.execute(
+        f"CREATE OR REPLACE FUNCTION {table}_uuid_shadow() RETURNS trigger AS $$ "
+        f"BEGIN {assignments} RETURN NEW; END $$ LANGUAGE plpgsql"
+    )
+    cursor.execute(f"DROP TRIGGER IF EXISTS {table}_uuid_shadow ON {table}")
+    cursor.execute(
+        f"CREATE TRIGGER {table}_uuid_shadow BEFORE INSERT OR UPDATE ON {table} "
+        f"FOR EACH ROW EXECUTE FUNCTION {table}_uuid_shadow()"
+    )
+
+
+def backfill(cursor, leaf, columns):
+    key = get_primary_key_columns(cursor, leaf)
+    key_list = ', '.join(key)
+    # Every key column descending: the batch's last key, where the next batch starts
+    descending = ', '.join(f"{column} DESC" for column in key)
+    assignments = ', '.join(f"{column}{SHADOW_SUFFIX} = t.{column}::uuid" for column in columns)
+    join = ' AND '.join(f"t.{column} = batch.{column}" for column in key)
+
+    last = None
+    while True:
+        after = f"WHERE ({key_list}) > ({', '.join(['%s'] * len(key))})" if last else ""
+        cursor.execute(
+            f"WITH batch AS (SELECT {key_list} FROM {leaf} {after} ORDER BY {key_list} LIMIT {BATCH_SIZE}), "
+            f"updated AS (UPDATE {leaf} AS t SET {assignments} FROM batch WHERE {join} RETURNING 1) "
+            f"SELECT {key_list}, (SELECT count(*) FROM updated) FROM batch ORDER BY {descending} LIMIT 1",
+            last
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return
+        last = row[:len(key)]
+
+
+def validate_not_null(cursor, leaf, columns):
+    for column in columns:
+        constraint = f"{column}{SHADOW_SUFFIX}_not_null"
+        cursor.execute(f"ALTER TABLE {leaf} DROP CONSTRAINT IF EXISTS {constraint}")
+        cursor.execute(
+            f"ALTER TABLE {leaf} ADD CONSTRAINT {constraint} CHECK ({column}{SHADOW_SUFFIX} IS NOT NULL) NOT VALID"
+        )
+        cursor.execute(f"ALTER TABLE {leaf} VALIDATE CONSTRAINT {constraint}")
+
+
+def build_shadow_indexes(cursor, table, leaves, columns):
+    if is_partitioned(cursor, table):
+        for name, _, primary in get_id_indexes(cursor, table, columns):
+            if not primary:
+                raise RuntimeError(f"Partitioned index {name} is not handled by this migration")
+
+    for leaf in leaves:
+        for name, definition, _ in get_id_indexes(cursor, leaf, columns):
+            shadow_name = f"{name}{SHADOW_SUFFIX}"
+            # An index left invalid by an interrupted run is rebuilt.
+            cursor.execute(
+                "SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(%s)", (shadow_name,)
+            )
+            existing = cursor.fetchone()
+            if existing and existing[0]:
+                continue
+            if existing:
+                cursor.execute(f"DROP INDEX CONCURRENTLY {shadow_name}")
+            cursor.execute(shadow_index_definition(definition, name, columns))
+
+
+def swap(cursor, table, leaves, columns, not_null_columns, primary_key):
+    partitioned = is_partitioned(cursor, table)
+    shadow_indexes = {
+        leaf: fetch_values(
+            cursor,
+            "SELECT indexrelid::regclass::text FROM pg_index WHERE indrelid = %s::regclass",
+            (leaf,)
+        )
+        for leaf in leaves
+    }
+
+    cursor.execute(f"DROP TRIGGER {table}_uuid_shadow ON {table}")
+    cursor.execute(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {table}_pkey")
+    for column in columns:
+        # Also drops the old indexes on the column.
+        cursor.execute(f"ALTER TABLE {table} DROP COLUMN {column}")
+        cursor.execute(f"ALTER TABLE {table} RENAME COLUMN {column}{SHADOW_SUFFIX} TO {column}")
+    cursor.execute(
+        f"ALTER TABLE {table} ALTER COLUMN previous_version SET DEFAULT '00000000000000000000000000000000'::uuid"
+    )
+    for column in not_null_columns:
+        # Proven by the validated CHECK constraints, so no scan is needed.
+        cursor.execute(f"ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL")
+
+    for leaf in leaves:
+        for column in not_null_columns:
+            cursor.execute(f"ALTER TABLE {leaf} DROP CONSTRAINT {column}{SHADOW_SUFFIX}_not_null")
+        for shadow_name in shadow_indexes[leaf]:
+            if shadow_name.endswith(SHADOW_SUFFIX):
+                cursor.execute(f"ALTER INDEX {shadow_name} RENAME TO {shadow_name[:-len(SHADOW_SUFFIX)]}")
+        if partitioned or leaf == table:
+            cursor.execute(f"ALTER TABLE {leaf} ADD CONSTRAINT {leaf}_pkey PRIMARY KEY USING INDEX {leaf}_pkey")
+
+    if partitioned:
+        # Attaches the partitions' primary keys built above instead of building new ones.
+        cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY ({', '.join(primary_key)})")
+
+
+def upgrade(migration):
+    connection = connect(migration)
+    cursor = connection.cursor()
+
+    tables = {table: columns for table, columns in get_tables().items() if column_type(cursor, table, 'entity_id') != 'uuid'}
+    if tables:
+        preflight(cursor, tables)
+
+        plan = {}
+        for table, columns in tables.items():
+            leaves = get_leaves(cursor, table)
+            plan[table] = {
+                'leaves': leaves,
+                'not_null_columns': get_not_null_columns(cursor, table, columns),
+                'primary_key': get_primary_key_columns(cursor, table),
+            }
+            add_shadow_columns(cursor, table, columns)
+
+        for table, columns in tables.items():
+            for leaf in plan[table]['leaves']:
+                backfill(cursor, leaf, columns)
+                validate_not_null(cursor, leaf, plan[table]['not_null_columns'])
+            build_shadow_indexes(cursor, table, plan[table]['leaves'], columns)
+
+        connection.autocommit = False
+        for attempt in range(1, SWAP_ATTEMPTS + 1):
+            try:
+                cursor.execute(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'")
+                cursor.execute(f"LOCK TABLE {', '.join(sorted(tables))} IN ACCESS EXCLUSIVE MODE")
+                for table, columns in tables.items():
+                    swap(
+                        cursor, table, plan[table]['leaves'], columns, plan[table]['not_null_columns'],
+                        plan[table]['primary_key']
+                    )
+                connection.commit()
+                break
+            except errors.LockNotAvailable:
+                connection.rollback()
+                if attempt == SWAP_ATTEMPTS:
+                    raise
+                time.sleep(attempt)
+
+        connection.autocommit = True
+        for table in tables:
+            cursor.execute(f"DROP FUNCTION IF EXISTS {table}_uuid_shadow()")
+
+    connection.close()
+    migration.update_version_table(version=revision)
+
+
+def downgrade(migration):
+    # Offline: rewrites each table under an exclusive lock.
+    connection = connect(migration)
+    cursor = connection.cursor()
+    for table, columns in get_tables().items():
+        if column_type(cursor, table, 'entity_id') != 'uuid':
+            continue
+        cursor.execute(
+            f"ALTER TABLE {table} "
+            + ', '.join(f"ALTER COLUMN {column} TYPE varchar(32) USING replace({column}::text, '-', '')" for column in columns)
+        )
+        cursor.execute(
+            f"ALTER TABLE {table} ALTER COLUMN previous_version SET DEFAULT '00000000000000000000000000000000'"
+        )
+    connection.close()
+    migration.update_version_table(version=down_revision)
@@ -1,9 +1,12 @@
 from flask_restx import Namespace, Resource
 from flask import request
-from app.helpers.response import get_success_response, get_failure_response, parse_request_body, validate_required_fields
+from app.handlers import AwaitableMethods, run_sync
+from app.handlers.auth import exchange_oauth_code
+from app.helpers.response import get_success_response, get_handler_response, parse_request_body, validate_required_fields
 from app.helpers.decorators import login_required
+from common.metrics import query_budget
 from common.app_config import config
-from common.services import AuthService, PersonService, OAuthClient
+from common.services import AuthService, OAuthClient
 
 # Create the auth blueprint
 auth_api = Namespace('auth', description="Auth related APIs")
@@ -11,6 +14,7 @@ auth_api = Namespace('auth', description="Auth related APIs")
 
 @auth_api.route('/test')
 class Test(Resource):
+    @query_budget(0)
     def get(self):
         login_data = {
             "username": "test",
@@ -28,6 +32,9 @@ class Signup(Resource):
             'email_address': {'type': 'string'}
         }}
     )
+    # Email lookup, five saves (audit copy and upsert each) and the organization's roles, whose
+    # cached organizations the organization save invalidates
+    @query_budget(12)
     def post(self):
         parsed_body = parse_request_body(request, ['first_name', 'last_name', 'email_address'])
         validate_required_fields(parsed_body)
@@ -50,19 +57,18 @@ class Login(Resource):
             'password': {'type': 'string'}
         }}
     )
+    # Email, login method and person
+    @query_budget(3)
     def post(self):
         parsed_body = parse_request_body(request, ['email', 'password'])
         validate_required_fields(parsed_body)
 
         auth_service = AuthService(config)
-        access_token, expiry = auth_service.login_user_by_email_password(
+        access_token, expiry, person = auth_service.login_user_by_email_password(
             parsed_body['email'], 
             parsed_body['password']
         )
 
-        person_service = PersonService(config)
-        person = person_service.get_person_by_email_address(email_address=parsed_body['email'])
-
         return get_success_response(person=person.as_dict(), access_token=access_token, expiry=expiry)
 
 
@@ -73,6 +79,7 @@ class ForgotPassword(Resource):
             'email': {'type': 'string'}
         }}
     )
+    @query_budget(3)
     def post(self):
         parsed_body = parse_request_body(request, ['email'])
         validate_required_fields(parsed_body)
@@ -93,6 +100,8 @@ class ResetPassword(Resource):
             'password': {'type': 'string'}
         }}
     )
+    # Login method, email and person in one query, then the password and email verification saves
+    @query_budget(5)
     def post(self, token, uidb64):
         parsed_body = parse_request_body(request, ['password'])
         validate_required_fields(parsed_body)
@@ -109,6 +118,8 @@ class ResetPassword(Resource):
 
 @auth_api.route('/<string:provider>/exchange')
 class OAuthExchange(Resource):
+    # A first login creates the account: email lookup, five saves and the organization's roles
+    @query_budget(12)
     def post(self, provider):
         """
         Exchange OAuth authorization code for access token and user info
@@ -116,66 +127,17 @@ class OAuthExchange(Resource):
         Args:
             provider: OAuth provider (google, microsoft)
         """
-        parsed_body = parse_request_body(
-            request,
-            ['code', 'redirect_uri', 'code_verifier']
-        )
-        validate_required_fields(parsed_body)
-
-        oauth_client = OAuthClient(config)
-        auth_service = AuthService(config)
-
-        try:
-            # Token exchange + user info retrieval
-            if provider == "google":
-                token_response = oauth_client.get_google_token(
-                    parsed_body['code'],
-                    parsed_body['redirect_uri'],
-                    parsed_body['code_verifier']
-                )
-                user_info = oauth_client.get_google_user_info(token_response['access_token'])
-
-            elif provider == "microsoft":
-                token_response = oauth_client.get_microsoft_token(
-                    parsed_body['code'],
-                    parsed_body['redirect_uri'],
-                    parsed_body['code_verifier']
-                )
-                user_info = oauth_client.get_microsoft_user_info(token_response['access_token'])
-
-            else:
-                return get_failure_response(message=f"Unsupported provider: {provider}")
-
-            # Normalize name + email
-            if provider == "google":
-                email = user_info.get('email')
-                name = user_info.get('name', '')
-
-            elif provider == "microsoft":
-                email = user_info.get('email')
-                name = user_info.get('name', '')
-
-            if not email:
-                return get_failure_response(message=f"{provider.capitalize()} user info does not contain email.")
-
-            name_parts = name.split(' ', 1)
-            first_name, last_name = name_parts[0], name_parts[1] if len(name_parts) > 1 else ""
-
-            # Login or create user
-            access_token, expiry, person = auth_service.login_user_by_oauth(
-                email, first_name, last_name,
-                provider=provider,
-                provider_data=user_info
-            )
-
-            return get_success_response(person=person.as_dict(), access_token=access_token, expiry=expiry)
-
-        except Exception as e:
-            return get_failure_response(message=f"OAuth authentication failed: {str(e)}")
+        # The handler is shared with the native ASGI route (asgi.py).
+        oauth_client = AwaitableMethods(OAuthClient(config))
+        auth_service = AwaitableMethods(AuthService(config))
+        return get_handler_response(run_sync(exchange_oauth_code(
+            oauth_client, auth_service.login_user_by_oauth, provider, request.get_data()
+        )))
 
 
 @auth_api.route('/logout')
 class Logout(Resource):
+    @query_budget(0)
     @login_required()
     def post(self, person):
         """
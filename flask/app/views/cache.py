@@ -0,0 +1,16 @@
+from flask_restx import Namespace, Resource
+from app.helpers.response import get_success_response
+from app.helpers.decorators import login_required
+from common.metrics import query_budget
+from common.cache import get_namespace_metrics, get_single_flight_metrics
+
+cache_api = Namespace('cache', description="Cache-related APIs")
+
+
+@cache_api.route('/stats', doc=dict(description="Hit-rate and latency metrics of this worker's cache namespaces and single-flight groups"))
+class CacheStats(Resource):
+
+    @query_budget(0)
+    @login_required()
+    def get(self):
+        return get_success_response(caches=get_namespace_metrics(), single_flights=get_single_flight_metrics())
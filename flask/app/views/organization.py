@@ -1,9 +1,10 @@
 from flask_restx import Namespace, Resource
 from flask import request
-from app.helpers.response import get_success_response, get_failure_response, parse_request_body, validate_required_fields
+from app.helpers.response import get_success_response, get_failure_response, parse_request_body, validate_required_fields, make_private_conditional
 from common.app_config import config
 from common.services import OrganizationService, PersonService
 from app.helpers.decorators import login_required, organization_required
+from common.metrics import query_budget
 
 # Create the organization blueprint
 organization_api = Namespace('organization', description="Organization-related APIs")
@@ -12,12 +13,15 @@ organization_api = Namespace('organization', description="Organization-related A
 @organization_api.route('/')
 class Organizations(Resource):
     
+    @query_budget(1)
     @login_required()
     def get(self, person):
         organization_service = OrganizationService(config)
         organizations = organization_service.get_organizations_with_roles_by_person(person.entity_id)
-        return get_success_response(organizations=organizations)
+        return make_private_conditional(get_success_response(organizations=organizations))
 
+    # Organization and role check, the save and the members whose cached roles are invalidated
+    @query_budget(4)
     @login_required()
     @organization_required(with_roles=["admin"])
     def put(self, organization):
@@ -2,6 +2,7 @@ from flask_restx import Namespace, Resource
 from flask import request
 from app.helpers.response import get_success_response, parse_request_body, validate_required_fields
 from app.helpers.decorators import login_required
+from common.metrics import query_budget
 from common.app_config import config
 from common.services import PersonService
 
@@ -12,10 +13,12 @@ person_api = Namespace('person', description="Person-related APIs")
 @person_api.route('/me')
 class Me(Resource):
     
+    @query_budget(0)
     @login_required()
     def get(self, person):
         return get_success_response(person=person)
     
+    @query_budget(2)
     @login_required()
     def put(self, person):
         parsed_body = parse_request_body(request, ['first_name', 'last_name'])
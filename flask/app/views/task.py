@@ -1,90 +1,97 @@
+import math
+
 from flask_restx import Namespace, Resource
 from flask import request
-from app.helpers.response import get_success_response, get_failure_response, parse_request_body, validate_required_fields
+from app.handlers import AwaitableMethods, run_sync
+from app.handlers import task as handlers
+from app.helpers.response import get_success_response, get_failure_response, get_handler_response
 from app.helpers.decorators import login_required
+from common.metrics import query_budget
 from common.app_config import config
+from common.app_logger import logger
+from common.helpers.exceptions import InputValidationError
 from common.services import TaskService
-from common.models.task import Task
+from common.helpers.task_import import iter_task_import_rows, SUPPORTED_MIME_TYPES
 
 task_api = Namespace('tasks', description="Task-related APIs")
 
 
+def handle(handler, *args):
+    # The handlers are shared with the native ASGI routes (asgi.py).
+    return get_handler_response(run_sync(handler(AwaitableMethods(TaskService(config)), *args)))
+
+
+def import_query_budget(response):
+    # One COPY per TASK_IMPORT_CHUNK_SIZE accepted rows and nothing else. A failed import
+    # reports no count, so only its repeats are checked.
+    accepted = (response.get_json(silent=True) or {}).get('accepted')
+    if accepted is None:
+        return None
+    return math.ceil(accepted / int(config.TASK_IMPORT_CHUNK_SIZE))
+
+
 @task_api.route('')
 class Tasks(Resource):
+    @query_budget(1)
     @login_required()
     def get(self, person):
-        filter_type = request.args.get('filter', 'all')
-        task_service = TaskService(config)
-        
-        completed = None
-        if filter_type == 'active':
-            completed = False
-        elif filter_type == 'completed':
-            completed = True
-        
-        tasks = task_service.get_tasks_by_person_id(person.entity_id, completed)
-        return get_success_response(tasks=[task.as_dict() for task in tasks])
+        return handle(handlers.list_tasks, person, request.args.get('filter', 'all'))
     
+    @query_budget(2)
     @login_required()
     def post(self, person):
-        try:
-            parsed_body = parse_request_body(request, ['title'])
-            validate_required_fields(parsed_body)
-            
-            task_service = TaskService(config)
-            task = Task(
-                person_id=person.entity_id,
-                title=parsed_body['title'],
-                completed=False
+        return handle(handlers.create_task, person, request.get_data())
+
+
+@task_api.route('/import', doc=dict(description="Bulk import tasks from an NDJSON or CSV body"))
+class TaskImport(Resource):
+    @query_budget(import_query_budget, repeatable=('COPY task ',))
+    @login_required()
+    def post(self, person):
+        if request.mimetype not in SUPPORTED_MIME_TYPES:
+            return get_failure_response(
+                message=f"Unsupported content type. Use one of: {', '.join(SUPPORTED_MIME_TYPES)}.",
+                status_code=415
             )
-            task = task_service.save_task(task)
-            return get_success_response(task=task.as_dict(), message="Task created successfully.")
+
+        task_service = TaskService(config)
+        rows = iter_task_import_rows(request.stream, request.mimetype)
+        try:
+            result = task_service.import_tasks(person.entity_id, rows)
+        except InputValidationError:
+            raise
         except Exception as e:
-            import traceback
-            traceback.print_exc()
-            return get_failure_response(message=f"Error creating task: {str(e)}")
+            logger.exception(e)
+            return get_failure_response(message=f"Import failed, no tasks were imported: {str(e)}")
+        return get_success_response(message="Tasks imported.", **result)
+
+
+@task_api.route('/events', doc=dict(description="Server-sent events stream of the person's task changes"))
+class TaskEvents(Resource):
+    @query_budget(0)
+    @login_required()
+    def get(self, person):
+        # A stream would hold a waitress thread for as long as it stays open; the ASGI app
+        # serves it as a coroutine instead.
+        return get_failure_response(message="Task events are only served with SERVER_MODE=asgi.", status_code=501)
 
 
 @task_api.route('/<string:task_id>')
 class TaskDetail(Resource):
+    @query_budget(3)
     @login_required()
     def put(self, person, task_id):
-        parsed_body = parse_request_body(request, ['title'])
-        validate_required_fields(parsed_body)
-        
-        task_service = TaskService(config)
-        task = task_service.get_task_by_id(task_id, person.entity_id)
-        if not task:
-            return get_failure_response(message="Task not found.")
-        
-        task.title = parsed_body['title']
-        task = task_service.save_task(task)
-        return get_success_response(task=task.as_dict(), message="Task updated successfully.")
+        return handle(handlers.update_task, person, task_id, request.get_data())
     
+    @query_budget(3)
     @login_required()
     def delete(self, person, task_id):
-        task_service = TaskService(config)
-        task = task_service.get_task_by_id(task_id, person.entity_id)
-        if not task:
-            return get_failure_response(message="Task not found.")
-        
-        task_service.delete_task(task)
-        return get_success_response(message="Task deleted successfully.")
+        return handle(handlers.delete_task, person, task_id)
 
 
 @task_api.route('/<string:task_id>/complete')
 class TaskComplete(Resource):
+    @query_budget(3)
     @login_required()
     def patch(self, person, task_id):
-        parsed_body = parse_request_body(request, ['completed'])
-        validate_required_fields(parsed_body)
-        
-        task_service = TaskService(config)
-        task = task_service.get_task_by_id(task_id, person.entity_id)
-        if not task:
-            return get_failure_response(message="Task not found.")
-        
-        task.completed = parsed_body['completed']
-        task = task_service.save_task(task)
-        return get_success_response(task=task.as_dict(), message="Task updated successfully.")
-
+        return handle(handlers.complete_task, person, task_id, request.get_data())
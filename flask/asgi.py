@@ -0,0 +1,352 @@
+"""
+ASGI entry point, an alternative to serving `main:create_app` with waitress:
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+
+The I/O-bound routes (task CRUD, the task events stream and the OAuth code exchange) are served
+natively on the event loop through the async repository, messaging and OAuth clients, so a
+request waiting on Postgres, RabbitMQ or an OAuth provider does not occupy an OS thread. Every
+other route is served by the regular Flask app through a WSGI bridge.
+
+The native task and OAuth exchange routes run the same handlers as the Flask views
+(app/handlers), on the async services instead of the sync ones.
+
+Requires the `asgi` dependency group (`poetry install --with asgi`).
+"""
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from functools import wraps
+
+import httpx
+from a2wsgi import WSGIMiddleware
+from psycopg_pool import PoolTimeout
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Mount, Route
+from werkzeug.http import parse_accept_header
+
+from rococo.models.versioned_model import ModelValidationError
+
+from app import create_app
+from app.handlers import authenticate
+from app.handlers import task as task_handlers
+from app.handlers.auth import exchange_oauth_code
+from app.helpers.compression import choose_encoding, compress, get_compressible_mimetypes
+from app.helpers.metrics import close_metrics
+from app.helpers.traffic_capture import close_traffic_capture, is_sampled, shape, write_record
+from common.app_config import config
+from common.app_logger import logger
+from common.helpers.auth import create_person_from_token
+from common.helpers.exceptions import InputValidationError, APIException
+from common.metrics import finish_request, start_request
+from common.repositories.async_factory import get_async_pool, get_pool_stats
+from common.repositories.pools import PoolSizer, resize_async_pool, sizers
+from common.repositories.audit import close_audit_writer
+from common.services import AuthService
+from common.services.async_oauth import AsyncOAuthClient
+from common.services.async_task import AsyncTaskService
+from common.tasks.async_send_message import AsyncMessageSender
+from common.tasks.async_task_events import AsyncTaskEventBroker, AsyncTaskEventPublisher
+
+flask_app = create_app()
+
+
+def _get_response(data, status_code=200, headers=None):
+    # Serialize with the Flask JSON provider so payloads match the WSGI routes exactly.
+    return Response(
+        flask_app.json.dumps(data), status_code=status_code, media_type=config.MIME_TYPE, headers=headers
+    )
+
+
+def get_failure_response(message, status_code=200, headers=None):
+    return _get_response(dict(success=False, message=message), status_code, headers)
+
+
+def get_handler_response(result):
+    return _get_response(result.data, result.status_code, result.headers)
+
+
+def login_required(handler):
+    @wraps(handler)
+    async def wrapper(request):
+        parsed_token, failure = authenticate(request.headers.get('Authorization'))
+        if failure is not None:
+            return get_handler_response(failure)
+
+        request.state.person = create_person_from_token(parsed_token)
+        return await handler(request, request.state.person)
+
+    return wrapper
+
+
+def measured(path, handler):
+    """
+    Records the request metrics of a native route, like the Flask app does for its own routes
+    (which also serves /metrics).
+    """
+    endpoint = path.replace('{', '<').replace('}', '>')
+
+    @wraps(handler)
+    async def wrapper(request):
+        # The event loop thread's CPU time is shared by all requests, so it is not attributed.
+        token = start_request(measure_cpu=False, endpoint=endpoint)
+        status = 500
+        try:
+            response = await handler(request)
+            status = response.status_code
+            return response
+        finally:
+            finish_request(token, request.method, endpoint, status)
+
+    return wrapper if config.METRICS_ENABLED else handler
+
+
+# The exception handlers of `create_asgi_app` answer these with a failure response.
+HANDLED_ERRORS = (ModelValidationError, InputValidationError, APIException)
+
+
+async def get_body_shape(request, content_type):
+    if request.headers.get('content-length', '0') in ('', '0'):
+        return None
+    # The handler has read the body already, so this is its cached copy.
+    body = await request.body()
+    if content_type == 'application/json':
+        try:
+            return shape(json.loads(body))
+        except ValueError:
+            return None
+    return {'bytes': len(body)}
+
+
+def captured(path, handler):
+    """
+    Records the sanitized metadata of a native route in the traffic capture, like the Flask app
+    does for its own routes.
+    """
+    endpoint = path.replace('{', '<').replace('}', '>')
+
+    @wraps(handler)
+    async def wrapper(request):
+        if not is_sampled():
+            return await handler(request)
+
+        started = (time.time(), time.perf_counter())
+        status, response_bytes = 500, None
+        try:
+            response = await handler(request)
+            status = response.status_code
+            # Streamed responses have no length up front.
+            response_bytes = len(response.body) if hasattr(response, 'body') else None
+            return response
+        except HANDLED_ERRORS:
+            status = 200
+            raise
+        finally:
+            person = getattr(request.state, 'person', None)
+            content_type = request.headers.get('content-type', '').split(';')[0].strip()
+            write_record(
+                started, request.method, endpoint, request.path_params, request.query_params,
+                person.entity_id if person is not None else None, request.headers.get('x-organization-id'),
+                content_type, await get_body_shape(request, content_type), status, response_bytes,
+            )
+
+    return wrapper if config.TRAFFIC_CAPTURE_ENABLED else handler
+
+
+def compressed(handler):
+    """
+    Compresses the buffered responses of a native route with the rules of the Flask app's
+    `compress_response` (allowed content types, COMPRESSION_MIN_SIZE, brotli when installed).
+    The events stream is left untouched.
+    """
+    @wraps(handler)
+    async def wrapper(request):
+        response = await handler(request)
+        if isinstance(response, StreamingResponse) or response.status_code in (204, 206, 304):
+            return response
+        if 'content-encoding' in response.headers or response.media_type not in get_compressible_mimetypes():
+            return response
+        if len(response.body) < config.COMPRESSION_MIN_SIZE:
+            return response
+
+        response.headers.add_vary_header('Accept-Encoding')
+        encoding = choose_encoding(parse_accept_header(request.headers.get('accept-encoding')))
+        if encoding is None:
+            return response
+
+        response.body = compress(response.body, encoding)
+        response.headers['content-length'] = str(len(response.body))
+        response.headers['content-encoding'] = encoding
+        return response
+
+    return wrapper
+
+
+def route(path, handler, methods):
+    # The capture records the response before it is compressed, as in the Flask app.
+    return Route(path, measured(path, compressed(captured(path, handler))), methods=methods)
+
+
+def get_task_service(request, person):
+    return AsyncTaskService(config, request.app.state.task_event_publisher, person_id=person.entity_id)
+
+
+@login_required
+async def tasks(request, person):
+    task_service = get_task_service(request, person)
+    if request.method == 'GET':
+        result = await task_handlers.list_tasks(task_service, person, request.query_params.get('filter', 'all'))
+    else:
+        result = await task_handlers.create_task(task_service, person, await request.body())
+    return get_handler_response(result)
+
+
+@login_required
+async def task_update(request, person):
+    return get_handler_response(await task_handlers.update_task(
+        get_task_service(request, person), person, request.path_params['task_id'], await request.body()
+    ))
+
+
+@login_required
+async def task_delete(request, person):
+    return get_handler_response(await task_handlers.delete_task(
+        get_task_service(request, person), person, request.path_params['task_id']
+    ))
+
+
+@login_required
+async def task_complete(request, person):
+    return get_handler_response(await task_handlers.complete_task(
+        get_task_service(request, person), person, request.path_params['task_id'], await request.body()
+    ))
+
+
+@login_required
+async def task_events(request, person):
+    broker = request.app.state.task_event_broker
+    subscription = await broker.subscribe(person.entity_id)
+    if subscription is None:
+        return get_failure_response(
+            message="Too many open event streams, retry later.",
+            status_code=503,
+            headers={'Retry-After': str(config.SSE_RETRY_MILLISECONDS // 1000 or 1)}
+        )
+
+    async def event_stream():
+        try:
+            yield f"retry: {config.SSE_RETRY_MILLISECONDS}\n\n"
+            deadline = time.monotonic() + config.SSE_MAX_STREAM_SECONDS
+            while time.monotonic() < deadline:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=config.SSE_HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: task.{event['event']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            await broker.unsubscribe(person.entity_id, subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+def _login_user_by_oauth(*args, **kwargs):
+    # The sync services resolve pooled connections from the Flask app context.
+    with flask_app.app_context():
+        return AuthService(config).login_user_by_oauth(*args, **kwargs)
+
+
+async def oauth_exchange(request):
+    async def login_user_by_oauth(*args, **kwargs):
+        access_token, expiry, person = await run_in_threadpool(_login_user_by_oauth, *args, **kwargs)
+        request.state.person = person
+        return access_token, expiry, person
+
+    oauth_client = AsyncOAuthClient(config, request.app.state.http_client)
+    return get_handler_response(await exchange_oauth_code(
+        oauth_client, login_user_by_oauth, request.path_params['provider'], await request.body()
+    ))
+
+
+async def handle_model_validation_error(request, exception):
+    return get_failure_response(message='\n'.join(exception.errors))
+
+
+async def handle_application_error(request, exception):
+    return get_failure_response(message=str(exception))
+
+
+@asynccontextmanager
+async def lifespan(app):
+    pool = get_async_pool(config)
+    await pool.open()
+    try:
+        # The minimum connections are opened and checked before traffic arrives.
+        await pool.wait(timeout=30)
+    except PoolTimeout as error:
+        logger.warning(f"Serving before the async database pool is filled: {error}")
+    resizer = None
+    if config.POSTGRES_POOL_ADAPTIVE:
+        sizers['async'] = PoolSizer(
+            config.POSTGRES_ASYNC_POOL_MIN_SIZE, config.POSTGRES_ASYNC_POOL_MAX_SIZE,
+            config.POSTGRES_POOL_ADAPTIVE_TARGET_WAIT_MS / 1000, config.POSTGRES_POOL_ADAPTIVE_STEP,
+        )
+        resizer = asyncio.create_task(resize_async_pool(
+            pool, sizers['async'], config.POSTGRES_POOL_ADAPTIVE_INTERVAL, lambda: get_pool_stats(pool)
+        ))
+
+    message_sender = AsyncMessageSender()
+    app.state.http_client = httpx.AsyncClient(timeout=30)
+    app.state.task_event_publisher = AsyncTaskEventPublisher(message_sender)
+    app.state.task_event_broker = AsyncTaskEventBroker(message_sender, max_subscribers=config.SSE_ASYNC_MAX_STREAMS)
+    logger.info("ASGI app started")
+    try:
+        yield
+    finally:
+        if resizer is not None:
+            resizer.cancel()
+        await app.state.http_client.aclose()
+        await asyncio.to_thread(close_audit_writer)
+        await asyncio.to_thread(close_metrics)
+        await asyncio.to_thread(close_traffic_capture)
+        await message_sender.close()
+        await pool.close()
+
+
+def create_asgi_app():
+    routes = [
+        route('/tasks', tasks, methods=['GET', 'POST']),
+        route('/tasks/events', task_events, methods=['GET']),
+        route('/tasks/{task_id}', task_update, methods=['PUT']),
+        route('/tasks/{task_id}', task_delete, methods=['DELETE']),
+        route('/tasks/{task_id}/complete', task_complete, methods=['PATCH']),
+        route('/auth/{provider}/exchange', oauth_exchange, methods=['POST']),
+        # Everything else, including /tasks/import, is served by the Flask app.
+        Mount('/', app=WSGIMiddleware(flask_app)),
+    ]
+    middleware = [
+        Middleware(
+            CORSMiddleware,
+            allow_origins=['*'],
+            allow_methods=["GET", "POST", "PUT", "DELETE", "PATCH", "OPTIONS"],
+            allow_headers=["Content-Type", "Authorization"],
+        )
+    ]
+    exception_handlers = {
+        ModelValidationError: handle_model_validation_error,
+        InputValidationError: handle_application_error,
+        APIException: handle_application_error,
+    }
+    return Starlette(routes=routes, middleware=middleware, exception_handlers=exception_handlers, lifespan=lifespan)
+
+
+app = create_asgi_app()
@@ -0,0 +1,90 @@
+"""
+Compare throughput and tail latency of `GET /tasks` between the waitress and ASGI servers
+at increasing client concurrency.
+
+Start both servers against the same database, e.g.:
+
+    waitress-serve --port=5000 --threads=16 --call 'main:create_app'
+    uvicorn asgi:app --port 5001
+
+then run:
+
+    python -m benchmarks.asgi_vs_waitress --email someone@example.com --password 'Secret@123' \
+        --target waitress=http://localhost:5000 --target asgi=http://localhost:5001
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+async def login(client, base_url, email, password):
+    response = await client.post(f"{base_url}/auth/login", json={'email': email, 'password': password})
+    response.raise_for_status()
+    return {'Authorization': f"Bearer {response.json()['access_token']}"}
+
+
+async def run_clients(client, url, headers, concurrency, duration):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await client.get(url, headers=headers)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+            except httpx.HTTPError:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else float('nan')
+    median = statistics.median(latencies) if latencies else float('nan')
+    return len(latencies) / elapsed, median, p99, errors
+
+
+async def benchmark(args):
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    async with httpx.AsyncClient(limits=limits, timeout=args.timeout) as client:
+        print(f"{'server':<10} {'clients':>8} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'errors':>8}")
+        for name, base_url in args.target:
+            headers = await login(client, base_url, args.email, args.password)
+            for concurrency in args.concurrency:
+                throughput, median, p99, errors = await run_clients(
+                    client, f"{base_url}/tasks", headers, concurrency, args.duration
+                )
+                print(
+                    f"{name:<10} {concurrency:>8} {throughput:>10.1f} {median * 1000:>10.1f} "
+                    f"{p99 * 1000:>10.1f} {errors:>8}"
+                )
+
+
+def parse_target(value):
+    name, _, url = value.partition('=')
+    if not url:
+        raise argparse.ArgumentTypeError("Targets look like name=http://host:port")
+    return name, url.rstrip('/')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', type=parse_target, action='append', required=True)
+    parser.add_argument('--email', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[50, 500, 5000])
+    parser.add_argument('--duration', type=float, default=20, help="Seconds per concurrency level")
+    parser.add_argument('--timeout', type=float, default=30)
+    asyncio.run(benchmark(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Compare task write throughput under each audit mode (sync, deferred, off).
+
+Saves go through `TaskRepository` over one persistent connection, so the numbers show the cost
+of the statements rather than of connecting. Each mode toggles `completed` on the same set of
+tasks; deferred mode is reported both without and with its final flush. The benchmark's rows
+are deleted afterwards. Run from the flask directory with the app's environment loaded:
+
+    python -m benchmarks.audit_modes --tasks 200 --saves 5000
+"""
+import argparse
+import time
+import uuid
+
+import psycopg2
+from rococo.data.postgresql import PostgreSQLAdapter
+
+from common.app_config import config
+from common.models.task import Task
+from common.repositories import TaskRepository
+from common.repositories.audit import AuditMode, get_audit_writer
+
+
+def connect():
+    return psycopg2.connect(
+        host=config.POSTGRES_HOST,
+        port=int(config.POSTGRES_PORT),
+        user=config.POSTGRES_USER,
+        password=config.POSTGRES_PASSWORD,
+        database=config.POSTGRES_DB,
+    )
+
+
+def get_repository(connection):
+    def close_cursor(adapter):
+        adapter._cursor.close()
+        adapter._cursor = None
+
+    adapter = PostgreSQLAdapter(
+        None, None, None, None, None,
+        connection_resolver=lambda **kwargs: connection, connection_closer=close_cursor
+    )
+    return TaskRepository(adapter, None, '', None)
+
+
+def count_audit_rows(connection, person_id):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM task_audit WHERE person_id = %s", (person_id,))
+        return cursor.fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tasks', type=int, default=200)
+    parser.add_argument('--saves', type=int, default=5000, help="Saves per mode")
+    args = parser.parse_args()
+
+    connection = connect()
+    repository = get_repository(connection)
+    person_id = uuid.uuid4().hex
+
+    repository.audit_mode = AuditMode.OFF
+    tasks = [repository.save(Task(person_id=person_id, title=f"audit benchmark {i}")) for i in range(args.tasks)]
+
+    print(f"{'mode':>10} {'saves/s':>10} {'with flush':>11} {'audit rows':>11}")
+    try:
+        for mode in (AuditMode.SYNC, AuditMode.DEFERRED, AuditMode.OFF):
+            repository.audit_mode = mode
+            audit_rows = count_audit_rows(connection, person_id)
+
+            started = time.perf_counter()
+            for i in range(args.saves):
+                task = tasks[i % len(tasks)]
+                task.completed = not task.completed
+                repository.save(task)
+            saved = time.perf_counter() - started
+            if mode == AuditMode.DEFERRED:
+                get_audit_writer().flush()
+            flushed = time.perf_counter() - started
+
+            written = count_audit_rows(connection, person_id) - audit_rows
+            print(f"{mode.value:>10} {args.saves / saved:>10.1f} {args.saves / flushed:>11.1f} {written:>11}")
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM task_audit WHERE person_id = %s", (person_id,))
+            cursor.execute("DELETE FROM task WHERE person_id = %s", (person_id,))
+        connection.commit()
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+"""
+Microbenchmarks of the per-request auth primitives: JWT generation and parsing, the models built
+from a token, scrypt password hashing, password rules and email validation.
+
+Each case is calibrated to loops of at least --min-time seconds, run for --warmup unrecorded
+loops, then timed for --repeats loops with the garbage collector off (as `timeit` does). The
+median per call is the figure to track, the minimum the noise floor; a spread above a few
+percent means the machine was busy. A separate tracemalloc pass reports the peak memory a
+call allocates and the memory blocks it leaves behind, which should be zero. Run from the
+flask directory with the app's environment loaded:
+
+    python -m benchmarks.auth_primitives --output auth-1.4.0.json --compare auth-1.3.0.json
+"""
+import argparse
+import gc
+import statistics
+import time
+import tracemalloc
+from typing import Callable, NamedTuple
+
+from benchmarks.results import describe_baseline, describe_run, load_results, relative_change, write_results
+from common.helpers.auth import (
+    create_email_from_token, create_person_from_token, generate_access_token, parse_access_token,
+)
+from common.models import Email, LoginMethod, Person
+from rococo.models.login_method import LoginMethodType
+
+PASSWORD = 'Benchmark@Password123'
+
+
+class Case(NamedTuple):
+    name: str
+    # Returns the callable to measure; setup cost stays out of the timings
+    setup: Callable[[], Callable[[], object]]
+
+
+def setup_generate_access_token():
+    person = Person(first_name='Bench', last_name='Mark')
+    email = Email(person_id=person.entity_id, email='bench.mark@example.com', is_verified=True)
+    login_method = LoginMethod(
+        method_type=LoginMethodType.EMAIL_PASSWORD, person_id=person.entity_id, email_id=email.entity_id
+    )
+    return lambda: generate_access_token(login_method, person=person, email=email)
+
+
+def issue_token():
+    return setup_generate_access_token()()[0]
+
+
+def setup_parse_access_token():
+    token = issue_token()
+    return lambda: parse_access_token(token)
+
+
+def setup_parse_invalid_access_token():
+    token = issue_token()
+    tampered = token[:-4] + ('AAAA' if not token.endswith('AAAA') else 'BBBB')
+    return lambda: parse_access_token(tampered)
+
+
+def setup_create_person_from_token():
+    token_data = parse_access_token(issue_token())
+    return lambda: create_person_from_token(token_data)
+
+
+def setup_create_email_from_token():
+    token_data = parse_access_token(issue_token())
+    return lambda: create_email_from_token(token_data)
+
+
+def setup_hash_password():
+    login_method = LoginMethod(method_type=LoginMethodType.EMAIL_PASSWORD)
+
+    def hash_password():
+        # hash_password consumes raw_password, so it is set again on every call
+        login_method.raw_password = PASSWORD
+        login_method.hash_password()
+
+    return hash_password
+
+
+def setup_validate_raw_password():
+    login_method = LoginMethod(method_type=LoginMethodType.EMAIL_PASSWORD)
+    login_method.raw_password = PASSWORD
+    return login_method.validate_raw_password
+
+
+def setup_validate_email():
+    email = Email(email='bench.mark+tag@example.com')
+    return email.validate_email
+
+
+CASES = [
+    Case('generate_access_token', setup_generate_access_token),
+    Case('parse_access_token', setup_parse_access_token),
+    Case('parse_access_token_invalid', setup_parse_invalid_access_token),
+    Case('create_person_from_token', setup_create_person_from_token),
+    Case('create_email_from_token', setup_create_email_from_token),
+    Case('hash_password', setup_hash_password),
+    Case('validate_raw_password', setup_validate_raw_password),
+    Case('validate_email', setup_validate_email),
+]
+
+
+def time_loop(func, loops):
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        started = time.perf_counter_ns()
+        for _ in range(loops):
+            func()
+        return time.perf_counter_ns() - started
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def calibrate(func, min_time):
+    """
+    The number of calls per loop taking at least `min_time` seconds, like `timeit.autorange`.
+    """
+    loops = 1
+    while True:
+        if time_loop(func, loops) >= min_time * 1e9:
+            return loops
+        loops *= 2
+
+
+def measure_allocations(func, calls):
+    """
+    Peak traced bytes of a call, and the blocks still held per call after `calls` calls.
+    """
+    func()  # Lazy imports and caches are not part of the steady state
+    gc.collect()
+    tracemalloc.start()
+    try:
+        peak_bytes = 0
+        for _ in range(calls):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            func()
+            peak_bytes = max(peak_bytes, tracemalloc.get_traced_memory()[1] - before)
+
+        gc.collect()
+        baseline = tracemalloc.take_snapshot()
+        for _ in range(calls):
+            func()
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    # The snapshots' own bookkeeping is not part of the call
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__)]
+    retained = sum(
+        stat.count_diff for stat in after.filter_traces(ignore).compare_to(baseline.filter_traces(ignore), 'filename')
+    )
+    return {
+        'peak_bytes_per_call': peak_bytes,
+        'retained_blocks_per_call': round(retained / calls, 2),
+    }
+
+
+def run_case(case, args):
+    func = case.setup()
+    loops = calibrate(func, args.min_time)
+    for _ in range(args.warmup):
+        time_loop(func, loops)
+    per_call_ns = [time_loop(func, loops) / loops for _ in range(args.repeats)]
+
+    median = statistics.median(per_call_ns)
+    result = {
+        'name': case.name,
+        'loops': loops,
+        'repeats': args.repeats,
+        'median_us': round(median / 1000, 3),
+        'min_us': round(min(per_call_ns) / 1000, 3),
+        'max_us': round(max(per_call_ns) / 1000, 3),
+        # Relative spread of the repeats; above a few percent the figures are noisy
+        'spread': round((max(per_call_ns) - min(per_call_ns)) / median, 4) if median else 0.0,
+        'calls_per_second': round(1e9 / median, 1) if median else None,
+    }
+    result.update(measure_allocations(func, args.allocation_calls))
+    return result
+
+
+def compare(previous_path, results):
+    previous = load_results(previous_path)
+    before = {result['name']: result for result in previous['results']}
+
+    print(f"\nAgainst {describe_baseline(previous)}:")
+    print(f"{'case':<28} {'median':>10} {'min':>10} {'peak bytes':>12}")
+    for result in results:
+        old = before.get(result['name'])
+        if old is None:
+            continue
+        print(
+            f"{result['name']:<28} {relative_change(result['median_us'], old['median_us']):>10} "
+            f"{relative_change(result['min_us'], old['min_us']):>10} "
+            f"{relative_change(result['peak_bytes_per_call'], old['peak_bytes_per_call']):>12}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--case', action='append', choices=[case.name for case in CASES],
+                        help="Run only these cases (repeatable)")
+    parser.add_argument('--repeats', type=int, default=7)
+    parser.add_argument('--warmup', type=int, default=2, help="Unrecorded loops before the timed repeats")
+    parser.add_argument('--min-time', type=float, default=0.2, help="Seconds per timed loop")
+    parser.add_argument('--allocation-calls', type=int, default=20, help="Calls of the tracemalloc pass")
+    parser.add_argument('--output', help="Write the results to this JSON file")
+    parser.add_argument('--compare', help="An earlier result file to compare against")
+    args = parser.parse_args()
+
+    run = describe_run('auth_primitives')
+    results = []
+    print(f"{'case':<28} {'median us':>12} {'min us':>12} {'spread':>8} {'calls/s':>12} {'peak bytes':>12} {'retained':>9}")
+    for case in CASES:
+        if args.case and case.name not in args.case:
+            continue
+        result = run_case(case, args)
+        results.append(result)
+        print(
+            f"{result['name']:<28} {result['median_us']:>12.2f} {result['min_us']:>12.2f} {result['spread']:>8.1%} "
+            f"{result['calls_per_second']:>12.1f} {result['peak_bytes_per_call']:>12} "
+            f"{result['retained_blocks_per_call']:>9}"
+        )
+
+    if args.output:
+        write_results(args.output, {
+            **run,
+            'settings': {
+                'repeats': args.repeats, 'warmup': args.warmup, 'min_time': args.min_time,
+                'allocation_calls': args.allocation_calls,
+            },
+            'results': results,
+        })
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == '__main__':
+    main()
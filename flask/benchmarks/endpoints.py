@@ -0,0 +1,540 @@
+"""
+Benchmark the API endpoints end to end and record latency percentiles for release comparisons.
+
+A throwaway Postgres cluster is created with `initdb` in a temporary directory (its binaries must
+be on PATH or found through `pg_config`), migrated and given its audit partitions like a container
+start does, and removed afterwards; pass --use-configured-database to run against the migrated
+POSTGRES_* database instead. RabbitMQ is replaced in the server process by a stand-in that accepts
+and discards messages, unless --use-configured-broker is given.
+
+The app from `create_app()` is served by waitress in a child process. --persons people are signed
+up, each given --tasks-per-person tasks through /tasks/import, then every scenario runs for
+--duration seconds at each --concurrency level. p50/p95/p99 latency, throughput and errors per
+scenario and level are printed and written to --output with the version, commit and settings;
+--compare prints the change against an earlier result file. Run from the flask directory:
+
+    python -m benchmarks.endpoints --persons 200 --tasks-per-person 100 --concurrency 1 8 32 \\
+        --output endpoints-1.4.0.json --compare endpoints-1.3.0.json
+"""
+import argparse
+import asyncio
+import collections
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional
+
+import httpx
+
+from benchmarks.results import ROOT, describe_baseline, describe_run, load_results, relative_change, write_results
+
+MIGRATIONS_DIR = ROOT / 'flask' / 'app' / 'migrations'
+# What services/postgres/dbVersion.sql sets up before the first migration
+DB_VERSION_SQL = """
+    CREATE TABLE IF NOT EXISTS db_version (version VARCHAR(10) NOT NULL);
+    INSERT INTO db_version (version) SELECT '0000000000' WHERE NOT EXISTS (SELECT 1 FROM db_version);
+"""
+
+# Settings the app requires that are irrelevant to a local benchmark run
+BENCHMARK_ENVIRONMENT = {
+    'APP_ENV': 'benchmark',
+    'RABBITMQ_HOST': 'localhost',
+    'RABBITMQ_PORT': '5672',
+    'RABBITMQ_USER': 'benchmark',
+    'RABBITMQ_PASSWORD': 'benchmark',
+    'AUTH_JWT_SECRET': uuid.uuid4().hex,
+    'VUE_APP_URI': 'http://localhost:8080',
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def find_postgres_binary(name):
+    path = shutil.which(name)
+    if path:
+        return path
+    pg_config = shutil.which('pg_config')
+    if pg_config:
+        bindir = subprocess.run([pg_config, '--bindir'], capture_output=True, text=True, check=True).stdout.strip()
+        candidate = Path(bindir) / name
+        if candidate.exists():
+            return str(candidate)
+    raise SystemExit(f"{name} not found: install the Postgres server or use --use-configured-database")
+
+
+class LocalPostgres:
+    """
+    A Postgres cluster in a temporary directory, listening on 127.0.0.1 with trust authentication.
+    """
+
+    def __init__(self, port, settings=()):
+        self.port = port
+        self.settings = settings
+        self.directory = None
+
+    def __enter__(self):
+        self.directory = tempfile.mkdtemp(prefix='todomvc-benchmark-pg-')
+        data = os.path.join(self.directory, 'data')
+        subprocess.run(
+            [find_postgres_binary('initdb'), '-D', data, '-U', 'benchmark', '--auth=trust', '-E', 'UTF8'],
+            check=True, capture_output=True
+        )
+        options = f"-p {self.port} -k {self.directory} -c listen_addresses=127.0.0.1 -c max_connections=300"
+        options += ''.join(f" -c {setting}" for setting in self.settings)
+        subprocess.run(
+            [find_postgres_binary('pg_ctl'), '-D', data, '-o', options, '-l', os.path.join(self.directory, 'log'),
+             '-w', 'start'],
+            check=True, capture_output=True
+        )
+        return self
+
+    def __exit__(self, *exc_info):
+        subprocess.run(
+            [find_postgres_binary('pg_ctl'), '-D', os.path.join(self.directory, 'data'), '-m', 'fast', '-w', 'stop'],
+            capture_output=True
+        )
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def environment(self):
+        return {
+            'POSTGRES_HOST': '127.0.0.1',
+            'POSTGRES_PORT': str(self.port),
+            'POSTGRES_USER': 'benchmark',
+            'POSTGRES_PASSWORD': 'benchmark',
+            'POSTGRES_DB': 'todomvc_benchmark',
+        }
+
+
+def create_database(environment):
+    import psycopg2
+
+    connection = psycopg2.connect(
+        host=environment['POSTGRES_HOST'], port=int(environment['POSTGRES_PORT']),
+        user=environment['POSTGRES_USER'], database='postgres'
+    )
+    connection.autocommit = True
+    with connection.cursor() as cursor:
+        cursor.execute(f"CREATE DATABASE {environment['POSTGRES_DB']}")
+    connection.close()
+
+
+def migrate():
+    """
+    Runs the forward migrations (as `rococo-postgres rf` does) and the audit partition maintenance.
+    """
+    from rococo.data.postgresql import PostgreSQLAdapter
+    from rococo.migrations.common.migration_runner import MigrationRunner
+    from rococo.migrations.postgres.migration import PostgresMigration
+
+    from common.app_config import config
+    from common.maintenance import get_maintenance_connection, maintain_audit_partitions
+
+    connection = get_maintenance_connection(config)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(DB_VERSION_SQL)
+
+        adapter = PostgreSQLAdapter(
+            host=config.POSTGRES_HOST, port=int(config.POSTGRES_PORT), user=config.POSTGRES_USER,
+            password=config.POSTGRES_PASSWORD, database=config.POSTGRES_DB
+        )
+        sys.path.append(str(MIGRATIONS_DIR))
+        runner = MigrationRunner(str(MIGRATIONS_DIR), PostgresMigration(adapter))
+        runner.run_forward_migration_script(runner.get_db_version())
+
+        maintain_audit_partitions(
+            connection, premake_months=config.AUDIT_PARTITION_PREMAKE_MONTHS, retention_months=0
+        )
+    finally:
+        connection.close()
+
+
+def get_server_version():
+    from common.app_config import config
+    from common.maintenance import get_maintenance_connection
+
+    connection = get_maintenance_connection(config)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SHOW server_version")
+            return cursor.fetchone()[0]
+    finally:
+        connection.close()
+
+
+def install_broker_stand_in():
+    """
+    Makes every RabbitMQ publish of this process a no-op, so broker latency is left out.
+    """
+    from common.tasks.send_message import MessageSender
+    from common.tasks.task_events import TaskEventPublisher
+
+    MessageSender.send_message = lambda self, queue_name, data, properties=None, exchange_name=None: None
+    TaskEventPublisher.publish = lambda self, person_id, event, data: None
+
+
+def serve(port, threads, connection_limit, broker_stand_in):
+    from waitress import serve as waitress_serve
+
+    if broker_stand_in:
+        install_broker_stand_in()
+
+    from app import create_app
+    waitress_serve(
+        create_app(), host='127.0.0.1', port=port, threads=threads, connection_limit=connection_limit, _quiet=True
+    )
+
+
+def wait_until_serving(base_url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"{base_url}/auth/test", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"The app did not start serving on {base_url}")
+
+
+class Person(NamedTuple):
+    email: str
+    headers: dict
+    organization_id: str
+    task_ids: list
+
+
+class State:
+    """
+    What the scenarios share: the seeded people, the tasks created by `tasks_create` (which
+    `tasks_delete` then removes) and a counter for unique signup addresses.
+    """
+
+    def __init__(self, tag, persons, password):
+        self.tag = tag
+        self.persons = persons
+        self.password = password
+        self.created = collections.deque()
+        self.signups = itertools.count()
+
+
+async def call(client, method, path, **kwargs):
+    response = await client.request(method, path, **kwargs)
+    response.raise_for_status()
+    body = response.json()
+    if body.get('success') is False:
+        raise RuntimeError(f"{method} {path}: {body.get('message')}")
+    return body
+
+
+async def seed_person(client, tag, index, tasks_per_person, password):
+    email = f"benchmark-{tag}-{index}@example.com"
+    await call(client, 'POST', '/auth/signup', json={
+        'first_name': 'Benchmark', 'last_name': f"Person {index}", 'email_address': email
+    })
+    body = await call(client, 'POST', '/auth/login', json={'email': email, 'password': password})
+    headers = {'Authorization': f"Bearer {body['access_token']}"}
+
+    organizations = (await call(client, 'GET', '/organization/', headers=headers))['organizations']
+    if tasks_per_person:
+        rows = ''.join(
+            json.dumps({'title': f"benchmark task {i}", 'completed': i % 3 == 0}) + '\n'
+            for i in range(tasks_per_person)
+        )
+        await call(
+            client, 'POST', '/tasks/import', content=rows.encode(),
+            headers={**headers, 'Content-Type': 'application/x-ndjson'}
+        )
+    tasks = (await call(client, 'GET', '/tasks', headers=headers))['tasks']
+    return Person(email, headers, organizations[0]['entity_id'], [task['entity_id'] for task in tasks])
+
+
+async def seed(client, tag, persons, tasks_per_person, password, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def seed_one(index):
+        async with semaphore:
+            return await seed_person(client, tag, index, tasks_per_person, password)
+
+    return await asyncio.gather(*(seed_one(index) for index in range(persons)))
+
+
+class Scenario(NamedTuple):
+    name: str
+    # (state, random person) -> (method, path, request kwargs), or None when there is nothing left to do
+    build: Callable
+    # Called with (state, person, response body) after each successful request
+    record: Optional[Callable] = None
+
+
+def build_signup(state, person):
+    n = next(state.signups)
+    return 'POST', '/auth/signup', {'json': {
+        'first_name': 'Benchmark', 'last_name': f"Signup {n}", 'email_address': f"benchmark-{state.tag}-signup-{n}@example.com"
+    }}
+
+
+def build_login(state, person):
+    return 'POST', '/auth/login', {'json': {'email': person.email, 'password': state.password}}
+
+
+def build_person_update(state, person):
+    return 'PUT', '/person/me', {'headers': person.headers, 'json': {
+        'first_name': 'Benchmark', 'last_name': f"Person {random.randrange(1000)}"
+    }}
+
+
+def build_organization_update(state, person):
+    return 'PUT', '/organization/', {
+        'headers': {**person.headers, 'x-organization-id': person.organization_id},
+        'json': {'name': f"Benchmark organization {random.randrange(1000)}"},
+    }
+
+
+def build_tasks_create(state, person):
+    return 'POST', '/tasks', {'headers': person.headers, 'json': {'title': 'benchmark task'}}
+
+
+def record_tasks_create(state, person, body):
+    state.created.append((person, body['task']['entity_id']))
+
+
+def build_tasks_update(state, person):
+    if not person.task_ids:
+        return None
+    task_id = random.choice(person.task_ids)
+    return 'PUT', f"/tasks/{task_id}", {'headers': person.headers, 'json': {'title': 'renamed benchmark task'}}
+
+
+def build_tasks_complete(state, person):
+    if not person.task_ids:
+        return None
+    task_id = random.choice(person.task_ids)
+    return 'PATCH', f"/tasks/{task_id}/complete", {
+        'headers': person.headers, 'json': {'completed': random.random() < 0.5}
+    }
+
+
+def build_tasks_delete(state, person):
+    # Deletes the tasks created by the tasks_create scenario, so the seeded lists keep their size
+    if not state.created:
+        return None
+    owner, task_id = state.created.popleft()
+    return 'DELETE', f"/tasks/{task_id}", {'headers': owner.headers}
+
+
+SCENARIOS = [
+    Scenario('login', build_login),
+    Scenario('person_me', lambda state, person: ('GET', '/person/me', {'headers': person.headers})),
+    Scenario('person_update', build_person_update),
+    Scenario('organization_list', lambda state, person: ('GET', '/organization/', {'headers': person.headers})),
+    Scenario('organization_update', build_organization_update),
+    Scenario('tasks_list', lambda state, person: ('GET', '/tasks', {'headers': person.headers})),
+    Scenario('tasks_create', build_tasks_create, record_tasks_create),
+    Scenario('tasks_update', build_tasks_update),
+    Scenario('tasks_complete', build_tasks_complete),
+    Scenario('tasks_delete', build_tasks_delete),
+    Scenario('signup', build_signup),
+]
+
+
+def percentile(ordered, q):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+async def run_scenario(client, state, scenario, concurrency, duration):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            person = random.choice(state.persons)
+            request = scenario.build(state, person)
+            if request is None:
+                return
+            method, path, kwargs = request
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                elapsed = time.perf_counter() - started
+                body = response.json()
+            except (httpx.HTTPError, ValueError):
+                errors += 1
+                continue
+            if response.status_code >= 400 or body.get('success') is False:
+                errors += 1
+                continue
+            latencies.append(elapsed)
+            if scenario.record:
+                scenario.record(state, person, body)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    result = {
+        'scenario': scenario.name,
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'throughput': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+    }
+    for name, q in (('p50_ms', 50), ('p95_ms', 95), ('p99_ms', 99), ('max_ms', 100)):
+        # None rather than NaN, which is not valid JSON
+        result[name] = round(percentile(latencies, q) * 1000, 3) if latencies else None
+    return result
+
+
+def format_ms(value):
+    return f"{value:>10.1f}" if value is not None else f"{'-':>10}"
+
+
+async def benchmark(args, base_url):
+    from common.app_config import config
+
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        tag = uuid.uuid4().hex[:8]
+        started = time.perf_counter()
+        persons = await seed(
+            client, tag, args.persons, args.tasks_per_person, config.DEFAULT_USER_PASSWORD, args.seed_concurrency
+        )
+        print(f"Seeded {args.persons} persons with {args.tasks_per_person} tasks each "
+              f"in {time.perf_counter() - started:.1f}s")
+
+        state = State(tag, persons, config.DEFAULT_USER_PASSWORD)
+        results = []
+        print(f"{'scenario':<20} {'clients':>8} {'req/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'errors':>8}")
+        for scenario in SCENARIOS:
+            if args.scenario and scenario.name not in args.scenario:
+                continue
+            for concurrency in args.concurrency:
+                if args.warmup:
+                    await run_scenario(client, state, scenario, concurrency, args.warmup)
+                result = await run_scenario(client, state, scenario, concurrency, args.duration)
+                results.append(result)
+                print(
+                    f"{scenario.name:<20} {concurrency:>8} {result['throughput']:>10.1f} {format_ms(result['p50_ms'])} "
+                    f"{format_ms(result['p95_ms'])} {format_ms(result['p99_ms'])} {result['errors']:>8}"
+                )
+        return results
+
+
+def compare(previous_path, results):
+    previous = load_results(previous_path)
+    before = {(result['scenario'], result['concurrency']): result for result in previous['results']}
+
+    print(f"\nAgainst {describe_baseline(previous)}:")
+    print(f"{'scenario':<20} {'clients':>8} {'req/s':>10} {'p95':>10} {'p99':>10}")
+    for result in results:
+        old = before.get((result['scenario'], result['concurrency']))
+        if old is None:
+            continue
+        print(
+            f"{result['scenario']:<20} {result['concurrency']:>8} {relative_change(result['throughput'], old['throughput']):>10} "
+            f"{relative_change(result['p95_ms'], old['p95_ms']):>10} {relative_change(result['p99_ms'], old['p99_ms']):>10}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--persons', type=int, default=100)
+    parser.add_argument('--tasks-per-person', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--duration', type=float, default=10, help="Seconds per scenario and concurrency level")
+    parser.add_argument('--warmup', type=float, default=2, help="Unrecorded seconds before each measurement")
+    parser.add_argument('--scenario', action='append', choices=[scenario.name for scenario in SCENARIOS],
+                        help="Run only these scenarios (repeatable)")
+    parser.add_argument('--threads', type=int, default=16, help="Waitress threads of the app")
+    parser.add_argument('--seed-concurrency', type=int, default=8)
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--postgres-setting', action='append', default=[],
+                        help="Extra setting for the local cluster, e.g. shared_buffers=512MB (repeatable)")
+    parser.add_argument('--use-configured-database', action='store_true',
+                        help="Use the (already migrated) POSTGRES_* database instead of a local cluster")
+    parser.add_argument('--use-configured-broker', action='store_true',
+                        help="Publish to the configured RabbitMQ instead of the stand-in")
+    parser.add_argument('--output', default='benchmark-endpoints.json')
+    parser.add_argument('--compare', help="An earlier result file to compare against")
+    args = parser.parse_args()
+
+    # The app reads its configuration on import, so the environment is settled first.
+    for name, value in BENCHMARK_ENVIRONMENT.items():
+        os.environ.setdefault(name, value)
+    if os.environ['APP_ENV'] == 'production':
+        raise SystemExit("Refusing to run with APP_ENV=production: seeded users could not log in.")
+
+    database = None
+    if not args.use_configured_database:
+        database = LocalPostgres(free_port(), args.postgres_setting).__enter__()
+        os.environ.update(database.environment())
+        create_database(database.environment())
+
+    server = None
+    try:
+        if database:
+            migrate()
+        postgres_version = get_server_version()
+
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = multiprocessing.get_context('fork').Process(
+            target=serve, args=(port, args.threads, max(100, max(args.concurrency) * 2), not args.use_configured_broker),
+            daemon=True
+        )
+        server.start()
+        wait_until_serving(base_url)
+
+        run = describe_run('endpoints')
+        results = asyncio.run(benchmark(args, base_url))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.join()
+        if database:
+            database.__exit__(None, None, None)
+
+    report = {
+        **run,
+        'postgres': postgres_version,
+        'settings': {
+            'persons': args.persons,
+            'tasks_per_person': args.tasks_per_person,
+            'duration': args.duration,
+            'warmup': args.warmup,
+            'threads': args.threads,
+            'database': 'configured' if args.use_configured_database else 'local',
+            'broker': 'configured' if args.use_configured_broker else 'stand-in',
+            'postgres_settings': args.postgres_setting,
+        },
+        'results': results,
+    }
+    write_results(args.output, report)
+
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Measure how `GET /person/me` throughput scales with the launcher's worker count.
+
+The endpoint only verifies the JWT and serializes the person, so it needs no database and shows
+the CPU-bound request path. Each worker count starts its own launcher; run from the flask
+directory with the app's environment loaded:
+
+    python -m benchmarks.prefork_scaling --workers 1 2 4 8 --clients 64 --duration 15
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import time
+
+from common.helpers.auth import generate_access_token
+from common.models import LoginMethod
+
+
+def wait_until_serving(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/person/me')
+            connection.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Launcher did not start serving on port {port}")
+
+
+def client_process(port, headers, connections, duration, results):
+    connections = [http.client.HTTPConnection('127.0.0.1', port, timeout=30) for _ in range(connections)]
+    deadline = time.perf_counter() + duration
+    completed = 0
+    while time.perf_counter() < deadline:
+        # Pipelining is not available, so each connection issues one request per round.
+        for connection in connections:
+            connection.request('GET', '/person/me', headers=headers)
+        for connection in connections:
+            response = connection.getresponse()
+            response.read()
+            if response.status == 200:
+                completed += 1
+    results.put(completed)
+
+
+def measure(port, headers, clients, client_processes, duration):
+    results = multiprocessing.Queue()
+    per_process = max(1, clients // client_processes)
+    processes = [
+        multiprocessing.Process(target=client_process, args=(port, headers, per_process, duration, results))
+        for _ in range(client_processes)
+    ]
+    for process in processes:
+        process.start()
+    completed = sum(results.get() for _ in processes)
+    for process in processes:
+        process.join()
+    return completed / duration
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--clients', type=int, default=64, help="Concurrent keep-alive connections")
+    parser.add_argument('--client-processes', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=15, help="Seconds per worker count")
+    parser.add_argument('--port', type=int, default=5099)
+    args = parser.parse_args()
+
+    token, _ = generate_access_token(LoginMethod(person_id='0' * 32, email_id='0' * 32))
+    headers = {'Authorization': f'Bearer {token}'}
+
+    baseline = None
+    print(f"{'workers':>8} {'req/s':>10} {'speedup':>8}")
+    for workers in args.workers:
+        launcher = subprocess.Popen(
+            [sys.executable, 'launcher.py', '--bind', f'127.0.0.1:{args.port}', '--workers', str(workers)],
+            stdout=subprocess.DEVNULL,
+            env={**os.environ, 'LAUNCHER_STATS_INTERVAL': '0'},
+        )
+        try:
+            wait_until_serving(args.port)
+            throughput = measure(args.port, headers, args.clients, args.client_processes, args.duration)
+        finally:
+            launcher.send_signal(signal.SIGTERM)
+            launcher.wait()
+
+        baseline = baseline or throughput
+        print(f"{workers:>8} {throughput:>10.1f} {throughput / baseline:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
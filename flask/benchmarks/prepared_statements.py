@@ -0,0 +1,169 @@
+"""
+Compare the hot repository lookups sent as plain statements and as server-side prepared ones.
+
+The lookups run through the repositories exactly as the services issue them: a person and an
+email by id or address, the login method of an email, a person's role in an organization and a
+person's active tasks. Each is timed for --queries calls on one connection with prepared
+statements off and then on, for random rows of the configured (migrated, ideally seeded with
+`seed.py`) database, after --warmup calls. A second pass runs EXPLAIN ANALYZE on --explains of
+the statements in both modes and reports the median planning time Postgres spent on them. Run
+from the flask directory with the app's environment loaded:
+
+    python -m benchmarks.prepared_statements --queries 5000 --output prepared-1.4.0.json
+"""
+import argparse
+import random
+import statistics
+import time
+from typing import Callable, NamedTuple
+
+import psycopg2
+
+from benchmarks.results import describe_run, relative_change, write_results
+from common.app_config import config
+from common.repositories import (
+    EmailRepository, LoginMethodRepository, PersonOrganizationRoleRepository, PersonRepository, TaskRepository,
+)
+from common.repositories.adapter import TimedPostgreSQLAdapter
+
+MODES = {'plain': 0, 'prepared': 1}
+
+
+class Case(NamedTuple):
+    name: str
+    # Runs the lookup for one sampled row
+    lookup: Callable[[dict, tuple], object]
+    # Rows of the database to sample the lookups from
+    sample_sql: str
+
+
+CASES = [
+    Case('person_by_id', lambda repos, row: repos['person'].get_one({'entity_id': row[0]}),
+         "SELECT entity_id FROM person WHERE active"),
+    Case('email_by_address', lambda repos, row: repos['email'].get_one({'email': row[0]}),
+         "SELECT email FROM email WHERE active"),
+    Case('login_method_by_email', lambda repos, row: repos['login_method'].get_one({'email_id': row[0]}),
+         "SELECT email_id FROM login_method WHERE active AND email_id IS NOT NULL"),
+    Case('role_by_person_and_organization',
+         lambda repos, row: repos['role'].get_one({'person_id': row[0], 'organization_id': row[1]}),
+         "SELECT person_id, organization_id FROM person_organization_role WHERE active"),
+    Case('tasks_by_person', lambda repos, row: repos['task'].get_many({'person_id': row[0], 'active': True}),
+         "SELECT DISTINCT person_id FROM task WHERE active"),
+]
+
+
+def connect():
+    connection = psycopg2.connect(
+        host=config.POSTGRES_HOST,
+        port=int(config.POSTGRES_PORT),
+        user=config.POSTGRES_USER,
+        password=config.POSTGRES_PASSWORD,
+        database=config.POSTGRES_DB,
+    )
+    connection.autocommit = True
+    return connection
+
+
+def get_repositories(connection):
+    """
+    Repositories sharing one connection that stays open, like a request's pooled connection.
+    """
+    adapter = TimedPostgreSQLAdapter(
+        None, None, None, None, None,
+        connection_resolver=lambda **kwargs: connection, connection_closer=lambda adapter: None,
+    )
+    repositories = {
+        'person': PersonRepository, 'email': EmailRepository, 'login_method': LoginMethodRepository,
+        'role': PersonOrganizationRoleRepository, 'task': TaskRepository,
+    }
+    return adapter, {name: repository(adapter, None, '') for name, repository in repositories.items()}
+
+
+def sample_rows(connection, sql, size):
+    with connection.cursor() as cursor:
+        cursor.execute(f"{sql} LIMIT %s", (size * 10,))
+        rows = cursor.fetchall()
+    return random.sample(rows, min(size, len(rows)))
+
+
+def time_lookups(case, repositories, rows, calls):
+    latencies = []
+    for _ in range(calls):
+        row = random.choice(rows)
+        started = time.perf_counter()
+        case.lookup(repositories, row)
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95)]
+
+
+def planning_time(case, connection, adapter, repositories, rows, explains):
+    """
+    Median planning time of the lookup's statement, as last sent by the adapter's cursor: with its
+    parameters inlined, or after the warm-up as the EXECUTE of the prepared statement.
+    """
+    times = []
+    with connection.cursor() as cursor:
+        for row in random.sample(rows, min(explains, len(rows))):
+            case.lookup(repositories, row)
+            cursor.execute(f"EXPLAIN (ANALYZE, SUMMARY, FORMAT JSON) {adapter._cursor.query.decode()}")
+            times.append(cursor.fetchone()[0][0]['Planning Time'])
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--case', action='append', choices=[case.name for case in CASES],
+                        help="Run only these cases (repeatable)")
+    parser.add_argument('--rows', type=int, default=1000, help="Rows sampled per case")
+    parser.add_argument('--queries', type=int, default=5000)
+    parser.add_argument('--warmup', type=int, default=500)
+    parser.add_argument('--explains', type=int, default=50)
+    parser.add_argument('--output', help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    run = describe_run('prepared_statements')
+    results = []
+    print(f"{'case':<32} {'mode':>9} {'p50 ms':>8} {'p95 ms':>8} {'plan ms':>8}")
+    for case in CASES:
+        if args.case and case.name not in args.case:
+            continue
+        sample_connection = connect()
+        try:
+            rows = sample_rows(sample_connection, case.sample_sql, args.rows)
+        finally:
+            sample_connection.close()
+        if not rows:
+            print(f"{case.name:<32} no rows to sample; seed the database first")
+            continue
+
+        result = {'name': case.name}
+        for mode, threshold in MODES.items():
+            config.PREPARED_STATEMENTS_THRESHOLD = threshold
+            # A fresh connection per mode, so the plain run has no prepared statement to reuse
+            connection = connect()
+            try:
+                adapter, repositories = get_repositories(connection)
+                time_lookups(case, repositories, rows, args.warmup)
+                p50, p95 = time_lookups(case, repositories, rows, args.queries)
+                plan = planning_time(case, connection, adapter, repositories, rows, args.explains)
+            finally:
+                connection.close()
+            result[mode] = {'p50_ms': p50 * 1000, 'p95_ms': p95 * 1000, 'planning_ms': plan}
+            print(f"{case.name:<32} {mode:>9} {p50 * 1000:>8.3f} {p95 * 1000:>8.3f} {plan:>8.3f}")
+        print(f"{'':<32} {'change':>9} {relative_change(result['prepared']['p50_ms'], result['plain']['p50_ms']):>8} "
+              f"{relative_change(result['prepared']['p95_ms'], result['plain']['p95_ms']):>8} "
+              f"{relative_change(result['prepared']['planning_ms'], result['plain']['planning_ms']):>8}")
+        results.append(result)
+
+    if args.output:
+        write_results(args.output, {
+            **run,
+            'settings': {'rows': args.rows, 'queries': args.queries, 'warmup': args.warmup,
+                         'explains': args.explains},
+            'results': results,
+        })
+
+
+if __name__ == '__main__':
+    main()
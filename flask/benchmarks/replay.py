@@ -0,0 +1,337 @@
+"""
+Replay captured traffic (TRAFFIC_CAPTURE_ENABLED) against a test instance and compare latencies.
+
+The records of all capture files are merged in start time order and re-issued on their original
+schedule, compressed by --speed (2 replays twice as fast). Recorded people are mapped, in order
+of first appearance, onto the accounts in --accounts (JSONL of {"email": ..., "password": ...})
+or onto accounts signed up on the target with --create-accounts (their password is the default
+one of a non-production instance). Every recorded task is created for its person before the
+replay starts, recorded organizations become the person's own, and bodies are synthesized from
+their recorded shape, so the same capture always replays as the same requests. Event streams,
+OAuth exchanges and password resets cannot be reproduced and are skipped.
+
+Per route, the replayed latency percentiles are shown next to the recorded ones. Recorded times
+are server-side, so the replay adds the network and client; compare two replays with --compare
+for a like-for-like release comparison:
+
+    python -m benchmarks.replay traffic/traffic-*.jsonl* --base-url http://localhost:5001 \\
+        --create-accounts --speed 2 --output replay-1.4.0.json --compare replay-1.3.0.json
+"""
+import argparse
+import asyncio
+import collections
+import glob
+import json
+import math
+import re
+import statistics
+import time
+import uuid
+
+import httpx
+
+from benchmarks.results import describe_baseline, describe_run, load_results, relative_change, write_results
+
+SKIPPED_ROUTES = {'/tasks/events', '/auth/<string:provider>/exchange', '/auth/reset_password/<string:token>/<string:uidb64>'}
+DEFAULT_PASSWORD = 'Default@Password123'
+
+_PATH_ARG = re.compile(r'<(?:[^:<>]+:)?([^<>]+)>')
+
+
+def load_records(patterns, limit=None):
+    paths = sorted({path for pattern in patterns for path in glob.glob(pattern)})
+    records = []
+    for path in paths:
+        with open(path) as fp:
+            records.extend(json.loads(line) for line in fp if line.strip())
+    # Stable, so records of the same instant keep their file order
+    records.sort(key=lambda record: record['ts'])
+    return records[:limit] if limit else records, paths
+
+
+def synthesize(shape):
+    """
+    A value of the recorded shape: strings of their recorded length, false, zero, null.
+    """
+    if isinstance(shape, dict):
+        if 'list' in shape and 'item' in shape:
+            return [synthesize(shape['item']) for _ in range(shape['list'])]
+        return {key: synthesize(item) for key, item in shape.items()}
+    if isinstance(shape, str) and shape.startswith('str:'):
+        return 'x' * int(shape[4:])
+    return {'bool': False, 'number': 0}.get(shape)
+
+
+def synthesize_import(content_type, size):
+    """
+    An NDJSON or CSV task import of about `size` bytes.
+    """
+    if content_type == 'text/csv':
+        lines = ['title,completed']
+        line = 'replayed task,false'
+    else:
+        lines = []
+        line = json.dumps({'title': 'replayed task', 'completed': False})
+    lines.extend([line] * max(1, size // (len(line) + 1)))
+    return ('\n'.join(lines) + '\n').encode()
+
+
+class Account:
+
+    def __init__(self, email, password):
+        self.email = email
+        self.password = password
+        self.headers = {}
+        self.organization_id = None
+
+
+class Replay:
+    """
+    Turns records into requests against the target, mapping the recorded people, tasks and
+    organizations onto the target's own.
+    """
+
+    def __init__(self, accounts, run_tag):
+        self.accounts = accounts
+        self.run_tag = run_tag
+        self.person_accounts = {}
+        self.task_ids = {}
+        self.signups = 0
+
+    def account_for(self, person):
+        if person is None:
+            return self.accounts[0]
+        if person not in self.person_accounts:
+            self.person_accounts[person] = self.accounts[len(self.person_accounts) % len(self.accounts)]
+        return self.person_accounts[person]
+
+    def build(self, record):
+        account = self.account_for(record['person'])
+        route = record['route']
+        args = dict(record['path_args'])
+        if 'task_id' in args:
+            args['task_id'] = self.task_ids[(record['person'], args['task_id'])]
+        path = _PATH_ARG.sub(lambda match: args[match.group(1)], route)
+
+        headers = dict(account.headers) if record['person'] else {}
+        if record.get('organization') and account.organization_id:
+            headers['x-organization-id'] = account.organization_id
+        params = {name: synthesize(value) if str(value).startswith('str:') else value
+                  for name, value in record['query'].items()}
+
+        kwargs = {'headers': headers, 'params': params}
+        body = record.get('body')
+        if route == '/auth/login':
+            # A failed login has no person; it is replayed as a wrong password, which costs the same hash check
+            password = account.password if record['person'] else account.password + 'wrong'
+            kwargs['json'] = {'email': account.email, 'password': password}
+        elif route == '/auth/signup':
+            self.signups += 1
+            kwargs['json'] = {
+                **synthesize(body or {}), 'email_address': f"replay-{self.run_tag}-{self.signups}@example.com"
+            }
+        elif route == '/auth/forgot_password':
+            kwargs['json'] = {'email': account.email}
+        elif isinstance(body, dict) and set(body) == {'bytes'}:
+            kwargs['content'] = synthesize_import(record.get('content_type'), body['bytes'])
+            headers['Content-Type'] = record.get('content_type') or 'application/octet-stream'
+        elif body is not None:
+            kwargs['json'] = synthesize(body)
+        return record['method'], path, kwargs
+
+
+async def call(client, method, path, **kwargs):
+    response = await client.request(method, path, **kwargs)
+    response.raise_for_status()
+    body = response.json()
+    if body.get('success') is False:
+        raise RuntimeError(f"{method} {path}: {body.get('message')}")
+    return body
+
+
+async def prepare(client, replay, records, create_accounts):
+    """
+    Signs the accounts in and creates the recorded tasks, before anything is timed.
+    """
+    # In order of first appearance
+    persons = list(dict.fromkeys(record['person'] for record in records if record['person']))
+    if create_accounts:
+        for index in range(max(1, len(persons)) - len(replay.accounts)):
+            email = f"replay-{replay.run_tag}-account-{index}@example.com"
+            await call(client, 'POST', '/auth/signup', json={
+                'first_name': 'Replay', 'last_name': f"Account {index}", 'email_address': email
+            })
+            replay.accounts.append(Account(email, DEFAULT_PASSWORD))
+    if not replay.accounts:
+        raise SystemExit("No accounts to replay with: pass --accounts or --create-accounts")
+
+    for account in replay.accounts:
+        body = await call(client, 'POST', '/auth/login', json={'email': account.email, 'password': account.password})
+        account.headers = {'Authorization': f"Bearer {body['access_token']}"}
+        organizations = (await call(client, 'GET', '/organization/', headers=account.headers))['organizations']
+        account.organization_id = organizations[0]['entity_id'] if organizations else None
+
+    for person in persons:
+        replay.account_for(person)
+    for record in records:
+        task_id = record['path_args'].get('task_id')
+        if task_id and (record['person'], task_id) not in replay.task_ids:
+            account = replay.account_for(record['person'])
+            body = await call(client, 'POST', '/tasks', headers=account.headers, json={'title': 'replayed task'})
+            replay.task_ids[(record['person'], task_id)] = body['task']['entity_id']
+    return len(persons)
+
+
+async def run_replay(client, replay, records, speed, max_in_flight):
+    results = collections.defaultdict(lambda: {'latencies': [], 'errors': 0, 'status_mismatches': 0})
+    in_flight = asyncio.Semaphore(max_in_flight)
+    pending = set()
+    max_lag = 0.0
+
+    async def issue(record):
+        key = f"{record['method']} {record['route']}"
+        method, path, kwargs = replay.build(record)
+        try:
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                latency = time.perf_counter() - started
+            except httpx.HTTPError:
+                results[key]['errors'] += 1
+                return
+            results[key]['latencies'].append(latency)
+            if response.status_code != record['status']:
+                results[key]['status_mismatches'] += 1
+        finally:
+            in_flight.release()
+
+    first_ts = records[0]['ts']
+    started = time.perf_counter()
+    for record in records:
+        due = started + (record['ts'] - first_ts) / speed
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await in_flight.acquire()
+        max_lag = max(max_lag, time.perf_counter() - due)
+        task = asyncio.create_task(issue(record))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+    if pending:
+        await asyncio.gather(*pending)
+    return results, time.perf_counter() - started, max_lag
+
+
+def percentile(ordered, q):
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)] if ordered else None
+
+
+def summarize(records, results):
+    recorded = collections.defaultdict(list)
+    for record in records:
+        recorded[f"{record['method']} {record['route']}"].append(record['duration_ms'])
+
+    routes = []
+    for key in sorted(results):
+        replayed = sorted(latency * 1000 for latency in results[key]['latencies'])
+        original = sorted(recorded[key])
+        summary = {
+            'route': key,
+            'requests': len(original),
+            'errors': results[key]['errors'],
+            'status_mismatches': results[key]['status_mismatches'],
+            'recorded_p50_ms': percentile(original, 50),
+            'recorded_p95_ms': percentile(original, 95),
+            'replayed_p50_ms': percentile(replayed, 50),
+            'replayed_p95_ms': percentile(replayed, 95),
+            'replayed_p99_ms': percentile(replayed, 99),
+            'replayed_mean_ms': round(statistics.fmean(replayed), 3) if replayed else None,
+        }
+        routes.append({name: round(value, 3) if isinstance(value, float) else value for name, value in summary.items()})
+    return routes
+
+
+def compare(previous_path, routes):
+    previous = load_results(previous_path)
+    before = {route['route']: route for route in previous['routes']}
+
+    print(f"\nAgainst {describe_baseline(previous)}:")
+    print(f"{'route':<48} {'p50':>10} {'p95':>10} {'p99':>10}")
+    for route in routes:
+        old = before.get(route['route'])
+        if old is None:
+            continue
+        print(
+            f"{route['route']:<48} {relative_change(route['replayed_p50_ms'], old['replayed_p50_ms']):>10} "
+            f"{relative_change(route['replayed_p95_ms'], old['replayed_p95_ms']):>10} "
+            f"{relative_change(route['replayed_p99_ms'], old['replayed_p99_ms']):>10}"
+        )
+
+
+def load_accounts(path):
+    with open(path) as fp:
+        return [Account(entry['email'], entry['password']) for entry in map(json.loads, fp) if entry]
+
+
+async def main_async(args):
+    records, paths = load_records(args.capture, args.limit)
+    skipped = sum(record['route'] in SKIPPED_ROUTES for record in records)
+    records = [record for record in records if record['route'] not in SKIPPED_ROUTES]
+    if not records:
+        raise SystemExit("No replayable records in the capture files")
+
+    replay = Replay(load_accounts(args.accounts) if args.accounts else [], uuid.uuid4().hex[:8])
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        persons = await prepare(client, replay, records, args.create_accounts)
+        print(f"Replaying {len(records)} records ({skipped} skipped) of {persons} people "
+              f"onto {len(replay.accounts)} accounts at {args.speed}x")
+        results, elapsed, max_lag = await run_replay(client, replay, records, args.speed, args.max_in_flight)
+
+    routes = summarize(records, results)
+    print(f"{'route':<48} {'requests':>8} {'rec p50':>9} {'p50':>9} {'rec p95':>9} {'p95':>9} {'p99':>9} {'errors':>7}")
+    for route in routes:
+        print(
+            f"{route['route']:<48} {route['requests']:>8} {route['recorded_p50_ms'] or 0:>9.1f} "
+            f"{route['replayed_p50_ms'] or 0:>9.1f} {route['recorded_p95_ms'] or 0:>9.1f} "
+            f"{route['replayed_p95_ms'] or 0:>9.1f} {route['replayed_p99_ms'] or 0:>9.1f} "
+            f"{route['errors'] + route['status_mismatches']:>7}"
+        )
+    recorded_seconds = records[-1]['ts'] - records[0]['ts']
+    print(f"\n{elapsed:.1f}s for {recorded_seconds / args.speed:.1f}s of scheduled traffic, "
+          f"max lag behind schedule {max_lag * 1000:.0f} ms")
+    return paths, routes, elapsed, max_lag, skipped
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('capture', nargs='+', help="Capture files or glob patterns")
+    parser.add_argument('--base-url', default='http://localhost:5000')
+    parser.add_argument('--accounts', help="JSONL file of {email, password} to replay people onto")
+    parser.add_argument('--create-accounts', action='store_true',
+                        help="Sign up as many accounts as recorded people, beyond those in --accounts")
+    parser.add_argument('--speed', type=float, default=1.0, help="Schedule speed-up (1 is the original pace)")
+    parser.add_argument('--max-in-flight', type=int, default=256, help="Most concurrent requests")
+    parser.add_argument('--limit', type=int, help="Replay only the first N records")
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--output', help="Write the results to this JSON file")
+    parser.add_argument('--compare', help="An earlier replay result file to compare against")
+    args = parser.parse_args()
+
+    run = describe_run('replay')
+    paths, routes, elapsed, max_lag, skipped = asyncio.run(main_async(args))
+    if args.output:
+        write_results(args.output, {
+            **run,
+            'settings': {'capture': paths, 'speed': args.speed, 'max_in_flight': args.max_in_flight, 'limit': args.limit},
+            'seconds': round(elapsed, 3),
+            'max_lag_ms': round(max_lag * 1000, 1),
+            'skipped': skipped,
+            'routes': routes,
+        })
+    if args.compare:
+        compare(args.compare, routes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+"""
+Shared by the benchmarks that write JSON result files, so runs of different releases can be compared.
+"""
+import json
+import os
+import platform
+import subprocess
+from configparser import ConfigParser
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+
+
+def get_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def get_version():
+    parser = ConfigParser()
+    parser.read(ROOT / 'flask' / 'pyproject.toml')
+    return parser['tool.poetry']['version'].strip('"') if parser.has_section('tool.poetry') else None
+
+
+def describe_run(benchmark: str) -> dict:
+    """
+    What a result depends on besides the code: version, commit, interpreter and machine.
+    """
+    return {
+        'benchmark': benchmark,
+        'version': get_version(),
+        'commit': get_commit(),
+        'started_at': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def write_results(path, report: dict):
+    with open(path, 'w') as fp:
+        json.dump(report, fp, indent=2)
+    print(f"\nResults written to {path}")
+
+
+def load_results(path) -> dict:
+    with open(path) as fp:
+        return json.load(fp)
+
+
+def describe_baseline(previous: dict) -> str:
+    return f"{previous.get('version')} ({(previous.get('commit') or 'unknown commit')[:12]}, {previous.get('started_at')})"
+
+
+def relative_change(new, old) -> str:
+    return f"{(new - old) / old * 100:+.1f}%" if new is not None and old else 'n/a'
@@ -0,0 +1,76 @@
+"""
+Check that identical concurrent `GET /tasks` requests share one database query on a running API
+(`tests/test_single_flight.py` covers the coalescing itself).
+
+Fires `--requests` simultaneous identical requests at a running API, in rounds, and reads the
+worker's single-flight counters from `GET /cache/stats` before and after each round. Run against
+a single worker so every request lands on the same counters, e.g.:
+
+    WEB_CONCURRENCY=1 python launcher.py --bind 127.0.0.1:5000
+
+then:
+
+    python -m benchmarks.single_flight --base-url http://localhost:5000 \
+        --email someone@example.com --password 'Secret@123' --requests 32
+"""
+import argparse
+import threading
+import time
+
+import requests
+
+
+def login(base_url, email, password):
+    response = requests.post(f"{base_url}/auth/login", json={'email': email, 'password': password})
+    response.raise_for_status()
+    return {'Authorization': f"Bearer {response.json()['access_token']}"}
+
+
+def task_list_counters(base_url, headers):
+    response = requests.get(f"{base_url}/cache/stats", headers=headers)
+    response.raise_for_status()
+    return response.json()['single_flights'].get('task_list', {'calls': 0, 'coalesced': 0})
+
+
+def fire_simultaneously(base_url, headers, count):
+    barrier = threading.Barrier(count)
+    statuses = []
+
+    def request():
+        session = requests.Session()
+        barrier.wait()
+        statuses.append(session.get(f"{base_url}/tasks", headers=headers).status_code)
+
+    threads = [threading.Thread(target=request) for _ in range(count)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return statuses, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://localhost:5000')
+    parser.add_argument('--email', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--requests', type=int, default=32, help="Simultaneous identical requests per round")
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    headers = login(args.base_url, args.email, args.password)
+    print(f"{'round':>5} {'requests':>9} {'queries':>8} {'coalesced':>10} {'elapsed ms':>11}")
+    for round_number in range(1, args.rounds + 1):
+        before = task_list_counters(args.base_url, headers)
+        statuses, elapsed = fire_simultaneously(args.base_url, headers, args.requests)
+        after = task_list_counters(args.base_url, headers)
+
+        assert all(status == 200 for status in statuses), statuses
+        calls = after['calls'] - before['calls']
+        coalesced = after['coalesced'] - before['coalesced']
+        print(f"{round_number:>5} {calls:>9} {calls - coalesced:>8} {coalesced:>10} {elapsed * 1000:>11.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Compare task creation throughput of `POST /tasks/import` against one `POST /tasks` per row.
+
+Run against a running API, e.g.:
+
+    python -m benchmarks.task_import --base-url http://localhost:5000 \
+        --email someone@example.com --password 'Secret@123' --rows 20000
+"""
+import argparse
+import json
+import time
+
+import requests
+
+
+def login(base_url, email, password):
+    response = requests.post(f"{base_url}/auth/login", json={'email': email, 'password': password})
+    response.raise_for_status()
+    return {'Authorization': f"Bearer {response.json()['access_token']}"}
+
+
+def per_request_rows_per_second(base_url, headers, rows):
+    session = requests.Session()
+    started = time.perf_counter()
+    for i in range(rows):
+        session.post(f"{base_url}/tasks", json={'title': f"benchmark task {i}"}, headers=headers).raise_for_status()
+    return rows / (time.perf_counter() - started)
+
+
+def import_rows_per_second(base_url, headers, rows):
+    body = ''.join(json.dumps({'title': f"imported task {i}", 'completed': i % 3 == 0}) + '\n' for i in range(rows))
+    started = time.perf_counter()
+    response = requests.post(
+        f"{base_url}/tasks/import",
+        data=body.encode(),
+        headers={**headers, 'Content-Type': 'application/x-ndjson'}
+    )
+    response.raise_for_status()
+    elapsed = time.perf_counter() - started
+    result = response.json()
+    assert result['accepted'] == rows, result
+    return rows / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--base-url', default='http://localhost:5000')
+    parser.add_argument('--email', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--rows', type=int, default=20000, help="Rows loaded through /tasks/import")
+    parser.add_argument('--per-request-rows', type=int, default=500, help="Rows created through POST /tasks")
+    args = parser.parse_args()
+
+    headers = login(args.base_url, args.email, args.password)
+
+    per_request = per_request_rows_per_second(args.base_url, headers, args.per_request_rows)
+    bulk = import_rows_per_second(args.base_url, headers, args.rows)
+
+    print(f"POST /tasks:        {per_request:10.1f} rows/s ({args.per_request_rows} rows)")
+    print(f"POST /tasks/import: {bulk:10.1f} rows/s ({args.rows} rows)")
+    print(f"Speed-up:           {bulk / per_request:10.1f}x")
+
+
+if __name__ == '__main__':
+    main()
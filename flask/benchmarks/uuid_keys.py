@@ -0,0 +1,127 @@
+"""
+Compare varchar(32) and native uuid keys on a seeded copy of the task table.
+
+Two tables with the same rows, primary key and list indexes are created in a scratch schema, one
+with the ids stored as varchar(32) (before migration 0000000009) and one as uuid. The benchmark
+reports the table and index sizes, then times the task list query for random people on each.
+The scratch schema is dropped afterwards. Run from the flask directory with the app's
+environment loaded:
+
+    python -m benchmarks.uuid_keys --people 2000 --tasks-per-person 50 --queries 5000
+"""
+import argparse
+import random
+import statistics
+import time
+
+import psycopg2
+
+from common.app_config import config
+
+SCHEMA = 'benchmark_uuid_keys'
+ID_TYPES = {'varchar': 'varchar(32)', 'uuid': 'uuid'}
+
+
+def connect():
+    connection = psycopg2.connect(
+        host=config.POSTGRES_HOST,
+        port=int(config.POSTGRES_PORT),
+        user=config.POSTGRES_USER,
+        password=config.POSTGRES_PASSWORD,
+        database=config.POSTGRES_DB,
+    )
+    connection.autocommit = True
+    return connection
+
+
+def seed(cursor, people, tasks_per_person):
+    cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    cursor.execute(f"CREATE SCHEMA {SCHEMA}")
+    cursor.execute(
+        f"CREATE TABLE {SCHEMA}.person_ids AS "
+        f"SELECT md5(random()::text || i) AS person_id FROM generate_series(1, %s) AS i",
+        (people,)
+    )
+    for name, id_type in ID_TYPES.items():
+        table = f"{SCHEMA}.task_{name}"
+        cursor.execute(
+            f"CREATE TABLE {table} ("
+            f"  entity_id {id_type} NOT NULL, version {id_type} NOT NULL, previous_version {id_type},"
+            f"  active boolean DEFAULT true, changed_by_id {id_type}, changed_on timestamp DEFAULT now(),"
+            f"  person_id {id_type}, title varchar(255), completed boolean DEFAULT false"
+            f")"
+        )
+    cursor.execute(
+        f"INSERT INTO {SCHEMA}.task_varchar "
+        f"SELECT md5(random()::text || p.person_id || i), md5(random()::text), "
+        f"'00000000000000000000000000000000', random() > 0.05, p.person_id, now(), p.person_id, "
+        f"'benchmark task ' || i, random() > 0.5 "
+        f"FROM {SCHEMA}.person_ids AS p, generate_series(1, %s) AS i",
+        (tasks_per_person,)
+    )
+    cursor.execute(
+        f"INSERT INTO {SCHEMA}.task_uuid SELECT entity_id::uuid, version::uuid, previous_version::uuid, active, "
+        f"changed_by_id::uuid, changed_on, person_id::uuid, title, completed FROM {SCHEMA}.task_varchar"
+    )
+    for name in ID_TYPES:
+        table = f"{SCHEMA}.task_{name}"
+        cursor.execute(f"ALTER TABLE {table} ADD PRIMARY KEY (entity_id)")
+        cursor.execute(f"CREATE INDEX task_{name}_person_id_ind ON {table} (person_id)")
+        cursor.execute(f"CREATE INDEX task_{name}_person_id_completed_ind ON {table} (person_id, completed)")
+        cursor.execute(f"VACUUM (ANALYZE) {table}")
+
+
+def get_sizes(cursor, name):
+    table = f"{SCHEMA}.task_{name}"
+    cursor.execute(
+        "SELECT pg_relation_size(%s::regclass), "
+        "(SELECT coalesce(sum(pg_relation_size(indexrelid)), 0) FROM pg_index WHERE indrelid = %s::regclass)",
+        (table, table)
+    )
+    return cursor.fetchone()
+
+
+def time_task_lists(cursor, name, person_ids, queries):
+    query = (
+        f"SELECT * FROM {SCHEMA}.task_{name} WHERE person_id = %s AND completed = %s AND active = true"
+    )
+    latencies = []
+    for _ in range(queries):
+        params = (random.choice(person_ids), random.random() > 0.5)
+        started = time.perf_counter()
+        cursor.execute(query, params)
+        cursor.fetchall()
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--people', type=int, default=2000)
+    parser.add_argument('--tasks-per-person', type=int, default=50)
+    parser.add_argument('--queries', type=int, default=5000)
+    args = parser.parse_args()
+
+    connection = connect()
+    cursor = connection.cursor()
+    try:
+        seed(cursor, args.people, args.tasks_per_person)
+        cursor.execute(f"SELECT person_id FROM {SCHEMA}.person_ids")
+        person_ids = [row[0] for row in cursor.fetchall()]
+
+        print(f"{'keys':>8} {'table MB':>9} {'indexes MB':>11} {'p50 ms':>8} {'p95 ms':>8}")
+        for name in ID_TYPES:
+            table_bytes, index_bytes = get_sizes(cursor, name)
+            # Warm the cache so both runs read from shared buffers.
+            time_task_lists(cursor, name, person_ids, min(args.queries, 500))
+            p50, p95 = time_task_lists(cursor, name, person_ids, args.queries)
+            print(f"{name:>8} {table_bytes / 2 ** 20:>9.1f} {index_bytes / 2 ** 20:>11.1f} "
+                  f"{p50 * 1000:>8.3f} {p95 * 1000:>8.3f}")
+    finally:
+        cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -3,11 +3,20 @@
 echo Running app..
 
 rococo-postgres rf  # Run forward migrations
+python3 maintenance.py audit-partitions || echo "Audit partition maintenance failed"
 echo Done db stuff
 python3 version.py
 if [ "$APP_ENV" == "production" ] || [ "$APP_ENV" == "test" ]
 then
-    waitress-serve --port=5000 --call 'main:create_app'
+    if [ "$SERVER_MODE" == "asgi" ]
+    then
+        # Requires an image built with INSTALL_ASGI=true.
+        uvicorn asgi:app --host 0.0.0.0 --port 5000
+    else
+        # Pre-forks WEB_CONCURRENCY (default: CPU count) waitress workers; SIGHUP rolls them.
+        # /tasks/events needs SERVER_MODE=asgi and answers 501 here.
+        exec python3 launcher.py --bind 0.0.0.0:5000
+    fi
 else
     python3 main.py
 fi
\ No newline at end of file
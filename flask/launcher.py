@@ -0,0 +1,392 @@
+"""
+Pre-fork launcher: serves the app from N waitress worker processes sharing one listening socket,
+so CPU-bound work (password hashing, JWT signing) is not serialized on a single core by the GIL.
+
+    python launcher.py --bind 0.0.0.0:5000 --workers 4
+
+The worker count defaults to WEB_CONCURRENCY, or the CPU count. The Postgres connection budget
+(POSTGRES_MAX_CONNECTIONS minus POSTGRES_RESERVED_CONNECTIONS) and RABBITMQ_MAX_CONNECTIONS are
+split across the workers, with room for one extra worker during a rolling restart (and for each
+worker's deferred audit writer connection), and each worker's thread count is capped at its
+database pool size so a request never finds the pool empty.
+
+Signals handled by the master process:
+    SIGHUP          rolling restart: start a replacement, wait until it serves, drain an old worker
+    SIGTERM/SIGINT  graceful shutdown: workers stop accepting and finish in-flight requests
+    SIGUSR1         log the aggregated request counters
+"""
+import argparse
+import ctypes
+import os
+import select
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing.sharedctypes import RawArray
+
+from common.app_config import config
+from common.app_logger import logger
+from common.metrics import clear_snapshots
+from common.repositories.audit import is_audit_deferred
+
+COUNTER_FIELDS = ('pid', 'ready', 'requests', 'server_errors', 'request_ms')
+PID, READY, REQUESTS, SERVER_ERRORS, REQUEST_MS = range(len(COUNTER_FIELDS))
+AGGREGATED_FIELDS = (REQUESTS, SERVER_ERRORS, REQUEST_MS)
+
+
+def plan_worker_pools(workers: int) -> dict:
+    """
+    Returns the per-worker settings that keep all workers within the server connection budgets.
+    """
+    # A rolling restart briefly runs one replacement next to the worker it replaces.
+    concurrent_workers = workers + 1
+
+    db_budget = config.POSTGRES_MAX_CONNECTIONS - config.POSTGRES_RESERVED_CONNECTIONS
+    db_connections = db_budget // concurrent_workers
+    if is_audit_deferred():
+        # The deferred audit writer of each worker holds a connection outside the pool.
+        db_connections -= 1
+    if db_connections < 1:
+        raise ValueError(
+            f"A Postgres budget of {db_budget} connections cannot be split across {concurrent_workers} workers."
+        )
+
+    threads = min(config.WAITRESS_THREADS, db_connections)
+    rabbitmq_connections = max(1, config.RABBITMQ_MAX_CONNECTIONS // concurrent_workers)
+
+    return {
+        'POSTGRES_POOL_MAX_CONNECTIONS': db_connections,
+        'RABBITMQ_POOL_MAX_CONNECTIONS': min(rabbitmq_connections, threads),
+        'WAITRESS_THREADS': threads,
+    }
+
+
+def apply_plan(plan: dict):
+    # Workers build their app config from the environment; the module-level config is already loaded.
+    for name, value in plan.items():
+        os.environ[name] = str(value)
+        setattr(config, name, value)
+
+
+def prepare_metrics_dir():
+    """
+    Gives the workers a shared, empty directory for their metrics snapshots, so any of them can
+    answer a /metrics scrape for all.
+    """
+    directory = config.METRICS_DIR or tempfile.mkdtemp(prefix='todomvc-metrics-')
+    os.makedirs(directory, exist_ok=True)
+    clear_snapshots(directory)
+    apply_plan({'METRICS_DIR': directory})
+
+
+def create_listen_socket(bind: str) -> socket.socket:
+    host, _, port = bind.rpartition(':')
+    sock = socket.create_server((host or '0.0.0.0', int(port)), backlog=2048, reuse_port=False)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Worker:
+    """
+    A forked worker process: runs one waitress server on the shared socket and records its
+    request counters in its slot of the shared counter array.
+    """
+
+    def __init__(self, slot: int, counters, sock: socket.socket, threads: int, graceful_timeout: int):
+        self.offset = slot * len(COUNTER_FIELDS)
+        self.counters = counters
+        self.sock = sock
+        self.threads = threads
+        self.graceful_timeout = graceful_timeout
+        self.server = None
+        self.drain_deadline = None
+        self._counter_lock = threading.Lock()
+
+    def _count(self, started: float, status: str):
+        with self._counter_lock:
+            self.counters[self.offset + REQUESTS] += 1
+            self.counters[self.offset + REQUEST_MS] += int((time.perf_counter() - started) * 1000)
+            if status.startswith('5'):
+                self.counters[self.offset + SERVER_ERRORS] += 1
+
+    def count_requests(self, app):
+        def counting_app(environ, start_response):
+            started = time.perf_counter()
+            status = ['500']
+
+            def counting_start_response(response_status, headers, exc_info=None):
+                status[0] = response_status
+                return start_response(response_status, headers, exc_info)
+
+            try:
+                return app(environ, counting_start_response)
+            finally:
+                self._count(started, status[0])
+
+        return counting_app
+
+    def _drain(self, signum, frame):
+        if self.drain_deadline is None:
+            self.drain_deadline = time.monotonic() + self.graceful_timeout
+            self.server.accepting = False
+
+    def _serve(self):
+        server = self.server
+        while self.drain_deadline is None or server.active_channels:
+            if self.drain_deadline is not None:
+                if time.monotonic() >= self.drain_deadline:
+                    logger.warning(f"Worker {os.getpid()} drain timed out with open connections")
+                    break
+                # Close idle keep-alive connections; busy ones close once their response is sent.
+                for channel in list(server.active_channels.values()):
+                    if not channel.requests:
+                        channel.will_close = True
+            server.asyncore.loop(
+                timeout=server.adj.asyncore_loop_timeout,
+                map=server._map,
+                use_poll=server.adj.asyncore_use_poll,
+                count=1,
+            )
+        server.task_dispatcher.shutdown(cancel_pending=False, timeout=1)
+
+    def run(self):
+        from waitress.server import create_server
+        from app import create_app
+        from app.helpers.metrics import close_metrics
+        from app.helpers.traffic_capture import close_traffic_capture
+        from common.repositories.audit import close_audit_writer
+
+        signal.signal(signal.SIGTERM, self._drain)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)  # Ctrl-C reaches the master, which drains us
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        signal.signal(signal.SIGUSR1, signal.SIG_IGN)
+
+        app = create_app()
+        self.server = create_server(self.count_requests(app), sockets=[self.sock], threads=self.threads)
+        self.counters[self.offset + PID] = os.getpid()
+        self.counters[self.offset + READY] = 1
+        self._serve()
+        # Workers leave through os._exit, which skips atexit handlers.
+        close_audit_writer()
+        close_metrics()
+        close_traffic_capture()
+
+
+class Launcher:
+    """
+    The master process: forks the workers, replaces crashed ones, performs rolling restarts and
+    aggregates the per-worker request counters.
+    """
+
+    def __init__(self, sock: socket.socket, workers: int, threads: int, graceful_timeout: int, stats_interval: int):
+        self.sock = sock
+        self.num_workers = workers
+        self.threads = threads
+        self.graceful_timeout = graceful_timeout
+        self.stats_interval = stats_interval
+
+        # Twice the slots, so replacements never wait for the worker they replace to be reaped.
+        self.slots = 2 * workers
+        self.counters = RawArray(ctypes.c_uint64, self.slots * len(COUNTER_FIELDS))
+        self.workers = {}  # pid -> slot
+        self.retired = {field: 0 for field in AGGREGATED_FIELDS}
+
+        self.pending_signals = []
+        self.spawn_backoff = 0
+        self.next_spawn = 0
+        self._wakeup_read, self._wakeup_write = os.pipe()
+
+    def _counter(self, slot: int, field: int) -> int:
+        return self.counters[slot * len(COUNTER_FIELDS) + field]
+
+    def _on_signal(self, signum, frame):
+        self.pending_signals.append(signum)
+
+    def _install_signal_handlers(self):
+        os.set_blocking(self._wakeup_write, False)
+        signal.set_wakeup_fd(self._wakeup_write)
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGUSR1, signal.SIGCHLD):
+            signal.signal(signum, self._on_signal)
+
+    def _reset_signal_handlers(self):
+        signal.set_wakeup_fd(-1)
+        for signum in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGUSR1, signal.SIGCHLD):
+            signal.signal(signum, signal.SIG_DFL)
+        os.close(self._wakeup_read)
+        os.close(self._wakeup_write)
+
+    def _sleep(self, seconds: float):
+        # Wakes early when a signal arrives.
+        readable, _, _ = select.select([self._wakeup_read], [], [], seconds)
+        if readable:
+            os.read(self._wakeup_read, 1024)
+
+    def spawn_worker(self) -> int:
+        used_slots = set(self.workers.values())
+        slot = next(slot for slot in range(self.slots) if slot not in used_slots)
+        offset = slot * len(COUNTER_FIELDS)
+        for field in range(len(COUNTER_FIELDS)):
+            self.counters[offset + field] = 0
+
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                self._reset_signal_handlers()
+                Worker(slot, self.counters, self.sock, self.threads, self.graceful_timeout).run()
+            except BaseException:
+                logger.exception("Worker failed")
+                exit_code = 1
+            finally:
+                sys.stdout.flush()
+                os._exit(exit_code)
+
+        self.workers[pid] = slot
+        logger.info(f"Started worker {pid} (slot {slot})")
+        return pid
+
+    def _retire_worker(self, pid: int, status: int):
+        slot = self.workers.pop(pid)
+        if self._counter(slot, READY):
+            self.spawn_backoff = 0
+        else:
+            # Died during startup; back off so a broken deploy does not fork in a tight loop.
+            self.spawn_backoff = min(max(1, self.spawn_backoff * 2), 30)
+            self.next_spawn = time.monotonic() + self.spawn_backoff
+        for field in AGGREGATED_FIELDS:
+            self.retired[field] += self._counter(slot, field)
+        logger.info(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}")
+
+    def reap_workers(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if pid in self.workers:
+                self._retire_worker(pid, status)
+
+    def _wait_for(self, condition, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() >= deadline or signal.SIGTERM in self.pending_signals \
+                    or signal.SIGINT in self.pending_signals:
+                return False
+            self._sleep(0.1)
+            self.reap_workers()
+        return True
+
+    def rolling_restart(self):
+        logger.info("Rolling restart")
+        for old_pid in list(self.workers):
+            new_pid = self.spawn_worker()
+            new_slot = self.workers[new_pid]
+            ready = self._wait_for(
+                lambda: new_pid not in self.workers or self._counter(new_slot, READY), self.graceful_timeout
+            )
+            if not ready or new_pid not in self.workers:
+                logger.error(f"Replacement worker {new_pid} did not start; aborting the rolling restart")
+                if new_pid in self.workers:
+                    os.kill(new_pid, signal.SIGTERM)
+                return
+
+            if old_pid in self.workers:
+                os.kill(old_pid, signal.SIGTERM)
+                self._wait_for(lambda: old_pid not in self.workers, self.graceful_timeout + 5)
+        logger.info("Rolling restart complete")
+
+    def stop(self):
+        logger.info("Shutting down workers")
+        for pid in list(self.workers):
+            os.kill(pid, signal.SIGTERM)
+
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while self.workers and time.monotonic() < deadline:
+            self._sleep(0.1)
+            self.reap_workers()
+
+        for pid in list(self.workers):
+            logger.warning(f"Killing worker {pid}")
+            os.kill(pid, signal.SIGKILL)
+            self._retire_worker(pid, os.waitpid(pid, 0)[1])
+
+        self.log_stats()
+
+    def aggregate(self) -> dict:
+        totals = dict(self.retired)
+        per_worker = {}
+        for pid, slot in self.workers.items():
+            per_worker[pid] = self._counter(slot, REQUESTS)
+            for field in AGGREGATED_FIELDS:
+                totals[field] += self._counter(slot, field)
+        return {
+            'requests': totals[REQUESTS],
+            'server_errors': totals[SERVER_ERRORS],
+            'mean_request_ms': round(totals[REQUEST_MS] / totals[REQUESTS], 2) if totals[REQUESTS] else 0,
+            'requests_per_worker': per_worker,
+        }
+
+    def log_stats(self):
+        logger.info(f"Request counters: {self.aggregate()}")
+
+    def run(self):
+        self._install_signal_handlers()
+        logger.info(
+            f"Launcher {os.getpid()} serving on {self.sock.getsockname()} with {self.num_workers} workers"
+        )
+
+        for _ in range(self.num_workers):
+            self.spawn_worker()
+
+        next_stats = time.monotonic() + self.stats_interval
+        while True:
+            self.reap_workers()
+
+            while self.pending_signals:
+                signum = self.pending_signals.pop(0)
+                if signum in (signal.SIGTERM, signal.SIGINT):
+                    self.stop()
+                    return
+                if signum == signal.SIGHUP:
+                    self.rolling_restart()
+                elif signum == signal.SIGUSR1:
+                    self.log_stats()
+
+            if len(self.workers) < self.num_workers and time.monotonic() >= self.next_spawn:
+                self.spawn_worker()
+
+            if self.stats_interval and time.monotonic() >= next_stats:
+                self.log_stats()
+                next_stats = time.monotonic() + self.stats_interval
+
+            self._sleep(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bind', default='0.0.0.0:5000')
+    parser.add_argument('--workers', type=int, default=config.WEB_CONCURRENCY or os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    plan = plan_worker_pools(args.workers)
+    apply_plan(plan)
+    prepare_metrics_dir()
+    logger.info(f"Per-worker settings for {args.workers} workers: {plan}")
+
+    launcher = Launcher(
+        create_listen_socket(args.bind),
+        workers=args.workers,
+        threads=plan['WAITRESS_THREADS'],
+        graceful_timeout=config.LAUNCHER_GRACEFUL_TIMEOUT,
+        stats_interval=config.LAUNCHER_STATS_INTERVAL,
+    )
+    launcher.run()
+
+
+if __name__ == '__main__':
+    main()
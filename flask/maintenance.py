@@ -0,0 +1,94 @@
+"""
+Database maintenance jobs, run after the migrations on container start or on a schedule:
+
+    python maintenance.py audit-partitions [--dry-run]
+    python maintenance.py archive-tasks [--reindex] [--max-batches N] [--every SECONDS]
+
+audit-partitions keeps the monthly partitions of the audit tables rolling: it creates the next
+AUDIT_PARTITION_PREMAKE_MONTHS months, moves rows that fell into the default partitions into
+their own month, and removes partitions older than AUDIT_RETENTION_MONTHS (0 keeps everything)
+by detaching them, and dropping them when AUDIT_RETENTION_ACTION is 'drop'.
+
+archive-tasks moves tasks soft-deleted more than TASK_ARCHIVE_GRACE_DAYS ago from `task` into
+`task_archive`, TASK_ARCHIVE_BATCH_SIZE rows per transaction, and reports the rows moved and the
+size of the task indexes before and after (--reindex rebuilds the list indexes concurrently to
+return the space). With --every it keeps running as a background job.
+"""
+import argparse
+import json
+import sys
+import time
+
+from common.app_config import config
+from common.app_logger import logger
+from common.maintenance import archive_tasks, get_maintenance_connection, maintain_audit_partitions
+
+
+def audit_partitions(args):
+    connection = get_maintenance_connection(config)
+    try:
+        report = maintain_audit_partitions(
+            connection,
+            premake_months=config.AUDIT_PARTITION_PREMAKE_MONTHS,
+            retention_months=config.AUDIT_RETENTION_MONTHS,
+            retention_action=config.AUDIT_RETENTION_ACTION,
+            dry_run=args.dry_run,
+        )
+    finally:
+        connection.close()
+    logger.info(f"Audit partition maintenance: {len(report.created)} created, {len(report.detached)} detached, "
+                f"{len(report.dropped)} dropped, {len(report.skipped)} skipped")
+    return report.as_dict()
+
+
+def archive_deleted_tasks(args):
+    connection = get_maintenance_connection(config)
+    try:
+        report = archive_tasks(
+            connection,
+            grace_days=config.TASK_ARCHIVE_GRACE_DAYS,
+            batch_size=config.TASK_ARCHIVE_BATCH_SIZE,
+            pause=config.TASK_ARCHIVE_BATCH_PAUSE,
+            max_batches=args.max_batches,
+            reindex=args.reindex,
+        )
+    finally:
+        connection.close()
+    return report.as_dict()
+
+
+def run_every(run, seconds):
+    while True:
+        try:
+            json.dump(run(), sys.stdout, default=str)
+            sys.stdout.write('\n')
+            sys.stdout.flush()
+        except Exception:
+            logger.exception("Maintenance run failed")
+        time.sleep(seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    audit_partitions_parser = commands.add_parser('audit-partitions', help="Roll the audit table partitions")
+    audit_partitions_parser.add_argument('--dry-run', action='store_true', help="Only report what is past retention")
+    audit_partitions_parser.set_defaults(run=audit_partitions)
+
+    archive_tasks_parser = commands.add_parser('archive-tasks', help="Move old soft-deleted tasks to task_archive")
+    archive_tasks_parser.add_argument('--reindex', action='store_true', help="Rebuild the task list indexes afterwards")
+    archive_tasks_parser.add_argument('--max-batches', type=int, default=None)
+    archive_tasks_parser.add_argument('--every', type=float, default=None, help="Repeat every SECONDS")
+    archive_tasks_parser.set_defaults(run=archive_deleted_tasks)
+
+    args = parser.parse_args()
+    if getattr(args, 'every', None):
+        run_every(lambda: args.run(args), args.every)
+    result = args.run(args)
+    json.dump(result, sys.stdout, indent=2, default=str)
+    sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Fill a development database with synthetic data for performance work, after the migrations:
+
+    python seed.py --persons 1000000 --tasks-per-person 20 --workers 8 --seed 42 [--truncate]
+
+Every person gets an email, an email/password login method, an organization they administer and
+occasionally memberships of others, and a log-normally skewed number of tasks (most people have
+a few, some thousands) with earlier versions in task_audit. Rows are generated and loaded with
+COPY by --workers processes, one transaction per --shard-size people, with the secondary indexes
+dropped during the load and rebuilt in parallel afterwards (--keep-indexes maintains them
+instead). The same --seed and --until always produce the same rows; every seeded person can log
+in with --password. Refuses to run with APP_ENV=production.
+"""
+import argparse
+import json
+import os
+import sys
+from datetime import date, datetime, timezone
+from functools import partial
+
+from werkzeug.security import generate_password_hash
+
+from common.app_config import config
+from common.app_logger import logger
+from common.maintenance import SeedOptions, get_maintenance_connection, seed_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--persons', type=int, required=True)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--tasks-per-person', type=float, default=20.0, help="Mean tasks per person")
+    parser.add_argument('--task-skew', type=float, default=1.5, help="Sigma of the log-normal task counts")
+    parser.add_argument('--max-tasks-per-person', type=int, default=10000)
+    parser.add_argument('--audit-versions-per-task', type=float, default=1.0, help="Mean earlier versions per task")
+    parser.add_argument('--memberships-per-person', type=float, default=0.3,
+                        help="Mean memberships of other people's organizations")
+    parser.add_argument('--deleted-ratio', type=float, default=0.05, help="Share of soft-deleted tasks")
+    parser.add_argument('--completed-ratio', type=float, default=0.4)
+    parser.add_argument('--history-days', type=int, default=365, help="How far back the data goes")
+    parser.add_argument('--until', type=date.fromisoformat, default=datetime.now(timezone.utc).date(),
+                        help="Date the history ends (default: today)")
+    parser.add_argument('--password', default='Seeded@Password123', help="Password of every seeded person")
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--shard-size', type=int, default=1000, help="People per COPY transaction")
+    parser.add_argument('--keep-indexes', action='store_true', help="Maintain the indexes during the load")
+    parser.add_argument('--truncate', action='store_true', help="Empty the seeded tables first")
+    args = parser.parse_args()
+
+    if config.APP_ENV == 'production':
+        parser.error("Refusing to seed a production database.")
+
+    options = SeedOptions(
+        persons=args.persons,
+        seed=args.seed,
+        tasks_per_person=args.tasks_per_person,
+        task_skew=args.task_skew,
+        max_tasks_per_person=args.max_tasks_per_person,
+        audit_versions_per_task=args.audit_versions_per_task,
+        memberships_per_person=args.memberships_per_person,
+        deleted_ratio=args.deleted_ratio,
+        completed_ratio=args.completed_ratio,
+        history_days=args.history_days,
+        until=args.until,
+        password_hash=generate_password_hash(args.password, method='scrypt'),
+    )
+    logger.info(f"Seeding {args.persons} persons with {args.workers} workers (seed {args.seed})")
+    report = seed_database(
+        partial(get_maintenance_connection, config),
+        options,
+        workers=args.workers,
+        shard_size=args.shard_size,
+        defer_indexes=not args.keep_indexes,
+        truncate=args.truncate,
+    )
+    json.dump(report.as_dict(), sys.stdout, indent=2, default=str)
+    sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
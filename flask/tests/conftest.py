@@ -0,0 +1,133 @@
+import os
+
+# The settings are read when `common.app_config` is first imported; none of these is contacted.
+for name, value in {
+    'APP_ENV': 'test', 'SECRET_KEY': 'test', 'SECURITY_PASSWORD_SALT': 'test', 'AUTH_JWT_SECRET': 'test-secret-of-at-least-32-bytes',
+    'VUE_APP_URI': 'http://localhost:9000',
+    'POSTGRES_HOST': 'localhost', 'POSTGRES_PORT': '5432', 'POSTGRES_USER': 'todomvc', 'POSTGRES_PASSWORD': 'todomvc',
+    'POSTGRES_DB': 'todomvc',
+    'RABBITMQ_HOST': 'localhost', 'RABBITMQ_PORT': '5672', 'RABBITMQ_USER': 'todomvc', 'RABBITMQ_PASSWORD': 'todomvc',
+}.items():
+    os.environ.setdefault(name, value)
+
+import pytest
+
+from common.app_config import config
+from tests.fake_db import FakeDatabase
+from tests.memcached_stub import MemcachedStub
+
+pytest_plugins = ["common.metrics.pytest_plugin"]
+
+config.POSTGRES_POOL_MIN_CONNECTIONS = 0
+config.PREPARED_STATEMENTS_THRESHOLD = 0
+config.CACHE_BACKEND = 'memory'
+
+
+def clear_caches():
+    """
+    Drops every process-wide cache namespace, backend and single-flight group, so the next
+    request starts cold.
+    """
+    from common.cache import backends, single_flight, tier
+
+    with tier._namespaces_lock:
+        tier._namespaces.clear()
+    with backends._backends_lock:
+        backends._backends.clear()
+    with single_flight._single_flights_lock:
+        single_flight._single_flights.clear()
+
+
+@pytest.fixture(scope='session')
+def app():
+    try:
+        # The ASGI app bridges to its own Flask app: test that one, so both modes share the fixtures.
+        from asgi import flask_app as app
+    except ImportError:  # the asgi dependency group is not installed
+        from app import create_app
+        app = create_app()
+    app.testing = True
+    return app
+
+
+@pytest.fixture
+def asgi_client(app):
+    """
+    A client of the ASGI app, without its lifespan: the async pool, HTTP client and event
+    publisher it would open are left to each test.
+    """
+    pytest.importorskip('starlette')
+    from starlette.testclient import TestClient
+
+    import asgi
+
+    asgi_app = asgi.create_asgi_app()
+    asgi_app.state.task_event_publisher = None
+    return TestClient(asgi_app)
+
+
+@pytest.fixture
+def database(app, monkeypatch):
+    """
+    An empty in-memory database behind the app's pooled connections, with cold caches, and the
+    RabbitMQ publishing (emails, task events) replaced by recorders.
+    """
+    from flask import g
+
+    from common.tasks.send_message import MessageSender
+    from common.tasks.task_events import TaskEventPublisher
+
+    database = FakeDatabase()
+    database.messages = []
+    database.events = []
+
+    def get_connection(*args, **kwargs):
+        if getattr(g, 'db_conn', None) is None:
+            g.db_conn = database.connect()
+        return g.db_conn
+
+    monkeypatch.setattr(app.extensions['pooled_db'], 'get_connection', get_connection)
+    monkeypatch.setattr(
+        MessageSender, 'send_message', lambda self, queue_name, data, *args, **kwargs: database.messages.append(data)
+    )
+    monkeypatch.setattr(
+        TaskEventPublisher, 'publish', lambda self, person_id, event, data: database.events.append((event, data))
+    )
+    clear_caches()
+    yield database
+    clear_caches()
+
+
+@pytest.fixture
+def client(app, database):
+    return app.test_client()
+
+
+@pytest.fixture
+def user(client, database):
+    """
+    A signed up person with the default password, and the headers of their logged in requests.
+    """
+    email = 'ada@example.com'
+    assert client.post('/auth/signup', json={
+        'first_name': 'Ada', 'last_name': 'Lovelace', 'email_address': email,
+    }).json['success']
+    login = client.post('/auth/login', json={'email': email, 'password': config.DEFAULT_USER_PASSWORD}).json
+    assert login['success'], login
+    organization = database.rows('organization')[0]
+    return {
+        'email': email,
+        'person': login['person'],
+        'organization_id': organization['entity_id'],
+        'headers': {'Authorization': f"Bearer {login['access_token']}"},
+    }
+
+
+@pytest.fixture
+def memcached():
+    """
+    A memcached server for the shared cache tier, in this process.
+    """
+    stub = MemcachedStub().start()
+    yield stub
+    stub.stop()
@@ -0,0 +1,286 @@
+"""
+An in-memory stand-in for the Postgres connections of the repositories.
+
+It understands the statements the repositories send (rococo's lookups and audited saves, the saves
+and audit batches of the deferred and off audit modes, the pool's `SELECT 1` check, the
+organizations-with-roles join, `get_one_each`, the task COPY and the prepared statements of
+`PreparingCursorMixin`) and fails on anything else, so a new query shape is noticed. Every
+statement is recorded like `TimedCursor` records it, which is what `count_queries()` and the query
+budgets count.
+"""
+import csv
+import json
+import re
+from datetime import datetime
+
+import psycopg2.errors
+import psycopg2.extensions
+
+from common.metrics.query_budget import record_statement
+
+_WHITESPACE = re.compile(r'\s+')
+_TIMESTAMP = re.compile(r'^\d{4}-\d\d-\d\d \d\d:\d\d:\d\d$')
+
+_SELECT = re.compile(
+    r'^SELECT (\w+)\.\* FROM (\w+)(?: WHERE (.*?))?(?: ORDER BY .*?)?(?: LIMIT (\d+))?(?: OFFSET (\d+))?;?$'
+)
+_AUDIT_COPY = re.compile(r'^INSERT INTO (\w+)_audit \(SELECT \* FROM \1 WHERE entity_id=%s\)$')
+_SAVE = re.compile(r'^WITH updated AS \( UPDATE (\w+) SET .*? INSERT INTO \1 \(([^)]*)\) SELECT .*$')
+_SAVE_CAPTURING_PREVIOUS = re.compile(
+    r'^WITH previous AS \( SELECT \* FROM (\w+) WHERE \w+ = %s ?\), updated AS \( UPDATE \1 SET .*? '
+    r'INSERT INTO \1 \(([^)]*)\) SELECT .* SELECT to_jsonb\(previous\) AS previous FROM previous$'
+)
+_AUDIT_BATCH = re.compile(
+    r'^INSERT INTO (\w+)_audit SELECT \* FROM jsonb_populate_recordset\(NULL::\1_audit, %s::jsonb\) '
+    r'ON CONFLICT DO NOTHING$'
+)
+_ORGANIZATIONS_OF_PERSON = re.compile(
+    r'^SELECT o\.\*, por\.role FROM organization AS o JOIN person_organization_role AS por '
+    r'ON o\.entity_id = por\.organization_id WHERE por\.person_id = %s;?$'
+)
+_BATCH = re.compile(r'^SELECT lookup_0\.\*.* FROM \(SELECT 1\) AS batch ')
+_BATCH_LOOKUP = re.compile(r'LEFT JOIN LATERAL \(SELECT true AS (\w+), lookup\.\* FROM \((.*?)\) AS lookup\)')
+_PING = re.compile(r'^SELECT 1;?$')
+_COPY = re.compile(r'^COPY (\w+) \(([^)]*)\) FROM STDIN')
+_PREPARED = re.compile(r'^(?:DEALLOCATE (\w+)|PREPARE (\w+) AS (.*)|EXECUTE (\w+)(?:\(.*\))?)$')
+_PREPARED_STATEMENTS = re.compile(r';\s*(?=(?:DEALLOCATE|PREPARE|EXECUTE) )')
+_SERVER_PLACEHOLDER = re.compile(r'\$\d+')
+_CONDITION = re.compile(r'^\w+\.(\w+) (?:(=) %s|IN \(([%s, ]*)\)|(IS NULL))$')
+
+
+def _normalize(sql) -> str:
+    if isinstance(sql, bytes):
+        sql = sql.decode()
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def _from_db(value):
+    # rococo saves timestamps as text; the database hands them back as datetimes.
+    if isinstance(value, str) and _TIMESTAMP.match(value):
+        return datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
+    return value
+
+
+def _equal(stored, value) -> bool:
+    if isinstance(stored, bool) or isinstance(value, bool):
+        return str(stored).lower() == str(value).lower()
+    return stored == value
+
+
+class FakeDatabase:
+    """
+    The tables, as {table: {entity_id: row}}, shared by every connection of a test.
+    """
+
+    def __init__(self):
+        self.tables = {}
+        self.connections = 0
+
+    def connect(self) -> 'FakeConnection':
+        self.connections += 1
+        return FakeConnection(self)
+
+    def rows(self, table: str) -> list:
+        return list(self.tables.get(table, {}).values())
+
+    def insert(self, table: str, row: dict, key=None):
+        """
+        Writes the row under `key` (its entity_id by default) and returns the one it replaced
+        (None for a new row).
+        """
+        rows = self.tables.setdefault(table, {})
+        key = row['entity_id'] if key is None else key
+        previous = rows.get(key)
+        rows[key] = {column: _from_db(value) for column, value in row.items()}
+        return previous
+
+    def select(self, table: str, where: str, params: list, limit: int = None) -> list:
+        rows = self.rows(table)
+        if where:
+            for condition in where.split(' AND '):
+                match = _CONDITION.match(condition)
+                if match is None:
+                    raise NotImplementedError(f"Unsupported condition: {condition}")
+                column, equals, in_list, is_null = match.groups()
+                if equals:
+                    value = params.pop(0)
+                    rows = [row for row in rows if _equal(row.get(column), value)]
+                elif is_null:
+                    rows = [row for row in rows if row.get(column) is None]
+                else:
+                    values = [params.pop(0) for _ in range(in_list.count('%s'))]
+                    rows = [row for row in rows if any(_equal(row.get(column), value) for value in values)]
+        return rows[:limit] if limit is not None else rows
+
+
+class FakeCursor:
+
+    def __init__(self, connection: 'FakeConnection'):
+        self.connection = connection
+        self.database = connection.database
+        self.description = None
+        self.query = None
+        self._rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _result(self, rows: list, columns: list = None):
+        if columns is None:
+            columns = list(rows[0]) if rows else []
+        self.description = [(column,) for column in columns]
+        self._rows = [tuple(row.get(column) for column in columns) for row in rows]
+
+    def execute(self, query, vars=None):
+        record_statement(query, vars)
+        self.query = query
+        self.connection.in_transaction = not self.connection.autocommit
+        sql = _normalize(query)
+        if _PREPARED.match(sql.split(';')[0]):
+            for statement in _PREPARED_STATEMENTS.split(sql):
+                self._execute_prepared(statement, vars)
+        else:
+            self._run(sql, list(vars or ()))
+
+    def _execute_prepared(self, statement: str, vars):
+        deallocated, prepared, body, executed = _PREPARED.match(statement).groups()
+        statements = self.connection.prepared
+        if deallocated:
+            if statements.pop(deallocated, None) is None:
+                raise psycopg2.errors.InvalidSqlStatementName(f'prepared statement "{deallocated}" does not exist')
+        elif prepared:
+            statements[prepared] = body
+        elif executed not in statements:
+            raise psycopg2.errors.InvalidSqlStatementName(f'prepared statement "{executed}" does not exist')
+        else:
+            # The prepared statements number their parameters in order.
+            self._run(_SERVER_PLACEHOLDER.sub('%s', statements[executed]), list(vars or ()))
+
+    def _run(self, sql: str, params: list):
+        if match := _SELECT.match(sql):
+            _, table, where, limit, _ = match.groups()
+            self._result(self.database.select(table, where, params, int(limit) if limit else None))
+        elif match := _AUDIT_COPY.match(sql):
+            for row in self.database.select(match.group(1), f"{match.group(1)}.entity_id = %s", params):
+                self.connection.insert_audit(match.group(1), row)
+            self._result([])
+        elif match := _AUDIT_BATCH.match(sql):
+            for row in json.loads(params[0]):
+                self.connection.insert_audit(match.group(1), row)
+            self._result([])
+        elif match := _SAVE_CAPTURING_PREVIOUS.match(sql):
+            table, columns = match.group(1), [column.strip() for column in match.group(2).split(',')]
+            previous = self.connection.insert(table, dict(zip(columns, params[1:len(columns) + 1])))
+            # jsonb hands timestamps back as text.
+            self._result([{'previous': json.loads(json.dumps(previous, default=str))}] if previous else [], ['previous'])
+        elif match := _SAVE.match(sql):
+            table, columns = match.group(1), [column.strip() for column in match.group(2).split(',')]
+            self.connection.insert(table, dict(zip(columns, params[:len(columns)])))
+            self._result([])
+        elif _PING.match(sql):
+            self._result([{'?column?': 1}])
+        elif _ORGANIZATIONS_OF_PERSON.match(sql):
+            rows = []
+            for role in self.database.select('person_organization_role', 'por.person_id = %s', params):
+                for organization in self.database.select('organization', 'o.entity_id = %s', [role['organization_id']]):
+                    rows.append({**organization, 'role': role['role']})
+            self._result(rows)
+        elif _BATCH.match(sql):
+            columns, row = [], {}
+            for position, (found_column, lookup) in enumerate(_BATCH_LOOKUP.findall(sql)):
+                lookup_params = [params.pop(0) for _ in range(lookup.count('%s'))]
+                match = _SELECT.match(lookup)
+                found = self.database.select(match.group(2), match.group(3), lookup_params, 1)
+                columns.append(f"{position}:{found_column}")
+                row[columns[-1]] = True if found else None
+                for column, value in (found[0].items() if found else ()):
+                    columns.append(f"{position}:{column}")
+                    row[columns[-1]] = value
+            self._result([row], columns)
+            self.description = [(column.partition(':')[2],) for column in columns]
+        else:
+            raise NotImplementedError(f"Unsupported statement: {sql}")
+
+    def executemany(self, query, vars_list):
+        for vars in vars_list:
+            self.execute(query, vars)
+
+    def copy_expert(self, sql, file, size=8192):
+        record_statement(sql)
+        match = _COPY.match(_normalize(sql))
+        if match is None:
+            raise NotImplementedError(f"Unsupported COPY: {sql}")
+        table, columns = match.group(1), [column.strip() for column in match.group(2).split(',')]
+        for values in csv.reader(file):
+            values = [{'True': True, 'False': False, '': None}.get(value, value) for value in values]
+            self.connection.insert(table, dict(zip(columns, values)))
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """
+    Writes go straight to the tables and are undone by `rollback` until they are committed.
+    Prepared statements stay on the connection, like on a server session. It carries psycopg2's
+    exceptions like a psycopg2 connection, which is how DBUtils finds the DB-API module.
+    """
+    autocommit = False
+    OperationalError = psycopg2.OperationalError
+    InterfaceError = psycopg2.InterfaceError
+    InternalError = psycopg2.InternalError
+
+    def __init__(self, database: FakeDatabase):
+        self.database = database
+        self.closed = False
+        self.commits = 0
+        self.in_transaction = False
+        self.prepared = {}
+        self._undo = []
+
+    def get_transaction_status(self):
+        if self.in_transaction:
+            return psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+        return psycopg2.extensions.TRANSACTION_STATUS_IDLE
+
+    def cursor(self, cursor_factory=None):
+        return FakeCursor(self)
+
+    def insert(self, table: str, row: dict):
+        previous = self.database.insert(table, row)
+        self._undo.append((table, row['entity_id'], previous))
+        return previous
+
+    def insert_audit(self, table: str, row: dict):
+        # Audit rows are keyed by version; a version already copied is skipped.
+        key = (row['entity_id'], row['version'])
+        if key not in self.database.tables.get(f"{table}_audit", {}):
+            self.database.insert(f"{table}_audit", row, key)
+            self._undo.append((f"{table}_audit", key, None))
+
+    def commit(self):
+        self.commits += 1
+        self.in_transaction = False
+        self._undo = []
+
+    def rollback(self):
+        self.in_transaction = False
+        for table, key, previous in reversed(self._undo):
+            if previous is None:
+                del self.database.tables[table][key]
+            else:
+                self.database.tables[table][key] = previous
+        self._undo = []
+
+    def close(self):
+        self.closed = True
@@ -0,0 +1,107 @@
+"""
+A small in-process server speaking the part of the memcached text protocol that
+`MemcachedBackend` uses (get, set, add, incr, delete), for tests. Expiry follows a clock the
+test can move forward with `advance`.
+"""
+import socket
+import socketserver
+import threading
+import time
+
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    def setup(self):
+        super().setup()
+        self.server.stub.connections.append(self.connection)
+
+    def handle(self):
+        server = self.server.stub
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command, *args = line.rstrip(b'\r\n').split(b' ')
+            if command == b'get':
+                response = b''.join(
+                    b'VALUE %s 0 %d\r\n%s\r\n' % (key, len(value), value)
+                    for key in args if (value := server.get(key)) is not None
+                ) + b'END\r\n'
+            elif command in (b'set', b'add'):
+                key, _, ttl, length = args[:4]
+                value = self.rfile.read(int(length) + 2)[:-2]
+                stored = server.store(key, value, int(ttl), only_new=command == b'add')
+                response = b'STORED\r\n' if stored else b'NOT_STORED\r\n'
+            elif command == b'incr':
+                response = server.incr(args[0], int(args[1]))
+            elif command == b'delete':
+                response = b'DELETED\r\n' if server.delete(args[0]) else b'NOT_FOUND\r\n'
+            else:
+                response = b'ERROR\r\n'
+            self.wfile.write(response)
+
+
+class MemcachedStub:
+
+    def __init__(self):
+        self.entries = {}  # key -> (value, expires_at)
+        self.offset = 0.0
+        self.connections = []
+        self._lock = threading.Lock()
+        self._server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self.address = '%s:%d' % self._server.server_address
+
+    def start(self) -> 'MemcachedStub':
+        threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        for connection in self.connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def advance(self, seconds: float):
+        self.offset += seconds
+
+    def _now(self) -> float:
+        return time.monotonic() + self.offset
+
+    def _live(self, key: bytes):
+        entry = self.entries.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= self._now():
+            del self.entries[key]
+            return None
+        return entry
+
+    def get(self, key: bytes):
+        with self._lock:
+            entry = self._live(key)
+            return entry[0] if entry is not None else None
+
+    def store(self, key: bytes, value: bytes, ttl: int, only_new: bool = False) -> bool:
+        with self._lock:
+            if only_new and self._live(key) is not None:
+                return False
+            self.entries[key] = (value, self._now() + ttl if ttl else None)
+            return True
+
+    def incr(self, key: bytes, delta: int) -> bytes:
+        with self._lock:
+            entry = self._live(key)
+            if entry is None:
+                return b'NOT_FOUND\r\n'
+            if not entry[0].isdigit():
+                return b'CLIENT_ERROR cannot increment or decrement non-numeric value\r\n'
+            value = str(int(entry[0]) + delta).encode()
+            self.entries[key] = (value, entry[1])
+            return value + b'\r\n'
+
+    def delete(self, key: bytes) -> bool:
+        with self._lock:
+            return self.entries.pop(key, None) is not None
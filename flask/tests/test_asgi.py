@@ -0,0 +1,116 @@
+"""
+The native ASGI task routes answer like the Flask views they stand in for.
+"""
+import asyncio
+
+import pytest
+
+from app.handlers import run_sync
+from common.app_config import config
+from common.services import TaskService
+from common.services.async_task import AsyncTaskService
+
+MISSING_TASK_ID = 'f' * 32
+
+
+@pytest.fixture
+def async_tasks(app, database, monkeypatch):
+    """
+    Runs the async task service on the sync one, so both modes use the fake database.
+    """
+    def delegate(name):
+        async def method(self, *args):
+            with app.app_context():
+                return getattr(TaskService(config), name)(*args)
+        return method
+
+    for name in ('get_tasks_by_person_id', 'get_task_by_id', 'save_task', 'set_task_completed', 'delete_task'):
+        monkeypatch.setattr(AsyncTaskService, name, delegate(name))
+
+
+def summarize(body):
+    """
+    The response without the values that differ between two runs (ids and timestamps).
+    """
+    summary = {key: value for key, value in body.items() if key not in ('task', 'tasks')}
+    if 'task' in body:
+        summary['task'] = (body['task']['title'], body['task']['completed'])
+    if 'tasks' in body:
+        summary['tasks'] = sorted((task['title'], task['completed']) for task in body['tasks'])
+    return summary
+
+
+def exchange(send, headers):
+    """
+    Sends the same conversation through `send(method, url, **kwargs) -> (status, body)`.
+    """
+    results = []
+
+    def record(method, url, **kwargs):
+        status, body = send(method, url, headers=kwargs.pop('headers', headers), **kwargs)
+        results.append((method, url.replace(task_id, '<task_id>'), status, summarize(body)))
+        return body
+
+    task_id = MISSING_TASK_ID
+    task_id = record('POST', '/tasks', json={'title': 'Write the tests'})['task']['entity_id']
+    record('POST', '/tasks', json={'title': 'Another'})
+    record('POST', '/tasks', json={'title': '  '})
+    record('POST', '/tasks', data='{not json')
+    record('GET', '/tasks', headers={})
+    record('PUT', f'/tasks/{MISSING_TASK_ID}', json={})
+    record('PUT', f'/tasks/{MISSING_TASK_ID}', json={'title': 'Renamed'})
+    record('PUT', f'/tasks/{task_id}', data='[]')
+    record('PUT', f'/tasks/{task_id}', json={'title': 'Renamed'})
+    record('PATCH', f'/tasks/{task_id}/complete', json={})
+    record('PATCH', f'/tasks/{MISSING_TASK_ID}/complete', json={'completed': True})
+    record('PATCH', f'/tasks/{task_id}/complete', json={'completed': True})
+    for task_filter in ('all', 'active', 'completed'):
+        record('GET', f'/tasks?filter={task_filter}')
+    record('DELETE', f'/tasks/{MISSING_TASK_ID}')
+    record('DELETE', f'/tasks/{task_id}')
+    record('GET', '/tasks')
+    return results
+
+
+def test_native_task_routes_answer_like_the_flask_views(client, user, asgi_client, async_tasks, database):
+    def send_flask(method, url, data=None, **kwargs):
+        response = client.open(url, method=method, data=data, **kwargs)
+        return response.status_code, response.json
+
+    def send_asgi(method, url, data=None, **kwargs):
+        response = asgi_client.request(method, url, content=data, **kwargs)
+        return response.status_code, response.json()
+
+    flask_results = exchange(send_flask, user['headers'])
+    flask_events = [event for event, _ in database.events]
+    database.events.clear()
+    database.tables['task'].clear()
+    asgi_results = exchange(send_asgi, user['headers'])
+
+    assert asgi_results == flask_results
+    assert [event for event, _ in database.events] == flask_events
+    assert ('PUT', f'/tasks/{MISSING_TASK_ID}', 200, {
+        'success': False, 'message': "'title' is required and cannot be empty.",
+    }) in asgi_results
+
+
+def test_invalid_updates_do_not_load_the_task(user, asgi_client, monkeypatch):
+    loads = []
+
+    async def get_task_by_id(self, task_id, person_id):
+        loads.append(task_id)
+
+    monkeypatch.setattr(AsyncTaskService, 'get_task_by_id', get_task_by_id)
+    for url in (f'/tasks/{MISSING_TASK_ID}', f'/tasks/{MISSING_TASK_ID}/complete'):
+        method = 'PUT' if url.endswith(MISSING_TASK_ID) else 'PATCH'
+        assert not asgi_client.request(method, url, json={}, headers=user['headers']).json()['success']
+
+    assert loads == []
+
+
+def test_run_sync_refuses_handlers_that_suspend():
+    async def handler():
+        await asyncio.sleep(0)
+
+    with pytest.raises(RuntimeError):
+        run_sync(handler())
@@ -0,0 +1,101 @@
+import pytest
+
+from common.app_config import config
+from common.metrics.query_budget import count_queries
+from common.models.task import Task
+from common.repositories import audit
+from common.repositories.audit import AuditMode, AuditWriter, get_audit_mode, is_audit_deferred
+from common.services import TaskService
+from launcher import plan_worker_pools
+
+PERSON_ID = 'a' * 32
+
+
+@pytest.fixture
+def audit_modes(monkeypatch):
+    def set_modes(modes, default='sync'):
+        monkeypatch.setattr(config, 'AUDIT_MODE', default)
+        monkeypatch.setattr(config, 'AUDIT_MODES', modes)
+    return set_modes
+
+
+@pytest.fixture
+def audit_writer(database, monkeypatch):
+    """
+    The process's audit writer, writing to the fake database; flushed by the tests only.
+    """
+    monkeypatch.setattr(audit.psycopg2, 'connect', lambda **kwargs: database.connect())
+    writer = AuditWriter(batch_size=500, flush_interval=3600, max_pending=100)
+    monkeypatch.setattr(audit, '_audit_writer', writer)
+    yield writer
+    writer.close()
+
+
+def save_and_rename(app, title):
+    with app.test_request_context():
+        task_service = TaskService(config)
+        task = task_service.save_task(Task(person_id=PERSON_ID, title='Draft'))
+        with count_queries() as counter:
+            task.title = title
+            task_service.save_task(task)
+    return counter.count
+
+
+def audited_titles(database):
+    return sorted(row['title'] for row in database.rows('task_audit'))
+
+
+def test_audit_modes_are_read_per_table(audit_modes):
+    audit_modes(' task = deferred , login_method=off,')
+    assert get_audit_mode('task') == AuditMode.DEFERRED
+    assert get_audit_mode('login_method') == AuditMode.OFF
+    assert get_audit_mode('person') == AuditMode.SYNC
+    assert is_audit_deferred()
+
+    audit_modes('task=off', default='deferred')
+    assert (get_audit_mode('task'), get_audit_mode('person')) == (AuditMode.OFF, AuditMode.DEFERRED)
+
+    audit_modes('task=later')
+    with pytest.raises(ValueError):
+        get_audit_mode('task')
+
+
+def test_sync_mode_copies_the_previous_version_in_the_save(app, database, audit_modes):
+    audit_modes('')
+    assert save_and_rename(app, 'Final') == 2
+    assert audited_titles(database) == ['Draft']
+
+
+def test_deferred_mode_writes_the_previous_version_in_batches(app, database, audit_modes, audit_writer):
+    audit_modes('task=deferred')
+    assert save_and_rename(app, 'Final') == 1
+    assert audited_titles(database) == []
+    assert audit_writer.as_dict()['pending'] == 1
+
+    assert audit_writer.flush()
+    assert audited_titles(database) == ['Draft']
+    assert audit_writer.as_dict()['written'] == 1
+
+    # A retried batch skips the rows already written.
+    [row] = database.rows('task_audit')
+    audit_writer.append('task', {**row, 'changed_on': str(row['changed_on'])})
+    assert audit_writer.flush()
+    assert audited_titles(database) == ['Draft']
+
+
+def test_off_mode_writes_no_audit_rows(app, database, audit_modes, monkeypatch):
+    audit_modes('task=off')
+    monkeypatch.setattr(audit, 'get_audit_writer', lambda: pytest.fail("The audit writer was used"))
+    assert save_and_rename(app, 'Final') == 1
+    assert audited_titles(database) == []
+    assert [task['title'] for task in database.rows('task')] == ['Final']
+
+
+def test_workers_leave_a_connection_for_the_deferred_audit_writer(audit_modes, monkeypatch):
+    monkeypatch.setattr(config, 'POSTGRES_MAX_CONNECTIONS', 100)
+    monkeypatch.setattr(config, 'POSTGRES_RESERVED_CONNECTIONS', 10)
+    audit_modes('')
+    assert plan_worker_pools(2)['POSTGRES_POOL_MAX_CONNECTIONS'] == 30
+
+    audit_modes('task=deferred')
+    assert plan_worker_pools(2)['POSTGRES_POOL_MAX_CONNECTIONS'] == 29
@@ -0,0 +1,78 @@
+from datetime import datetime, timezone
+
+from common.cache import (
+    CacheNamespace, EmailCache, MemcachedBackend, MemoryBackend, ModelCache, dump_model, dump_models, dump_value,
+    get_email_cache, get_person_cache, load_model, load_models, load_value,
+)
+from common.models import Email, Person
+from common.models.task import Task
+from tests.conftest import clear_caches
+
+
+def test_models_round_trip_through_json():
+    person = Person(first_name='Ada', last_name='Lovelace')
+    person.changed_on = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+
+    value = dump_model(person)
+    assert value.startswith(b'{')
+    loaded = load_model(Person, value)
+    assert loaded.as_dict() == person.as_dict()
+    assert loaded is not person
+
+    tasks = [Task(person_id=person.entity_id, title='One'), Task(person_id=person.entity_id, title='Two', completed=True)]
+    assert [task.as_dict() for task in load_models(Task, dump_models(tasks))] == [task.as_dict() for task in tasks]
+
+
+def test_rows_keep_their_datetimes():
+    rows = [{'entity_id': 'a' * 32, 'name': 'Org', 'changed_on': datetime(2024, 5, 1, 12, 30), 'role': 'admin'}]
+    assert load_value(dump_value(rows)) == rows
+
+
+def test_model_cache_stores_json():
+    backend = MemoryBackend(1024 * 1024)
+    cache = ModelCache(CacheNamespace('person', backend, ttl=60, tombstone_ttl=10), Person)
+    person = Person(first_name='Ada', last_name='Lovelace')
+
+    cache.set(person)
+    stored = [value for key, (value, _) in backend.entries._entries.items() if key.endswith(person.entity_id)]
+    assert len(stored) == 1 and b'"first_name":"Ada"' in stored[0]
+    assert cache.get(person.entity_id).first_name == 'Ada'
+
+
+def test_models_are_not_cached_per_worker():
+    clear_caches()
+    assert get_person_cache() is None
+    assert get_email_cache() is None
+
+
+def worker_namespace(memcached, name):
+    """
+    A namespace on its own connection to the shared tier, as another worker process holds it.
+    """
+    return CacheNamespace(name, MemcachedBackend([memcached.address], timeout=1.0), ttl=60, tombstone_ttl=10)
+
+
+def test_a_save_in_one_worker_is_read_by_another(memcached):
+    first, second = (ModelCache(worker_namespace(memcached, 'person'), Person) for _ in range(2))
+    person = Person(first_name='Ada', last_name='Lovelace')
+    assert second.get_or_load(person.entity_id, lambda: person).first_name == 'Ada'
+
+    saved = load_model(Person, dump_model(person))
+    saved.first_name = 'Augusta'
+    saved.version = 'b' * 32
+    first.set(saved)
+
+    read = second.get(person.entity_id)
+    assert (read.first_name, read.version) == ('Augusta', 'b' * 32)
+
+
+def test_a_signup_clears_the_unknown_address_for_every_worker(memcached):
+    def worker_cache():
+        return EmailCache(*(worker_namespace(memcached, name) for name in ('email', 'email_address', 'email_absent')))
+
+    first, second = worker_cache(), worker_cache()
+    first.remember_absent('ada@example.com')
+    assert second.is_known_absent('ada@example.com')
+
+    second.set(Email(email='ada@example.com', person_id='a' * 32))
+    assert not first.is_known_absent('ada@example.com')
@@ -0,0 +1,51 @@
+import gzip
+
+import pytest
+
+from common.models.task import Task
+from common.services.async_task import AsyncTaskService
+
+
+@pytest.fixture
+def task_count(monkeypatch):
+    """
+    The number of tasks the native `GET /tasks` lists.
+    """
+    count = {'tasks': 0}
+
+    async def get_tasks_by_person_id(self, person_id, completed=None):
+        return [Task(person_id=person_id, title=f"Task {index}") for index in range(count['tasks'])]
+
+    monkeypatch.setattr(AsyncTaskService, 'get_tasks_by_person_id', get_tasks_by_person_id)
+    return count
+
+
+def test_flask_and_asgi_task_lists_are_compressed_alike(client, user, asgi_client, task_count):
+    task_count['tasks'] = 50
+    for index in range(task_count['tasks']):
+        client.post('/tasks', json={'title': f"Task {index}"}, headers=user['headers'])
+    headers = {**user['headers'], 'Accept-Encoding': 'gzip'}
+
+    flask_response = client.get('/tasks', headers=headers)
+    asgi_response = asgi_client.get('/tasks', headers=headers)
+
+    assert flask_response.headers['Content-Encoding'] == asgi_response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in asgi_response.headers['Vary']
+    assert len(gzip.decompress(flask_response.data)) > 1024
+    assert len(asgi_response.json()['tasks']) == task_count['tasks']
+
+
+def test_small_asgi_responses_are_not_compressed(user, asgi_client, task_count):
+    response = asgi_client.get('/tasks', headers={**user['headers'], 'Accept-Encoding': 'gzip'})
+
+    assert response.json() == {'success': True, 'tasks': []}
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_asgi_responses_follow_accept_encoding(user, asgi_client, task_count):
+    task_count['tasks'] = 50
+    response = asgi_client.get('/tasks', headers={**user['headers'], 'Accept-Encoding': 'identity'})
+
+    assert 'Content-Encoding' not in response.headers
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert len(response.json()['tasks']) == task_count['tasks']
@@ -0,0 +1,111 @@
+"""
+Statements per request with the request-scoped identity map of `BaseRepository` and without it.
+"""
+import pytest
+
+import common.repositories.base
+import common.repositories.batch
+from common.app_config import config
+from common.metrics.query_budget import count_queries
+from common.models import Person
+from common.services import OrganizationService, PersonService, TaskService
+from tests.conftest import clear_caches
+
+
+@pytest.fixture(params=[True, False], ids=['identity map', 'no identity map'])
+def identity_map(request, monkeypatch):
+    if not request.param:
+        monkeypatch.setattr(common.repositories.base, 'get_identity_map', lambda: None)
+        monkeypatch.setattr(common.repositories.batch, 'get_identity_map', lambda: None)
+    return request.param
+
+
+def count_statements(client, method, url, **kwargs):
+    clear_caches()
+    with count_queries() as counter:
+        response = getattr(client, method)(url, **kwargs)
+    assert response.json['success'], response.json
+    return counter.count
+
+
+def test_endpoints(client, user, database, identity_map):
+    """
+    Every endpoint reads each entity once (lookups sharing a request are batched), so the counts
+    are the same either way: the map is a safety net, and costs nothing.
+    """
+    headers = user['headers']
+    task = client.post('/tasks', json={'title': 'Write the tests'}, headers=headers).json['task']
+    client.post('/auth/forgot_password', json={'email': user['email']})
+    token, uid = database.messages[-1]['data']['reset_password_link'].split('/')[-2:]
+    organization_headers = {**headers, 'x-organization-id': user['organization_id']}
+
+    counts = {
+        'login': count_statements(client, 'post', '/auth/login', json={
+            'email': user['email'], 'password': config.DEFAULT_USER_PASSWORD,
+        }),
+        'update name': count_statements(client, 'put', '/person/me', json={
+            'first_name': 'Augusta', 'last_name': 'King',
+        }, headers=headers),
+        'update organization': count_statements(client, 'put', '/organization/', json={'name': 'Engines'},
+                                                headers=organization_headers),
+        'update task': count_statements(client, 'put', f"/tasks/{task['entity_id']}", json={'title': 'Renamed'},
+                                        headers=headers),
+        'reset password': count_statements(client, 'post', f'/auth/reset_password/{token}/{uid}', json={
+            'password': 'An0ther@Password',
+        }),
+    }
+    assert counts == {'login': 3, 'update name': 2, 'update organization': 4, 'update task': 3, 'reset password': 5}
+
+
+def test_organization_reloaded_by_the_handler(app, user, identity_map):
+    """
+    `organization_required` loads the organization with the person's role; a handler loading it
+    again by id is served from the map.
+    """
+    with app.test_request_context(), count_queries() as counter:
+        organization_service = OrganizationService(config)
+        organization, role = organization_service.get_organization_and_role_of_person(
+            user['organization_id'], user['person']['entity_id']
+        )
+        reloaded = organization_service.get_organization_by_id(user['organization_id'])
+
+    assert role.role == 'admin'
+    if identity_map:
+        assert counter.count == 1
+        assert reloaded is organization
+    else:
+        assert counter.count == 2
+        assert reloaded.as_dict() == organization.as_dict()
+
+
+def test_saved_instance_is_returned_by_later_reads(app, database, identity_map):
+    with app.test_request_context(), count_queries() as counter:
+        person_repo = PersonService(config).person_repo
+        person = person_repo.save(Person(first_name='Ada', last_name='Lovelace'))
+        reloaded = person_repo.get_one({'entity_id': person.entity_id})
+
+    # The audit copy and the upsert, and the read when there is no map
+    assert counter.count == (2 if identity_map else 3)
+    assert (reloaded is person) == identity_map
+
+
+def test_only_matching_instances_are_served(app, user, identity_map):
+    with app.test_request_context():
+        task_service = TaskService(config)
+        task = task_service.save_task(
+            task_service.task_repo.model(person_id=user['person']['entity_id'], title='Mine')
+        )
+        with count_queries() as counter:
+            assert task_service.get_task_by_id(task.entity_id, user['person']['entity_id']) is not None
+            assert task_service.get_task_by_id(task.entity_id, 'f' * 32) is None
+
+    # Another person's lookup of the same id always goes to the database.
+    assert counter.count == (1 if identity_map else 2)
+
+
+def test_the_map_lasts_one_request(app, user, identity_map):
+    for _ in range(2):
+        with app.test_request_context(), count_queries() as counter:
+            OrganizationService(config).get_organization_by_id(user['organization_id'])
+            OrganizationService(config).get_organization_by_id(user['organization_id'])
+        assert counter.count == (1 if identity_map else 2)
@@ -0,0 +1,27 @@
+import psycopg2.extensions
+import pytest
+
+import common.repositories.base  # noqa: F401
+from common.repositories.ids import HEX_UUID, UUID_OID, register_hex_uuid_loader
+
+UUID_TEXT = '0f8fad5b-d9cb-469f-a165-70867728950e'
+
+
+def test_the_repository_cursors_read_uuids_as_hex_and_nothing_else_does():
+    assert HEX_UUID(UUID_TEXT, None) == '0f8fad5bd9cb469fa16570867728950e'
+    assert HEX_UUID(None, None) is None
+    # `TimedCursor` registers it on itself; other psycopg2 users of the process keep the default.
+    assert psycopg2.extensions.string_types.get(UUID_OID) is not HEX_UUID
+
+
+def test_the_async_pool_connections_read_uuids_as_hex_and_nothing_else_does():
+    psycopg = pytest.importorskip('psycopg')
+    from psycopg.adapt import AdaptersMap
+    from psycopg.pq import Format
+
+    adapters = AdaptersMap(psycopg.adapters)
+    register_hex_uuid_loader(adapters)
+
+    loader = adapters.get_loader(UUID_OID, Format.TEXT)(UUID_OID)
+    assert loader.load(UUID_TEXT.encode()) == '0f8fad5bd9cb469fa16570867728950e'
+    assert psycopg.adapters.get_loader(UUID_OID, Format.TEXT).__name__ != loader.__class__.__name__
@@ -0,0 +1,147 @@
+import threading
+import time
+
+import pytest
+
+from common.cache import CacheBackend, CacheNamespace, MemcachedBackend
+
+
+def worker_namespace(memcached, name='person', ttl=60, tombstone_ttl=10):
+    """
+    The namespace as one worker process sees it: its own client (and single-flight group) on the
+    shared server.
+    """
+    return CacheNamespace(name, MemcachedBackend([memcached.address], timeout=1.0), ttl, tombstone_ttl)
+
+
+def test_cache_backend_is_abstract():
+    with pytest.raises(TypeError):
+        CacheBackend()
+
+
+def test_backend_commands(memcached):
+    backend = MemcachedBackend([memcached.address], timeout=1.0)
+
+    assert backend.set('a', b'1')
+    assert not backend.add('a', b'2')
+    assert backend.add('b', b'value with spaces\r\nand a line break')
+    assert backend.get_many(['a', 'b', 'missing']) == {'a': b'1', 'b': b'value with spaces\r\nand a line break'}
+    assert backend.incr('a', 5) == 6
+    assert backend.incr('missing') is None
+    backend.delete('a')
+    assert backend.get('a') is None
+
+    long_key = 'k' * 300 + ' with spaces'
+    assert backend.set(long_key, b'hashed')
+    assert backend.get(long_key) == b'hashed'
+
+
+def test_expiry(memcached):
+    backend = MemcachedBackend([memcached.address], timeout=1.0)
+    backend.set('short', b'1', ttl=5)
+    backend.set('forever', b'1')
+    memcached.advance(6)
+    assert backend.get_many(['short', 'forever']) == {'forever': b'1'}
+
+
+def test_writes_are_seen_by_every_worker(memcached):
+    first, second = worker_namespace(memcached), worker_namespace(memcached)
+
+    first.set('ada', b'v1')
+    assert second.get('ada') == b'v1'
+    second.set('ada', b'v2')
+    assert first.get('ada') == b'v2'
+
+
+def test_invalidate_all_bumps_the_version_for_every_worker(memcached):
+    first, second = worker_namespace(memcached), worker_namespace(memcached)
+    first.set('ada', b'v1')
+    first.set('grace', b'v1')
+
+    second.invalidate_all()
+    assert first.get('ada') is None and first.get('grace') is None
+
+    first.set('ada', b'v2')
+    assert second.get('ada') == b'v2'
+
+
+def test_a_lost_version_key_restarts_above_every_older_version(memcached):
+    namespace = worker_namespace(memcached)
+    namespace.set('ada', b'v1')
+    memcached.entries.clear()  # e.g. evicted, or the server restarted
+    memcached.store(b'todomvc:v2:person:ada', b'1:stale', 0)
+
+    assert namespace.get('ada') is None
+    namespace.set('ada', b'v2')
+    assert namespace.get('ada') == b'v2'
+
+
+def test_tombstone_keeps_a_racing_read_out_until_it_expires(memcached):
+    writer, reader = worker_namespace(memcached), worker_namespace(memcached)
+    writer.set('ada', b'v1')
+
+    # The reader loaded v1 before the writer's invalidation, and fills after it.
+    writer.invalidate('ada')
+    reader.fill('ada', b'v1')
+    assert reader.get('ada') is None
+    assert writer.get('ada') is None
+
+    memcached.advance(11)
+    reader.fill('ada', b'v2')
+    assert writer.get('ada') == b'v2'
+
+
+def test_a_write_replaces_a_tombstone(memcached):
+    first, second = worker_namespace(memcached), worker_namespace(memcached)
+    first.invalidate('ada')
+    second.set('ada', b'v2')
+    assert first.get('ada') == b'v2'
+
+
+def test_fill_does_not_replace_a_write(memcached):
+    first, second = worker_namespace(memcached), worker_namespace(memcached)
+    first.set('ada', b'written')
+    second.fill('ada', b'read earlier')
+    assert second.get('ada') == b'written'
+
+
+def test_concurrent_loads_in_a_worker_share_one_call(memcached):
+    namespace, other_worker = worker_namespace(memcached), worker_namespace(memcached)
+    callers = 8
+    barrier = threading.Barrier(callers)
+    loads = []
+    results = []
+
+    def loader():
+        loads.append(1)
+        # Runs until every other caller waits for it
+        deadline = time.monotonic() + 5
+        while namespace.single_flight.coalesced < callers - 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return b'loaded'
+
+    def caller():
+        barrier.wait()
+        results.append(namespace.get_or_load('ada', loader))
+
+    threads = [threading.Thread(target=caller) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(loads) == 1
+    assert results == [b'loaded'] * callers
+    assert namespace.metrics.coalesced == callers - 1
+    # The one load filled the shared tier for the other workers too.
+    assert other_worker.get('ada') == b'loaded'
+
+
+def test_an_unreachable_server_degrades_to_misses(memcached):
+    namespace = worker_namespace(memcached)
+    namespace.set('ada', b'v1')
+    memcached.stop()
+
+    assert namespace.get('ada') is None
+    assert namespace.get_or_load('ada', lambda: b'from the database') == b'from the database'
+    assert namespace.metrics.errors > 0
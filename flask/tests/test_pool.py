@@ -0,0 +1,89 @@
+import psycopg2
+import pytest
+from dbutils.pooled_db import PooledDB
+
+from common.app_config import config
+from common.repositories.pools import (
+    PoolSizer, close_idle_connections, get_pooled_db_counts, open_idle_connections, resize_pooled_db,
+)
+from tests.fake_db import FakeDatabase
+
+
+def test_pool_report_is_closed_without_a_metrics_token(client, monkeypatch):
+    monkeypatch.setattr(config, 'METRICS_TOKEN', '')
+    assert client.get('/admin/pool').status_code == 401
+    assert client.get('/admin/pool', headers={'Authorization': 'Bearer '}).status_code == 401
+
+
+@pytest.mark.parametrize('token, status', [('secret', 200), ('wrong', 401), (None, 401)])
+def test_pool_report_requires_the_metrics_token(client, monkeypatch, token, status):
+    monkeypatch.setattr(config, 'METRICS_TOKEN', 'secret')
+    headers = {'Authorization': f'Bearer {token}'} if token else {}
+    response = client.get('/admin/pool', headers=headers)
+
+    assert response.status_code == status
+    if status == 200:
+        assert 'sync' in response.json['pools']
+
+
+def create_pool(connect):
+    """
+    A DBUtils `PooledDB` over `connect`, as the pooled connection plugin builds it.
+    """
+    return PooledDB(connect, maxconnections=5)
+
+
+@pytest.fixture
+def pooled_db():
+    return create_pool(FakeDatabase().connect)
+
+
+def test_warm_up_checks_out_and_returns_validated_connections(pooled_db):
+    assert open_idle_connections(pooled_db, 3) == 3
+    assert get_pooled_db_counts(pooled_db) == (0, 3)
+
+    # The idle connections are reused before new ones are opened.
+    assert open_idle_connections(pooled_db, 2) == 2
+    assert get_pooled_db_counts(pooled_db) == (0, 3)
+
+
+def test_warm_up_stops_at_the_first_failure():
+    database, opened = FakeDatabase(), []
+
+    def connect():
+        if len(opened) == 2:
+            raise psycopg2.OperationalError("too many connections")
+        opened.append(database.connect())
+        return opened[-1]
+
+    pool = create_pool(connect)
+    assert open_idle_connections(pool, 4) == 2
+    assert get_pooled_db_counts(pool) == (0, 2)
+
+
+def test_resizing_leaves_checked_out_connections_alone(pooled_db):
+    checked_out = pooled_db.connection(shareable=False)
+    resize_pooled_db(pooled_db, 4)
+    assert get_pooled_db_counts(pooled_db) == (1, 3)
+
+    resize_pooled_db(pooled_db, 2)
+    assert get_pooled_db_counts(pooled_db) == (1, 1)
+    assert close_idle_connections(pooled_db, 5) == 1
+    assert get_pooled_db_counts(pooled_db) == (1, 0)
+
+    checked_out.close()
+    assert get_pooled_db_counts(pooled_db) == (0, 1)
+
+
+def test_the_sizer_grows_on_slow_checkouts_and_shrinks_when_idle():
+    sizer = PoolSizer(minimum=2, maximum=4, target_wait=0.05, shrink_after=2)
+
+    assert [sizer.update([0.2], idle=0) for _ in range(3)] == [3, 4, 4]
+    # Fast checkouts with a step or less of idle connections keep the size.
+    assert sizer.update([0.01], idle=1) == 4
+    assert [sizer.update([], idle=3) for _ in range(6)] == [4, 3, 3, 2, 2, 2]
+
+    # A slow interval restarts the count of quiet ones.
+    sizer.update([], idle=3)
+    assert sizer.update([0.2, 0.01], idle=3) == 3
+    assert sizer.update([], idle=3) == 3
@@ -0,0 +1,103 @@
+import psycopg2.errors
+import pytest
+
+from common.app_config import config
+from common.repositories.adapter import PreparingCursorMixin
+from common.repositories.prepared import PreparedStatements, to_server_placeholders
+from tests.fake_db import FakeCursor, FakeDatabase
+
+BY_ID = 'SELECT person.* FROM person WHERE person.entity_id = %s AND person.active = %s LIMIT 1'
+
+
+@pytest.mark.parametrize('sql, param_count, expected', [
+    ('SELECT * FROM task WHERE entity_id = %s AND completed = %s', 2,
+     'SELECT * FROM task WHERE entity_id = $1 AND completed = $2'),
+    ("SELECT * FROM task WHERE title LIKE 'a%%' AND person_id = %s", 1,
+     "SELECT * FROM task WHERE title LIKE 'a%%' AND person_id = $1"),
+    ('SELECT * FROM task WHERE entity_id IN (%s, %s, %s)', 3, 'SELECT * FROM task WHERE entity_id IN ($1, $2, $3)'),
+    ('  select 1', 0, '  select 1'),
+])
+def test_placeholders_are_numbered(sql, param_count, expected):
+    assert to_server_placeholders(sql, param_count) == expected
+
+
+@pytest.mark.parametrize('sql, param_count', [
+    ('UPDATE task SET title = %s', 1),
+    ('SELECT * FROM task WHERE title = $$%s$$', 1),
+    ('SELECT * FROM task WHERE entity_id = %(entity_id)s', 1),
+    ('SELECT * FROM task WHERE entity_id = %s', 2),
+    ("SELECT * FROM task WHERE title LIKE 'a%'", 0),
+])
+def test_statements_that_cannot_be_prepared(sql, param_count):
+    assert to_server_placeholders(sql, param_count) is None
+
+
+def test_a_statement_is_prepared_at_the_threshold():
+    statements = PreparedStatements(threshold=3, max_size=10)
+
+    assert statements.rewrite(BY_ID, ('a' * 32, True)) is None
+    assert statements.rewrite(BY_ID, ('a' * 32, True)) is None
+    prepare, execute = statements.rewrite(BY_ID, ('a' * 32, True)).split('; ')
+    name = statements.names[BY_ID]
+    assert prepare == f"PREPARE {name} AS {BY_ID.replace('= %s AND', '= $1 AND').replace('= %s LIMIT', '= $2 LIMIT')}"
+    assert execute == f"EXECUTE {name}(%s, %s)"
+    assert statements.rewrite(BY_ID, ('b' * 32, True)) == f"EXECUTE {name}(%s, %s)"
+    # Named parameters are never rewritten.
+    assert statements.rewrite(BY_ID, {'entity_id': 'a' * 32}) is None
+
+
+def test_the_least_recently_used_statement_is_deallocated():
+    statements = PreparedStatements(threshold=1, max_size=2)
+    first, second, third = (f"SELECT * FROM task WHERE title = %s LIMIT {limit}" for limit in (1, 2, 3))
+
+    statements.rewrite(first, ('a',))
+    statements.rewrite(second, ('a',))
+    statements.rewrite(first, ('a',))
+    evicted = statements.names[second]
+    assert statements.rewrite(third, ('a',)).startswith(f"DEALLOCATE {evicted}; PREPARE ")
+    assert list(statements.names) == [first, third]
+
+
+class PreparingCursor(PreparingCursorMixin, FakeCursor):
+    def execute(self, query, vars=None):
+        return self._execute(query, vars)
+
+
+@pytest.fixture
+def connection(monkeypatch):
+    monkeypatch.setattr(config, 'PREPARED_STATEMENTS_THRESHOLD', 1)
+    database = FakeDatabase()
+    database.insert('person', {'entity_id': 'a' * 32, 'active': True, 'first_name': 'Ada'})
+    return database.connect()
+
+
+def find_person(connection):
+    cursor = PreparingCursor(connection)
+    cursor.execute(BY_ID, ('a' * 32, True))
+    return cursor.fetchone()
+
+
+def test_a_statement_the_server_lost_is_sent_again(connection):
+    assert 'Ada' in find_person(connection)
+    assert len(connection.prepared) == 1
+    connection.commit()
+
+    # E.g. a pooler handed the session's statements to another server connection.
+    connection.prepared.clear()
+    assert 'Ada' in find_person(connection)
+    connection.commit()
+
+    # The retry forgot every statement, so the next run prepares again.
+    assert 'Ada' in find_person(connection)
+    assert len(connection.prepared) == 1
+
+
+def test_a_lost_statement_fails_inside_a_transaction(connection):
+    find_person(connection)
+    connection.prepared.clear()
+
+    # The statements before it in the transaction would be lost with a rollback.
+    with pytest.raises(psycopg2.errors.InvalidSqlStatementName):
+        find_person(connection)
+    connection.rollback()
+    assert 'Ada' in find_person(connection)
@@ -0,0 +1,167 @@
+"""
+Calls every view with a `@query_budget` on the worst path it declares (cold caches, sync audit
+mode): the pytest plugin fails a request that issues more statements than its budget, and each
+test checks the budget is not looser than what the view needs either.
+"""
+import pytest
+
+from app import api
+from common.app_config import config
+from common.metrics.query_budget import QueryBudgetExceeded
+from common.services import OAuthClient, TaskService
+from tests.conftest import clear_caches
+
+
+def call(client, view, method, url, **kwargs):
+    """
+    Sends the request with cold caches and returns the response, once it has checked the view
+    issued exactly as many statements as its budget allows.
+    """
+    from common.metrics.query_budget import count_queries
+
+    clear_caches()
+    with count_queries() as counter:
+        response = getattr(client, method)(url, **kwargs)
+    assert response.status_code < 500, response.data
+    budget = view.query_budget
+    if callable(budget):
+        budget = budget(response)
+    if budget is not None:
+        assert counter.count == budget, f"{view.__qualname__}: {counter.count} statements, budget {budget}"
+    return response
+
+
+def budgeted_views():
+    for namespace in api.namespaces:
+        for resource, _, _, _ in namespace.resources:
+            for method in resource.methods or ():
+                view = getattr(resource, method.lower())
+                if hasattr(view, 'query_budget'):
+                    yield view.__qualname__
+
+
+COVERED = {
+    'Test.get', 'Signup.post', 'Login.post', 'ForgotPassword.post', 'ResetPassword.post', 'OAuthExchange.post',
+    'Logout.post', 'Tasks.get', 'Tasks.post', 'TaskImport.post', 'TaskEvents.get', 'TaskDetail.put',
+    'TaskDetail.delete', 'TaskComplete.patch', 'Organizations.get', 'Organizations.put', 'CacheStats.get',
+    'Me.get', 'Me.put',
+}
+
+
+def test_every_budgeted_view_is_covered(app):
+    assert set(budgeted_views()) == COVERED
+
+
+@pytest.fixture
+def task(client, user):
+    return client.post('/tasks', json={'title': 'Write the budgets'}, headers=user['headers']).json['task']
+
+
+def test_auth_views(client, database):
+    from app.views.auth import Login, Logout, Signup, Test
+
+    assert call(client, Test.get, 'get', '/auth/test').json['success']
+    body = call(client, Signup.post, 'post', '/auth/signup', json={
+        'first_name': 'Ada', 'last_name': 'Lovelace', 'email_address': 'ada@example.com',
+    }).json
+    assert body['success'], body
+    body = call(client, Login.post, 'post', '/auth/login', json={
+        'email': 'ada@example.com', 'password': config.DEFAULT_USER_PASSWORD,
+    }).json
+    assert body['success'], body
+    headers = {'Authorization': f"Bearer {body['access_token']}"}
+    assert call(client, Logout.post, 'post', '/auth/logout', headers=headers).json['success']
+
+
+def test_password_views(client, user, database):
+    from app.views.auth import ForgotPassword, ResetPassword
+
+    body = call(client, ForgotPassword.post, 'post', '/auth/forgot_password', json={'email': user['email']}).json
+    assert body['success'], body
+    token, uid = database.messages[-1]['data']['reset_password_link'].split('/')[-2:]
+    body = call(client, ResetPassword.post, 'post', f'/auth/reset_password/{token}/{uid}', json={
+        'password': 'An0ther@Password',
+    }).json
+    assert body['success'], body
+
+
+def test_oauth_exchange_creating_the_account(client, database, monkeypatch):
+    from app.views.auth import OAuthExchange
+
+    monkeypatch.setattr(OAuthClient, 'get_google_token', lambda self, *args: {'access_token': 'token'})
+    monkeypatch.setattr(
+        OAuthClient, 'get_google_user_info', lambda self, token: {'email': 'grace@example.com', 'name': 'Grace Hopper'}
+    )
+    body = call(client, OAuthExchange.post, 'post', '/auth/google/exchange', json={
+        'code': 'code', 'redirect_uri': 'http://localhost:9000/callback', 'code_verifier': 'verifier',
+    }).json
+    assert body['success'], body
+    assert len(database.rows('person')) == 1
+
+
+def test_task_views(client, user, task):
+    from app.views.task import TaskComplete, TaskDetail, TaskEvents, TaskImport, Tasks
+
+    headers = user['headers']
+    assert call(client, Tasks.get, 'get', '/tasks', headers=headers).json['tasks'] == [task]
+    assert call(client, Tasks.post, 'post', '/tasks', json={'title': 'Another'}, headers=headers).json['success']
+    body = call(client, TaskImport.post, 'post', '/tasks/import', headers=headers,
+                data='{"title": "One"}\n{"title": "Two"}\n', content_type='application/x-ndjson').json
+    assert body['accepted'] == 2
+    url = f"/tasks/{task['entity_id']}"
+    body = call(client, TaskDetail.put, 'put', url, json={'title': 'Renamed'}, headers=headers).json
+    assert body['task']['title'] == 'Renamed'
+    body = call(client, TaskComplete.patch, 'patch', f"{url}/complete", json={'completed': True}, headers=headers).json
+    assert body['task']['completed'] is True
+    assert call(client, TaskDetail.delete, 'delete', url, headers=headers).json['success']
+
+    # Streams are only served by the ASGI app; the Flask view refuses them without a statement.
+    from common.metrics.query_budget import count_queries
+
+    with count_queries() as counter:
+        assert client.get('/tasks/events', headers=headers).status_code == 501
+    assert counter.count == TaskEvents.get.query_budget == 0
+
+
+def test_organization_views(client, user):
+    from app.views.organization import Organizations
+
+    body = call(client, Organizations.get, 'get', '/organization/', headers=user['headers']).json
+    assert [organization['role'] for organization in body['organizations']] == ['admin']
+    body = call(client, Organizations.put, 'put', '/organization/', json={'name': 'Analytical Engines'},
+                headers={**user['headers'], 'x-organization-id': user['organization_id']}).json
+    assert body['success'], body
+
+
+def test_person_and_cache_views(client, user):
+    from app.views.cache import CacheStats
+    from app.views.person import Me
+
+    body = call(client, Me.get, 'get', '/person/me', headers=user['headers']).json
+    assert body['person']['first_name'] == 'Ada'
+    body = call(client, Me.put, 'put', '/person/me', json={'first_name': 'Augusta', 'last_name': 'King'},
+                headers=user['headers']).json
+    assert body['person']['first_name'] == 'Augusta'
+    assert call(client, CacheStats.get, 'get', '/cache/stats', headers=user['headers']).json['success']
+
+
+def test_task_import_budget_scales_with_its_chunks(client, user, monkeypatch):
+    from app.views.task import TaskImport
+    from common.models.task import Task
+
+    monkeypatch.setattr(config, 'TASK_IMPORT_CHUNK_SIZE', 2)
+    rows = ''.join(f'{{"title": "Task {index}"}}\n' for index in range(5))
+    body = call(client, TaskImport.post, 'post', '/tasks/import', headers=user['headers'],
+                data=rows, content_type='application/x-ndjson').json
+    assert body['accepted'] == 5
+
+    # The COPY may repeat, anything else issued per row is still an N+1.
+    validate_title = Task.validate_title
+
+    def validate_against_the_database(self):
+        TaskService(config).get_task_by_id(self.entity_id, self.person_id)
+        return validate_title(self)
+
+    monkeypatch.setattr(Task, 'validate_title', validate_against_the_database)
+    with pytest.raises(QueryBudgetExceeded, match=r'x \[\w+\] SELECT task'):
+        client.post('/tasks/import', data=rows, content_type='application/x-ndjson', headers=user['headers'])
@@ -0,0 +1,102 @@
+"""
+Identical concurrent task-list reads share one `task_repo.get_many` call, in the threaded
+`TaskService` and in the asyncio `AsyncTaskService`.
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from common.app_config import config
+from common.models import Task
+from common.services import TaskService
+from common.services.async_task import AsyncTaskService
+from tests.conftest import clear_caches
+
+CALLERS = 8
+PERSON_ID = 'a' * 32
+
+
+@pytest.fixture(autouse=True)
+def cold_caches(monkeypatch):
+    monkeypatch.setattr(config, 'TASK_LIST_CACHE_TTL', 0)
+    clear_caches()
+    yield
+    clear_caches()
+
+
+def test_concurrent_reads_share_one_query():
+    service = TaskService(config)
+    barrier = threading.Barrier(CALLERS)
+    queries = []
+    results = []
+
+    def get_many(filters):
+        queries.append(filters)
+        # Runs until every other caller waits for it
+        deadline = time.monotonic() + 5
+        while service.task_list_flight.coalesced < CALLERS - 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return [Task(person_id=PERSON_ID, title='Shared')]
+
+    service.task_repo.get_many = get_many
+
+    def caller():
+        barrier.wait()
+        results.append(service.get_tasks_by_person_id(PERSON_ID))
+
+    threads = [threading.Thread(target=caller) for _ in range(CALLERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert queries == [{'person_id': PERSON_ID, 'active': True}]
+    assert service.task_list_flight.coalesced == CALLERS - 1
+    assert [[task.title for task in tasks] for tasks in results] == [['Shared']] * CALLERS
+    # Each caller decoded its own copy.
+    assert len({id(tasks[0]) for tasks in results}) == CALLERS
+
+
+def test_concurrent_async_reads_share_one_query():
+    service = AsyncTaskService(config, event_publisher=None, person_id=PERSON_ID)
+    queries = []
+
+    async def get_many(filters):
+        queries.append(filters)
+        await asyncio.sleep(0.05)
+        return [Task(person_id=PERSON_ID, title='Shared')]
+
+    service.task_repo.get_many = get_many
+
+    async def read_concurrently():
+        return await asyncio.gather(*(service.get_tasks_by_person_id(PERSON_ID) for _ in range(CALLERS)))
+
+    results = asyncio.run(read_concurrently())
+
+    assert queries == [{'person_id': PERSON_ID, 'active': True}]
+    assert service.task_list_flight.coalesced == CALLERS - 1
+    assert [[task.title for task in tasks] for tasks in results] == [['Shared']] * CALLERS
+
+
+def test_async_callers_share_the_error():
+    service = AsyncTaskService(config, event_publisher=None, person_id=PERSON_ID)
+    queries = []
+
+    async def get_many(filters):
+        queries.append(filters)
+        await asyncio.sleep(0.05)
+        raise ConnectionError('database unavailable')
+
+    service.task_repo.get_many = get_many
+
+    async def read_concurrently():
+        return await asyncio.gather(
+            *(service.get_tasks_by_person_id(PERSON_ID) for _ in range(CALLERS)), return_exceptions=True
+        )
+
+    results = asyncio.run(read_concurrently())
+
+    assert len(queries) == 1
+    assert all(isinstance(result, ConnectionError) for result in results)
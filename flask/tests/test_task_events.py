@@ -0,0 +1,142 @@
+import asyncio
+from contextlib import contextmanager
+
+from common.app_config import config
+from common.models.task import Task
+from common.services import TaskService
+from common.services.async_task import AsyncTaskService
+from common.tasks.async_task_events import AsyncTaskEventBroker
+from common.tasks.task_events import TaskEvent, TaskEventPublisher
+
+
+class Channel:
+    def __init__(self):
+        self.declared = 0
+        self.published = []
+
+    def exchange_declare(self, **kwargs):
+        self.declared += 1
+
+    def basic_publish(self, routing_key, **kwargs):
+        self.published.append(routing_key)
+
+
+class Pool:
+    """
+    Hands out the current channel, like `ConnectionPool` does with the cached channel of an idle
+    connection.
+    """
+
+    def __init__(self):
+        self.current = Channel()
+
+    @contextmanager
+    def channel(self):
+        yield self.current
+
+
+def test_the_exchange_is_declared_once_per_channel():
+    publisher = TaskEventPublisher()
+    publisher.pool = Pool()
+    first = publisher.pool.current
+
+    publisher.publish('a' * 32, TaskEvent.CREATED, {})
+    publisher.publish('a' * 32, TaskEvent.DELETED, {})
+    assert first.declared == 1
+    assert first.published == [f"task.{'a' * 32}.created", f"task.{'a' * 32}.deleted"]
+
+    # A reconnect replaces the channel, which must declare again.
+    publisher.pool.current = second = Channel()
+    publisher.publish('a' * 32, TaskEvent.UPDATED, {})
+    assert second.declared == 1
+
+
+def test_completion_changes_publish_their_direction(app, user, database):
+    with app.test_request_context():
+        task_service = TaskService(config)
+        task = task_service.save_task(Task(person_id=user['person']['entity_id'], title='Toggle'))
+        database.events.clear()
+        task = task_service.set_task_completed(task, True)
+        task_service.set_task_completed(task, False)
+
+    assert [(event, data['task']['completed']) for event, data in database.events] == [
+        (TaskEvent.COMPLETED, True), (TaskEvent.UNCOMPLETED, False),
+    ]
+
+
+def test_async_completion_changes_publish_their_direction(monkeypatch):
+    events = []
+
+    class Publisher:
+        async def publish(self, person_id, event, data):
+            events.append((event, data['task']['completed']))
+
+    async def save(self, task):
+        return task
+
+    task_service = AsyncTaskService(config, Publisher(), person_id='a' * 32)
+    monkeypatch.setattr(type(task_service.task_repo), 'save', save)
+    task = Task(person_id='a' * 32, title='Toggle')
+
+    async def toggle():
+        await task_service.set_task_completed(task, True)
+        await task_service.set_task_completed(task, False)
+
+    asyncio.run(toggle())
+    assert events == [(TaskEvent.COMPLETED, True), (TaskEvent.UNCOMPLETED, False)]
+
+
+class EventQueue:
+    def __init__(self):
+        self.bindings = set()
+        self.consuming = False
+
+    async def consume(self, callback, no_ack):
+        self.consuming = True
+        return 'consumer'
+
+    async def cancel(self, consumer_tag):
+        self.consuming = False
+
+    async def bind(self, exchange, routing_key):
+        self.bindings.add(routing_key)
+
+    async def unbind(self, exchange, routing_key):
+        self.bindings.discard(routing_key)
+
+
+class MessageSender:
+    def __init__(self):
+        self.queues = []
+
+    async def connect(self):
+        return self
+
+    async def get_topic_exchange(self, exchange_name):
+        return exchange_name
+
+    async def declare_queue(self, exclusive, auto_delete):
+        self.queues.append(EventQueue())
+        return self.queues[-1]
+
+
+def test_the_broker_stops_consuming_without_subscribers():
+    sender = MessageSender()
+    broker = AsyncTaskEventBroker(sender, max_subscribers=10)
+
+    async def streams():
+        first = await broker.subscribe('a' * 32)
+        second = await broker.subscribe('b' * 32)
+        event_queue = sender.queues[0]
+        assert event_queue.consuming and len(event_queue.bindings) == 2
+
+        await broker.unsubscribe('a' * 32, first)
+        assert event_queue.consuming and event_queue.bindings == {f"task.{'b' * 32}.*"}
+        await broker.unsubscribe('b' * 32, second)
+        assert not event_queue.consuming
+
+        # The next subscriber declares a fresh queue.
+        await broker.subscribe('a' * 32)
+        assert len(sender.queues) == 2 and sender.queues[1].consuming
+
+    asyncio.run(streams())
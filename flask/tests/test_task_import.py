@@ -0,0 +1,112 @@
+import json
+
+import pytest
+
+from common.app_config import config
+from common.metrics.query_budget import count_queries
+from common.models.task import TITLE_MAX_LENGTH
+from tests.fake_db import FakeCursor
+
+
+def import_tasks(client, user, body, content_type='application/x-ndjson'):
+    return client.post('/tasks/import', data=body, content_type=content_type, headers=user['headers'])
+
+
+def ndjson(*rows):
+    return ''.join((row if isinstance(row, str) else json.dumps(row)) + '\n' for row in rows)
+
+
+def test_ndjson_rows_are_validated_one_by_one(client, user, database):
+    body = import_tasks(client, user, ndjson(
+        {'title': 'One'},
+        {'title': '  Two  ', 'completed': 'yes'},
+        '{not json',
+        {'completed': True},
+        {'title': 'x' * (TITLE_MAX_LENGTH + 1)},
+        '',
+        {'title': 'Six', 'completed': 'maybe'},
+        [1, 2],
+        {'title': 'Nine', 'completed': 0},
+    )).json
+
+    assert body['success']
+    assert (body['accepted'], body['rejected']) == (3, 5)
+    assert [error['line'] for error in body['errors']] == [3, 4, 5, 7, 8]
+    assert body['errors'][1]['error'] == "'title' is required and cannot be empty."
+    tasks = {task['title']: task['completed'] for task in database.rows('task')}
+    assert tasks == {'One': False, 'Two': True, 'Nine': False}
+
+
+def test_csv_rows_that_are_not_utf8_are_rejected(client, user, database):
+    body = import_tasks(
+        client, user, b'title,completed\nOne,true\nBad \xff\xfe,false\n"Multi\nline",1\nNul\x00,0\nLast,\n',
+        content_type='text/csv',
+    ).json
+
+    assert (body['accepted'], body['rejected']) == (3, 2)
+    assert body['errors'] == [
+        {'line': 3, 'error': "Row is not valid UTF-8."},
+        {'line': 6, 'error': "'title' cannot contain NUL characters."},
+    ]
+    assert sorted(task['title'] for task in database.rows('task')) == ['Last', 'Multi\nline', 'One']
+
+
+def test_csv_without_a_title_column_is_refused(client, user, database):
+    body = import_tasks(client, user, 'name\nOne\n', content_type='text/csv').json
+
+    assert body == {'success': False, 'message': "CSV header must contain a 'title' column."}
+    assert database.rows('task') == []
+
+
+def test_unsupported_content_types_are_refused(client, user):
+    response = import_tasks(client, user, '{}', content_type='application/json')
+    assert response.status_code == 415
+
+
+def test_the_reported_errors_are_capped(client, user, monkeypatch):
+    monkeypatch.setattr(config, 'TASK_IMPORT_MAX_REPORTED_ERRORS', 2)
+    body = import_tasks(client, user, ndjson(*[{'title': ''}] * 5)).json
+
+    assert (body['accepted'], body['rejected']) == (0, 5)
+    assert len(body['errors']) == 2
+
+
+def test_one_copy_per_chunk(client, user, database, monkeypatch):
+    monkeypatch.setattr(config, 'TASK_IMPORT_CHUNK_SIZE', 2)
+    with count_queries() as counter:
+        body = import_tasks(client, user, ndjson(*[{'title': f"Task {index}"} for index in range(5)])).json
+
+    assert body['accepted'] == 5
+    copies = [sql for _, sql, _ in counter.statements if sql.startswith('COPY')]
+    assert len(copies) == 3
+    assert len(database.rows('task')) == 5
+
+
+def test_a_failed_chunk_imports_nothing(client, user, database, monkeypatch):
+    monkeypatch.setattr(config, 'TASK_IMPORT_CHUNK_SIZE', 2)
+    copy_expert = FakeCursor.copy_expert
+    copies = []
+
+    def fail_on_second_chunk(self, sql, file, size=8192):
+        copies.append(sql)
+        if len(copies) == 2:
+            raise ConnectionError('server closed the connection unexpectedly')
+        return copy_expert(self, sql, file, size)
+
+    monkeypatch.setattr(FakeCursor, 'copy_expert', fail_on_second_chunk)
+    body = import_tasks(client, user, ndjson(*[{'title': f"Task {index}"} for index in range(5)])).json
+
+    assert body == {
+        'success': False,
+        'message': "Import failed, no tasks were imported: server closed the connection unexpectedly",
+    }
+    assert database.rows('task') == []
+    assert not [event for event, _ in database.events]
+
+
+@pytest.mark.parametrize('content_type', ['application/x-ndjson', 'text/csv'])
+def test_an_empty_body_imports_nothing(client, user, database, content_type):
+    body = import_tasks(client, user, 'title\n' if content_type == 'text/csv' else '', content_type).json
+
+    assert (body['accepted'], body['rejected']) == (0, 0)
+    assert database.rows('task') == []
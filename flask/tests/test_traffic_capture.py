@@ -0,0 +1,63 @@
+import json
+import logging
+
+import pytest
+from flask import Flask
+
+from app.helpers import traffic_capture
+from common.app_config import config
+from common.services.async_task import AsyncTaskService
+
+
+@pytest.fixture
+def records(monkeypatch):
+    """
+    Enables the capture and collects the records it writes.
+    """
+    monkeypatch.setattr(config, 'TRAFFIC_CAPTURE_ENABLED', True)
+    monkeypatch.setattr(config, 'TRAFFIC_CAPTURE_SALT', 'test-salt')
+    monkeypatch.setattr(config, 'TRAFFIC_CAPTURE_SAMPLE_RATE', 1.0)
+
+    records = []
+    handler = logging.Handler()
+    handler.emit = lambda record: records.append(json.loads(record.getMessage()))
+    logger = traffic_capture._capture_logger
+    level = logger.level
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    yield records
+    logger.removeHandler(handler)
+    logger.setLevel(level)
+
+
+def test_the_capture_requires_a_salt(monkeypatch):
+    monkeypatch.setattr(config, 'TRAFFIC_CAPTURE_ENABLED', True)
+    monkeypatch.setattr(config, 'TRAFFIC_CAPTURE_SALT', '')
+    with pytest.raises(ValueError, match='TRAFFIC_CAPTURE_SALT'):
+        traffic_capture.init_traffic_capture(Flask(__name__))
+
+
+def test_native_asgi_routes_are_captured(user, records, asgi_client, monkeypatch):
+    async def get_tasks_by_person_id(self, person_id, completed=None):
+        return []
+
+    async def get_task_by_id(self, task_id, person_id):
+        return None
+
+    monkeypatch.setattr(AsyncTaskService, 'get_tasks_by_person_id', get_tasks_by_person_id)
+    monkeypatch.setattr(AsyncTaskService, 'get_task_by_id', get_task_by_id)
+    client = asgi_client
+    person_id = user['person']['entity_id']
+
+    assert client.get('/tasks?filter=active', headers=user['headers']).json()['success']
+    assert not client.post('/tasks', json={'title': ''}, headers=user['headers']).json()['success']
+    assert not client.put('/tasks/' + 'b' * 32, json={'title': 'Renamed'}, headers=user['headers']).json()['success']
+
+    listed, created, updated = records
+    assert listed['route'] == '/tasks' and listed['method'] == 'GET'
+    assert listed['query'] == {'filter': 'active'}
+    assert listed['person'] == traffic_capture.pseudonym(person_id) != person_id
+    assert listed['status'] == 200 and listed['response_bytes'] > 0
+    assert created['body'] == {'title': 'str:0'} and created['status'] == 200
+    assert updated['route'] == '/tasks/<task_id>'
+    assert updated['path_args'] == {'task_id': traffic_capture.pseudonym('b' * 32)}